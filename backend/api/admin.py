@@ -1,42 +1,138 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import OperationalError, connections
+from django.utils.functional import cached_property
+from . import search
 from .models import Seminar, Attendance, JoinedParticipant, Certificate, Evaluation
 
 
+# Below this many rows an exact COUNT(*) is cheap and estimates are too coarse to show
+EXACT_COUNT_THRESHOLD = 10000
+
+
+def estimated_count(model, using):
+    """Row count from planner statistics (pg_class / sqlite_stat1); None when the database has none"""
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)', [table])
+        elif connection.vendor == 'sqlite':
+            # Written by ANALYZE / PRAGMA optimize; the first number of each row is the table's row count.
+            # A failed SELECT leaves an SQLite transaction usable, so a missing table needs no extra lookup.
+            try:
+                cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [table])
+            except OperationalError:
+                return None
+        else:
+            return None
+        row = cursor.fetchone()
+    if row is None or row[0] is None:
+        return None
+    count = int(str(row[0]).split()[0])
+    return count if count >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Uses the planner's row estimate for unfiltered changelists of large tables instead of COUNT(*)"""
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.has_filters():
+            estimate = estimated_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= EXACT_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+
+class RecentSeminarFilter(admin.SimpleListFilter):
+    """Seminar filter listing only the latest seminars (plus the selected one) instead of every seminar.
+
+    Any other seminar is reached by the search box or by picking it on the seminar changelist;
+    the change forms choose seminars through the autocomplete widget.
+    """
+    title = 'seminar'
+    parameter_name = 'seminar__id__exact'
+    limit = 20
+
+    def lookups(self, request, model_admin):
+        seminars = list(Seminar.objects.order_by('-date', '-id').values_list('id', 'title', 'date')[:self.limit])
+        selected = self.value()
+        if selected and selected.isdigit() and all(str(pk) != selected for pk, _, _ in seminars):
+            seminars += Seminar.objects.filter(pk=selected).values_list('id', 'title', 'date')
+        return [(str(pk), f'{title} ({day})') for pk, title, day in seminars]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(seminar_id=self.value())
+        return queryset
+
+
+class FullTextSearchMixin:
+    """Answer changelist searches from the FTS5 index (api/search.py) instead of LIKE scans over search_fields"""
+
+    def get_search_results(self, request, queryset, search_term):
+        pks = search.matching_pks(queryset.model, search_term, queryset.db)
+        if pks is None:
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(pk__in=pks), False
+
+
+class ParticipationAdmin(admin.ModelAdmin):
+    """Shared changelist settings for the per-participant tables, which grow by thousands of rows per event.
+
+    No date_hierarchy: its distinct-dates query reads every row on each page load;
+    the date list filters cover the same ground without one.
+    """
+    # __str__ and the seminar column read seminar.title: join it instead of one query per row
+    list_select_related = ('seminar',)
+    autocomplete_fields = ('seminar',)
+    paginator = EstimatedCountPaginator
+    # Skips the second, unfiltered COUNT(*) behind "N results (M total)"
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        # The joined seminar's evaluation form and metadata are never shown in these lists
+        return super().get_queryset(request).defer('seminar__questions', 'seminar__metadata')
+
+
 @admin.register(Seminar)
-class SeminarAdmin(admin.ModelAdmin):
-    list_display = ('title', 'speaker', 'date', 'capacity', 'duration', 'created_at')
+class SeminarAdmin(FullTextSearchMixin, admin.ModelAdmin):
+    list_display = ('title', 'speaker', 'date', 'capacity', 'joined_count', 'waitlist_enabled', 'duration', 'created_at')
     list_filter = ('date', 'created_at')
     search_fields = ('title', 'speaker')
     ordering = ('-created_at',)
+    date_hierarchy = 'date'
 
 
 @admin.register(JoinedParticipant)
-class JoinedParticipantAdmin(admin.ModelAdmin):
-    list_display = ('participant_email', 'participant_name', 'seminar', 'joined_at', 'present')
-    list_filter = ('seminar', 'joined_at', 'present')
+class JoinedParticipantAdmin(FullTextSearchMixin, ParticipationAdmin):
+    list_display = ('participant_email', 'participant_name', 'seminar', 'joined_at', 'status', 'present')
+    list_filter = (RecentSeminarFilter, 'joined_at', 'status', 'present')
     search_fields = ('participant_email', 'participant_name')
     ordering = ('-joined_at',)
 
 
 @admin.register(Attendance)
-class AttendanceAdmin(admin.ModelAdmin):
+class AttendanceAdmin(ParticipationAdmin):
     list_display = ('participant_email', 'seminar', 'time_in', 'time_out', 'created_at')
-    list_filter = ('seminar', 'created_at')
+    list_filter = (RecentSeminarFilter, 'created_at')
     search_fields = ('participant_email',)
     ordering = ('-created_at',)
 
 
 @admin.register(Evaluation)
-class EvaluationAdmin(admin.ModelAdmin):
+class EvaluationAdmin(ParticipationAdmin):
     list_display = ('participant_email', 'seminar', 'created_at')
-    list_filter = ('seminar', 'created_at')
+    list_filter = (RecentSeminarFilter, 'created_at')
     search_fields = ('participant_email',)
     ordering = ('-created_at',)
 
 
 @admin.register(Certificate)
-class CertificateAdmin(admin.ModelAdmin):
+class CertificateAdmin(ParticipationAdmin):
     list_display = ('participant_email', 'participant_name', 'seminar', 'certificate_number', 'issued_at')
-    list_filter = ('seminar', 'issued_at')
+    list_filter = (RecentSeminarFilter, 'issued_at')
     search_fields = ('participant_email', 'certificate_number')
     ordering = ('-issued_at',)
@@ -0,0 +1,213 @@
+"""Seminar capacity enforcement.
+
+Seats are taken with one conditional ``UPDATE seminar SET joined_count = joined_count + 1
+WHERE joined_count < capacity`` in the join's transaction, so two joins can never both
+take the last seat and no join has to count rows. Batch writers (form check-ins,
+roster imports, sync pushes) lock the seminars they touch and hand out the remaining
+seats in one go with ``admit_many``.
+
+A seminar without a capacity (empty or 0) is unlimited. When a seminar is full, new
+participants are refused (SeminarFull) unless ``waitlist_enabled`` is set, in which
+case they are stored as waitlisted and promoted in join order whenever a seat frees
+up (a joined participant is deleted or the capacity is raised).
+"""
+from collections import Counter
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import JoinedParticipant, Seminar
+
+
+JOINED = JoinedParticipant.JOINED
+WAITLISTED = JoinedParticipant.WAITLISTED
+
+PRESENCE_FIELDS = ('present', 'check_in', 'check_out')
+
+
+class SeminarFull(Exception):
+    """Raised when a seminar has no free seat and no waitlist"""
+
+
+def unlimited_q():
+    return Q(capacity__isnull=True) | Q(capacity__lte=0)
+
+
+def has_room(capacity, joined):
+    return not capacity or capacity <= 0 or joined < capacity
+
+
+def take_seat(seminar_id, present=False):
+    """Claim one seat with a conditional UPDATE; False when the seminar is full (or gone)"""
+    updates = {'joined_count': F('joined_count') + 1}
+    if present:
+        updates['present_count'] = F('present_count') + 1
+    return Seminar.objects.filter(
+        unlimited_q() | Q(joined_count__lt=F('capacity')), pk=seminar_id,
+    ).update(**updates) == 1
+
+
+def admit(seminar_id, participant_email, **fields):
+    """Join one participant, waitlisting or raising SeminarFull when there is no seat.
+
+    Returns ``(participant, created)``; joining twice returns the existing row.
+    Raises Seminar.DoesNotExist for an unknown seminar.
+    """
+    try:
+        with transaction.atomic():
+            if take_seat(seminar_id, present=fields.get('present', False)):
+                status = JOINED
+            else:
+                waitlist = Seminar.objects.filter(pk=seminar_id).values_list('waitlist_enabled', flat=True).first()
+                if waitlist is None:
+                    raise Seminar.DoesNotExist
+                existing = JoinedParticipant.objects.filter(seminar_id=seminar_id, participant_email=participant_email).first()
+                if existing is not None:
+                    return existing, False
+                if not waitlist:
+                    raise SeminarFull
+                status = WAITLISTED
+                fields = {name: value for name, value in fields.items() if name not in PRESENCE_FIELDS}
+            participant = JoinedParticipant(seminar_id=seminar_id, participant_email=participant_email, status=status, **fields)
+            # Counters already moved; tells the post_save receiver not to recount
+            participant._admission_counted = True
+            participant.save()
+    except IntegrityError:
+        # Already joined: the savepoint rollback also gave the seat back
+        return JoinedParticipant.objects.get(seminar_id=seminar_id, participant_email=participant_email), False
+    return participant, True
+
+
+def _lock_for_sqlite(seminar_ids):
+    """Take SQLite's write lock, which FOR UPDATE does not, unless the transaction began IMMEDIATE"""
+    if connection.vendor != 'sqlite':
+        return
+    if connection.settings_dict['OPTIONS'].get('transaction_mode') in ('IMMEDIATE', 'EXCLUSIVE'):
+        return
+    # A no-op write: in a DEFERRED transaction the first write is what takes the lock
+    Seminar.objects.filter(pk__in=seminar_ids).update(joined_count=F('joined_count'))
+
+
+def admit_many(keys):
+    """Admission status for (seminar_id, email) pairs, in the caller's transaction.
+
+    Returns ``{key: (status, created)}`` where status is JOINED, WAITLISTED or None
+    (seminar full, no waitlist); existing participants keep their status. Seats are
+    handed out in the order of ``keys`` and ``joined_count`` is moved for the new
+    JOINED rows, which the caller must then insert. Keys of unknown seminars are left out.
+    """
+    keys = list(dict.fromkeys(keys))
+    seminar_ids = {seminar_id for seminar_id, _ in keys}
+    # Lock first so a concurrent join cannot admit the same participant or seat; the
+    # existing participants read below are then final for the rest of the transaction
+    _lock_for_sqlite(seminar_ids)
+    seminars = {
+        row['id']: row
+        for row in Seminar.objects.select_for_update()
+        .filter(pk__in=seminar_ids)
+        .values('id', 'capacity', 'joined_count', 'waitlist_enabled')
+    }
+    existing = dict(
+        ((seminar_id, email), status)
+        for seminar_id, email, status in JoinedParticipant.objects.filter(
+            seminar_id__in=seminars, participant_email__in={email for _, email in keys},
+        ).values_list('seminar_id', 'participant_email', 'status')
+    )
+    result, admitted = {}, Counter()
+    for key in keys:
+        seminar = seminars.get(key[0])
+        if seminar is None:
+            continue
+        if key in existing:
+            result[key] = (existing[key], False)
+        elif has_room(seminar['capacity'], seminar['joined_count'] + admitted[key[0]]):
+            admitted[key[0]] += 1
+            result[key] = (JOINED, True)
+        else:
+            result[key] = (WAITLISTED if seminar['waitlist_enabled'] else None, True)
+    for seminar_id, n in admitted.items():
+        Seminar.objects.filter(pk=seminar_id).update(joined_count=F('joined_count') + n)
+    return result
+
+
+def _count(**filters):
+    rows = JoinedParticipant.objects.filter(seminar=OuterRef('pk'), **filters).order_by().values('seminar')
+    return Coalesce(Subquery(rows.annotate(n=Count('id')).values('n')), Value(0))
+
+
+def present_keys(keys):
+    """The (seminar_id, email) pairs among ``keys`` whose participant is joined and present"""
+    keys = set(keys)
+    if not keys:
+        return set()
+    rows = JoinedParticipant.objects.filter(
+        seminar_id__in={seminar_id for seminar_id, _ in keys},
+        participant_email__in={email for _, email in keys},
+        status=JOINED, present=True,
+    ).values_list('seminar_id', 'participant_email')
+    return keys.intersection(rows)
+
+
+def shift_present_counts(before, after):
+    """Move present_count for bulk writes, given ``present_keys`` of the written pairs before and after.
+
+    Only the participants whose presence flipped are added or taken away, so a
+    check-in never counts the seminar's rows.
+    """
+    delta = Counter(seminar_id for seminar_id, _ in after - before)
+    delta.subtract(seminar_id for seminar_id, _ in before - after)
+    for seminar_id, n in delta.items():
+        if n:
+            Seminar.objects.filter(pk=seminar_id).update(present_count=F('present_count') + n)
+
+
+def recount(seminar_ids):
+    """Rebuild both counters from the participant rows (after edits that bypassed admission, e.g. the admin)"""
+    Seminar.objects.filter(pk__in=seminar_ids).update(
+        joined_count=_count(status=JOINED),
+        present_count=_count(status=JOINED, present=True),
+    )
+
+
+def release(participant):
+    """Give back the seat of a deleted participant"""
+    if participant.status != JOINED:
+        return
+    updates = {'joined_count': F('joined_count') - 1}
+    if participant.present:
+        updates['present_count'] = F('present_count') - 1
+    Seminar.objects.filter(pk=participant.seminar_id, joined_count__gt=0).update(**updates)
+
+
+def promote(seminar_id):
+    """Move waitlisted participants, earliest first, into free seats; returns how many were promoted"""
+    promoted = 0
+    with transaction.atomic():
+        waiting = JoinedParticipant.objects.filter(seminar_id=seminar_id, status=WAITLISTED).order_by('id')
+        for pk in list(waiting.values_list('id', flat=True)):
+            if not take_seat(seminar_id):
+                break
+            JoinedParticipant.objects.filter(pk=pk).update(status=JOINED, updated_at=timezone.now())
+            promoted += 1
+    return promoted
+
+
+def admission(seminar_id):
+    """Capacity, counters and waitlist length of a seminar; None when it does not exist"""
+    seminar = Seminar.objects.filter(pk=seminar_id).values(
+        'capacity', 'joined_count', 'present_count', 'waitlist_enabled',
+    ).first()
+    if seminar is None:
+        return None
+    capacity = seminar['capacity'] if seminar['capacity'] and seminar['capacity'] > 0 else None
+    return {
+        'seminar_id': seminar_id,
+        'capacity': capacity,
+        'joined': seminar['joined_count'],
+        'present': seminar['present_count'],
+        'available': max(capacity - seminar['joined_count'], 0) if capacity else None,
+        'waitlist_enabled': seminar['waitlist_enabled'],
+        'waitlisted': JoinedParticipant.objects.filter(seminar_id=seminar_id, status=WAITLISTED).count(),
+    }
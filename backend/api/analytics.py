@@ -0,0 +1,253 @@
+"""Evaluation analytics over the free-form ``Evaluation.answers`` JSON.
+
+Answers are decoded once into a flat column of (question, score) codes, which a
+single count turns into the score distribution of every question; Likert means,
+per-seminar and per-speaker satisfaction are derived from those counts.
+Free-text answers feed word frequencies. Decoding the JSON answers dominates the
+cost, so the counting stays in plain Python.
+
+Each seminar's counts are cached under its stats namespace, so they are dropped
+whenever its evaluations change; semester reports merge the cached counts and
+only read the evaluations of seminars missing from the cache.
+
+Scores: ``rating`` answers are used as given (1..5, or up to the largest numeric
+option); ``select`` options are listed best first, so the first of N options
+scores N and the last scores 1.
+"""
+import re
+from array import array
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .caching import versioned_keys
+from .models import Evaluation, Seminar
+from .stats import stats_namespace
+
+
+LIKERT_TYPES = ('rating', 'select')
+TEXT_TYPES = ('text',)
+# Free-text answer keys that are not listed in Seminar.questions
+EXTRA_TEXT_KEYS = ('feedback',)
+DEFAULT_RATING_SCALE = 5
+
+SEMINAR_FIELDS = ('id', 'title', 'speaker', 'semester', 'questions')
+
+WORD_RE = re.compile(r"[a-z][a-z']+")
+STOPWORDS = frozenset("""
+    a about all also am an and any are as at be been but by can could did do does for from get got had has have
+    how i if in into is it its it's just me more most my no not of on or our so some than that the their them
+    then there these they this to too us very was we were what when which who will with would you your
+""".split())
+
+
+def likert_questions(questions):
+    """(id, question, type, labels) of each scored question; ``labels[i]`` is the label of score i + 1"""
+    result = []
+    for question in questions or []:
+        if not isinstance(question, dict) or question.get('id') is None or question.get('type') not in LIKERT_TYPES:
+            continue
+        options = question.get('options') or []
+        if question['type'] == 'select':
+            if not options:
+                continue
+            labels = [str(option) for option in reversed(options)]
+        else:
+            numeric = [option for option in options if isinstance(option, (int, float)) and not isinstance(option, bool)]
+            labels = [str(score) for score in range(1, int(max(numeric, default=DEFAULT_RATING_SCALE)) + 1)]
+        result.append((str(question['id']), question.get('question'), question['type'], labels))
+    return result
+
+
+def text_keys(questions):
+    keys = {
+        str(question['id']) for question in questions or []
+        if isinstance(question, dict) and question.get('id') is not None and question.get('type') in TEXT_TYPES
+    }
+    return keys | set(EXTRA_TEXT_KEYS)
+
+
+def _score_lookup(labels):
+    """{answer: score}; rating answers arrive as 4, 4.0 or "4" depending on the client (4 and 4.0 hash alike)"""
+    scores = {}
+    for score, label in enumerate(labels, start=1):
+        scores[label] = score
+        if label.isdigit():
+            scores[int(label)] = score
+    return scores
+
+
+def _bincount(codes, length):
+    counts = [0] * length
+    for code, n in Counter(codes).items():
+        counts[code] = n
+    return counts
+
+
+def seminar_counts(seminars):
+    """Score distributions, evaluation totals and word counts for ``values()`` rows of seminars.
+
+    Reads the evaluations of all given seminars in one query.
+    """
+    catalog = []  # (seminar position, id, question, type, labels) per scored question
+    scored = {}   # seminar id -> {question id: (first code, {answer: score})}
+    texts = {}
+    width = max((len(labels) for seminar in seminars for *_, labels in likert_questions(seminar['questions'])), default=1)
+    for position, seminar in enumerate(seminars):
+        scored[seminar['id']] = {}
+        for qid, question, qtype, labels in likert_questions(seminar['questions']):
+            # One code per scored answer: question position * width + score - 1
+            scored[seminar['id']][qid] = (len(catalog) * width - 1, _score_lookup(labels))
+            catalog.append((position, qid, question, qtype, labels))
+        texts[seminar['id']] = text_keys(seminar['questions'])
+
+    codes = array('q')
+    evaluations = Counter()
+    words = {seminar['id']: Counter() for seminar in seminars}
+    rows = (
+        Evaluation.objects.filter(seminar_id__in=list(texts))
+        .values_list('seminar_id', 'answers')
+        .iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+    )
+    for seminar_id, answers in rows:
+        evaluations[seminar_id] += 1
+        if not isinstance(answers, dict):
+            continue
+        questions, free_text, tokens = scored[seminar_id], texts[seminar_id], []
+        for key, answer in answers.items():
+            question = questions.get(key)
+            if question is not None:
+                try:
+                    score = question[1].get(answer)
+                except TypeError:  # an unhashable (list/object) answer is not a valid choice
+                    score = None
+                if score:
+                    codes.append(question[0] + score)
+            elif key in free_text and isinstance(answer, str):
+                tokens += WORD_RE.findall(answer.lower())
+        if tokens:
+            words[seminar_id].update(word for word in tokens if word not in STOPWORDS)
+
+    counts = _bincount(codes, len(catalog) * width)
+    result = {
+        seminar['id']: {
+            **{field: seminar[field] for field in SEMINAR_FIELDS if field != 'questions'},
+            'evaluations': evaluations[seminar['id']],
+            'questions': [],
+            'words': dict(words[seminar['id']]),
+        }
+        for seminar in seminars
+    }
+    for index, (position, qid, question, qtype, labels) in enumerate(catalog):
+        result[seminars[position]['id']]['questions'].append({
+            'id': qid,
+            'question': question,
+            'type': qtype,
+            'labels': labels,
+            'counts': counts[index * width:index * width + len(labels)],
+        })
+    return result
+
+
+def cached_seminar_counts(seminar_ids):
+    """``seminar_counts`` per seminar id, computing only the seminars missing from the cache"""
+    keys = versioned_keys([stats_namespace(seminar_id) for seminar_id in seminar_ids], 'analytics')
+    keys = {seminar_id: keys[stats_namespace(seminar_id)] for seminar_id in seminar_ids}
+    cached = cache.get_many(list(keys.values()))
+    result = {seminar_id: cached[key] for seminar_id, key in keys.items() if key in cached}
+    missing = [seminar_id for seminar_id in seminar_ids if seminar_id not in result]
+    if missing:
+        computed = seminar_counts(list(Seminar.objects.filter(pk__in=missing).order_by('id').values(*SEMINAR_FIELDS)))
+        cache.set_many({keys[seminar_id]: counts for seminar_id, counts in computed.items()}, timeout=settings.SEMINAR_STATS_CACHE_TIMEOUT)
+        result.update(computed)
+    return result
+
+
+def _question_summary(question):
+    counts = question['counts']
+    answered = sum(counts)
+    total = sum(score * n for score, n in enumerate(counts, start=1))
+    return {
+        'id': question['id'],
+        'question': question['question'],
+        'type': question['type'],
+        'answered': answered,
+        'mean': round(total / answered, 3) if answered else None,
+        'scale': len(counts),
+        'distribution': dict(zip(question['labels'], counts)),
+    }
+
+
+def _satisfaction(questions):
+    """(sum, count) of every scored answer rescaled to 0 (worst) .. 1 (best)"""
+    total = answered = 0
+    for question in questions:
+        top = len(question['counts']) - 1
+        if top < 1:
+            continue
+        total += sum((score - 1) / top * n for score, n in enumerate(question['counts'], start=1))
+        answered += sum(question['counts'])
+    return total, answered
+
+
+def build_report(counts):
+    """Merge per-seminar counts (in report order) into the API response"""
+    seminars, speakers, words = [], {}, Counter()
+    for entry in counts:
+        total, answered = _satisfaction(entry['questions'])
+        seminars.append({
+            'id': entry['id'],
+            'title': entry['title'],
+            'speaker': entry['speaker'],
+            'semester': entry['semester'],
+            'evaluations': entry['evaluations'],
+            'satisfaction': round(total / answered, 4) if answered else None,
+            'questions': [_question_summary(question) for question in entry['questions']],
+        })
+        speaker = speakers.setdefault(entry['speaker'] or '', {'seminars': 0, 'evaluations': 0, 'total': 0.0, 'answered': 0})
+        speaker['seminars'] += 1
+        speaker['evaluations'] += entry['evaluations']
+        speaker['total'] += total
+        speaker['answered'] += answered
+        words.update(entry['words'])
+
+    speaker_rows = sorted(
+        (
+            {
+                'speaker': name,
+                'seminars': speaker['seminars'],
+                'evaluations': speaker['evaluations'],
+                'satisfaction': round(speaker['total'] / speaker['answered'], 4) if speaker['answered'] else None,
+            }
+            for name, speaker in speakers.items()
+        ),
+        key=lambda row: (row['satisfaction'] is None, -(row['satisfaction'] or 0), row['speaker']),
+    )
+    return {
+        'evaluations': sum(entry['evaluations'] for entry in counts),
+        'seminars': seminars,
+        'speakers': speaker_rows,
+        'words': [{'word': word, 'count': n} for word, n in words.most_common(settings.ANALYTICS_TOP_WORDS)],
+    }
+
+
+def seminar_analytics(seminar_id):
+    """Report for one seminar; None when it does not exist"""
+    if not Seminar.objects.filter(pk=seminar_id).exists():
+        return None
+    counts = cached_seminar_counts([seminar_id])
+    return build_report([counts[seminar_id]]) if seminar_id in counts else None
+
+
+def evaluation_analytics(semester=None, speaker=None):
+    """Report over every seminar, optionally limited to a semester and/or speaker"""
+    seminars = Seminar.objects.all()
+    if semester:
+        seminars = seminars.filter(semester=semester)
+    if speaker:
+        seminars = seminars.filter(speaker=speaker)
+    seminar_ids = list(seminars.order_by('date', 'id').values_list('id', flat=True))
+    counts = cached_seminar_counts(seminar_ids)
+    # A seminar deleted since the id list was read is simply left out
+    return build_report([counts[seminar_id] for seminar_id in seminar_ids if seminar_id in counts])
@@ -0,0 +1,98 @@
+"""Async (ASGI-native) versions of the hot check-in endpoints.
+
+DRF's @api_view is sync-only, so these are plain Django async views: under an
+ASGI server they wait on the database without holding a worker thread per
+request. They accept the same payloads and return the same responses as their
+counterparts in views.py.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework import status
+
+from . import events, ingest, throttling, webhook
+from .models import Attendance, Seminar
+from .serializers import AttendanceSerializer, AttendanceBulkItemSerializer
+from .utils import async_exception_catcher
+
+
+def _request_data(request):
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+    return request.POST.dict()
+
+
+@require_GET
+@async_exception_catcher
+async def health_check(request):
+    """Health check endpoint served without a worker thread"""
+    return JsonResponse({'status': 'Backend is running', 'storage': 'SQLite local', 'mode': 'async'})
+
+
+@csrf_exempt
+@require_POST
+@async_exception_catcher
+async def google_form_submit(request):
+    """Async webhook endpoint for Google Forms submission via Apps Script.
+
+    The whole submission runs as one call on the ORM's sync thread: the check-in's upserts
+    must share a transaction, which the async ORM cannot open.
+    """
+    code, body, headers = await sync_to_async(webhook.form_submission)(
+        throttling.client_ip(request), lambda: _request_data(request),
+    )
+    response = JsonResponse(body, status=code)
+    for header, value in headers.items():
+        response[header] = value
+    return response
+
+
+@csrf_exempt
+@require_POST
+@async_exception_catcher
+async def attendance(request):
+    """Async attendance check-in/check-out: creates the row or updates its time_in/time_out"""
+    data = _request_data(request)
+    if data is None:
+        return JsonResponse({'error': 'Invalid JSON body'}, status=status.HTTP_400_BAD_REQUEST)
+
+    serializer = AttendanceBulkItemSerializer(data=data)
+    if not serializer.is_valid():
+        return JsonResponse({'error': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+    item = serializer.validated_data
+
+    if not await Seminar.objects.filter(pk=item['seminar']).aexists():
+        return JsonResponse({'error': {'seminar': ['Seminar not found']}}, status=status.HTTP_400_BAD_REQUEST)
+
+    if ingest.is_enabled():
+        queue_id = await sync_to_async(ingest.enqueue_attendance_scan)(item)
+        return JsonResponse({'status': 'queued', 'queue_id': queue_id, **serializer.data}, status=status.HTTP_202_ACCEPTED)
+
+    row, created = await Attendance.objects.aupdate_or_create(
+        seminar_id=item['seminar'],
+        participant_email=item['participant_email'],
+        defaults={field: item[field] for field in ('time_in', 'time_out') if field in item},
+    )
+    return JsonResponse(
+        AttendanceSerializer(row).data,
+        status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+    )
+
+
+@require_GET
+async def attendance_stream(request, seminar_id):
+    """Server-Sent Events feed of a seminar's check-ins and check-outs, without a thread per open stream"""
+    if not await Seminar.objects.filter(pk=seminar_id).aexists():
+        return HttpResponse('Seminar not found\n', status=status.HTTP_404_NOT_FOUND, content_type='text/plain')
+    response = StreamingHttpResponse(
+        events.astream(seminar_id, events.parse_last_event_id(request)),
+        content_type='text/event-stream',
+    )
+    return events.event_stream_headers(response)
@@ -0,0 +1,23 @@
+"""SQLite backend that refreshes the planner statistics when a connection closes.
+
+``PRAGMA optimize`` runs ANALYZE on the tables this connection queried whose
+statistics are missing or stale, which keeps ``sqlite_stat1`` current for the
+query planner and for the admin's estimated row counts (api/admin.py). It is
+usually a no-op; ``analysis_limit`` bounds the work when it is not. It does not
+wait for the write lock, so a busy database only postpones it to a later close.
+"""
+from django.conf import settings
+from django.db.backends.sqlite3 import base
+from django.db.backends.sqlite3.base import Database
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def _close(self):
+        if self.connection is not None and settings.SQLITE_OPTIMIZE_ON_CLOSE and not self.in_atomic_block:
+            try:
+                self.connection.execute('PRAGMA busy_timeout = 0')
+                self.connection.execute('PRAGMA analysis_limit = 400')
+                self.connection.execute('PRAGMA optimize')
+            except Database.Error:
+                pass
+        return super()._close()
@@ -0,0 +1,124 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router
+from django.http import HttpResponse
+from django.utils.http import http_date, parse_http_date_safe
+
+from .renderers import dumps
+
+
+def _version_key(namespace):
+    return f'api:version:{namespace}'
+
+
+def _changed_key(namespace):
+    return f'api:changed:{namespace}'
+
+
+def get_version(namespace):
+    """Current version of a cached namespace; every cached entry key embeds it"""
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        # Seed with a timestamp so an evicted counter never reuses an old version
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(namespace):
+    """Invalidate every entry cached under ``namespace`` by moving to a new version"""
+    key = _version_key(namespace)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+    # Whole seconds like HTTP dates, moving forward on every change so two changes in
+    # the same second never share a Last-Modified
+    changed = cache.get(_changed_key(namespace)) or 0
+    cache.set(_changed_key(namespace), max(int(time.time()), changed + 1), timeout=None)
+
+
+def last_changed(namespace):
+    """Unix time (seconds) of the latest ``bump_version`` of a namespace.
+
+    Unlike the newest row's timestamp it also moves on deletes. When the stamp was
+    evicted it restarts at the current time, which only makes clients refetch once.
+    """
+    key = _changed_key(namespace)
+    changed = cache.get(key)
+    if changed is None:
+        cache.add(key, int(time.time()), timeout=None)
+        changed = cache.get(key)
+    return changed
+
+
+def versioned_key(namespace, *parts):
+    return ':'.join(['api', namespace, str(get_version(namespace)), *map(str, parts)])
+
+
+def versioned_keys(namespaces, *parts):
+    """``versioned_key`` for many namespaces, reading their versions with one ``get_many``"""
+    versions = cache.get_many([_version_key(namespace) for namespace in namespaces])
+    return {
+        namespace: ':'.join([
+            'api', namespace,
+            str(versions.get(_version_key(namespace)) or get_version(namespace)),
+            *map(str, parts),
+        ])
+        for namespace in namespaces
+    }
+
+
+def get_seminar_catalog(serializer=None):
+    """Rendered seminar list plus its validators, served from cache while no seminar changes.
+
+    ``serializer`` is a SeminarReadSerializer selecting the fields; each field set is cached separately.
+    """
+    from .models import Seminar
+    from .serializers import SeminarReadSerializer
+
+    serializer = serializer or SeminarReadSerializer()
+    key = versioned_key('seminars', 'catalog', ','.join(serializer.fields))
+    catalog = cache.get(key)
+    if catalog is None:
+        # Read before the rows, so a change racing the query leaves an older stamp, never a newer one
+        last_modified = last_changed('seminars')
+        # From the primary even under replica_reads: a lagging replica's rows would stay cached
+        # for SEMINAR_CATALOG_CACHE_TIMEOUT after the version moved on
+        qs = Seminar.objects.using(router.db_for_write(Seminar)).order_by('date')
+        body = dumps(serializer.serialize(qs.values(*serializer.fields)))
+        catalog = {
+            'body': body,
+            'etag': '"%s"' % hashlib.sha256(body).hexdigest(),
+            'last_modified': last_modified,
+        }
+        cache.set(key, catalog, timeout=settings.SEMINAR_CATALOG_CACHE_TIMEOUT)
+    return catalog
+
+
+def _not_modified(request, etag, last_modified):
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        # Weak comparison: compression (api/compression.py) hands out W/"..." for the same body
+        tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+        return '*' in tags or etag in tags
+    if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    return bool(last_modified and if_modified_since and last_modified <= if_modified_since)
+
+
+def conditional_response(request, cached):
+    """Build a JSON response from a cached ``{'body', 'etag', 'last_modified'}`` entry, or 304 when the client is current"""
+    if _not_modified(request, cached['etag'], cached['last_modified']):
+        response = HttpResponse(status=304)
+    else:
+        response = HttpResponse(cached['body'], content_type='application/json')
+    response['ETag'] = cached['etag']
+    if cached['last_modified']:
+        response['Last-Modified'] = http_date(cached['last_modified'])
+    # Let clients keep a copy but revalidate it on every poll
+    response['Cache-Control'] = 'no-cache'
+    return response
@@ -0,0 +1,46 @@
+"""Certificate rendering used by the worker processes of ``api.certificates``.
+
+Kept free of Django imports so pool workers can import it without setting up Django.
+"""
+from pathlib import Path
+from xml.sax.saxutils import escape, quoteattr
+
+
+SVG_TEMPLATE = """<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" width="1200" height="850" viewBox="0 0 1200 850">
+  <rect width="1200" height="850" fill="#ffffff"/>
+  {background}
+  <g font-family="Georgia, Garamond, serif" fill="#1a3a52" text-anchor="middle">
+    <text x="600" y="200" font-size="56" font-weight="bold">Certificate of Participation</text>
+    <text x="600" y="290" font-size="24">This certifies that</text>
+    <text x="600" y="380" font-size="48" fill="#c41e3a">{name}</text>
+    <text x="600" y="460" font-size="24">attended the seminar</text>
+    <text x="600" y="530" font-size="34" font-weight="bold">{title}</text>
+    <text x="600" y="590" font-size="22">{details}</text>
+    <text x="600" y="790" font-size="16" fill="#666666">Certificate No. {number}</text>
+  </g>
+</svg>
+"""
+
+
+def certificate_number(seminar_id, evaluation_id):
+    """Derive the number from the participant's evaluation row, whose id is already unique, so no retries are needed"""
+    return f'CERT-{seminar_id:05d}-{evaluation_id:08d}'
+
+
+def render_certificate_svg(job):
+    """Render one certificate to ``job['path']``. Runs in a worker process, so it must not touch the ORM."""
+    background = ''
+    if job['template_url']:
+        background = f'<image href={quoteattr(job["template_url"])} width="1200" height="850" preserveAspectRatio="xMidYMid slice"/>'
+    details = ' | '.join(part for part in (job['date'], job['speaker']) if part)
+    svg = SVG_TEMPLATE.format(
+        background=background,
+        name=escape(job['name']),
+        title=escape(job['title']),
+        details=escape(details),
+        number=escape(job['number']),
+    )
+    path = Path(job['path'])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(svg, encoding='utf-8')
+    return job['email']
@@ -0,0 +1,168 @@
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from .certificate_render import certificate_number, render_certificate_svg
+from .models import Attendance, Certificate, CertificateJob, Evaluation, JoinedParticipant, Seminar
+
+
+logger = logging.getLogger(__name__)
+
+
+def eligible_participants(seminar):
+    """(email, evaluation_id) for participants who were present and evaluated but have no certificate yet"""
+    present = Q(participant_email__in=Attendance.objects.filter(seminar=seminar, time_in__isnull=False).values('participant_email'))
+    present |= Q(participant_email__in=JoinedParticipant.objects.filter(seminar=seminar, present=True).values('participant_email'))
+    return list(
+        Evaluation.objects.filter(seminar=seminar)
+        .filter(present)
+        .exclude(participant_email__in=Certificate.objects.filter(seminar=seminar).values('participant_email'))
+        .order_by('id')
+        .values_list('participant_email', 'id')
+    )
+
+
+def get_progress(seminar_id):
+    """{'status', 'total', 'done', 'started_at', 'finished_at'} of the seminar's latest job, or None"""
+    job = CertificateJob.objects.filter(seminar_id=seminar_id).first()
+    if job is None:
+        return None
+    return {
+        'status': job.status,
+        'total': job.total,
+        'done': job.done,
+        'started_at': job.started_at.timestamp() if job.started_at else None,
+        'finished_at': job.finished_at.timestamp() if job.finished_at else None,
+    }
+
+
+def _set_progress(seminar_id, **fields):
+    CertificateJob.objects.update_or_create(seminar_id=seminar_id, defaults=fields)
+
+
+def claim_job(seminar_id):
+    """Queue a job for the seminar unless one is active; one conditional UPDATE, so only one process wins.
+
+    A job not updated for CERTIFICATE_PROGRESS_TIMEOUT seconds belongs to a process that died and is taken over.
+    """
+    CertificateJob.objects.get_or_create(seminar_id=seminar_id, defaults={'status': CertificateJob.FAILED})
+    stale = timezone.now() - timedelta(seconds=settings.CERTIFICATE_PROGRESS_TIMEOUT)
+    return CertificateJob.objects.filter(
+        Q(seminar_id=seminar_id) & (~Q(status__in=CertificateJob.ACTIVE) | Q(updated_at__lt=stale))
+    ).update(
+        status=CertificateJob.QUEUED, total=None, done=0, started_at=None, finished_at=None, updated_at=timezone.now(),
+    ) == 1
+
+
+def _recorded(seminar, jobs):
+    """The jobs whose certificate row exists after an ``ignore_conflicts`` insert; the others collided"""
+    stored = dict(
+        Certificate.objects.filter(certificate_number__in=[job['number'] for job in jobs])
+        .values_list('certificate_number', 'participant_email')
+    )
+    recorded = [job for job in jobs if stored.get(job['number']) == job['email']]
+    for job in jobs:
+        if job['number'] not in stored:
+            # Nothing refers to this file; a number held by another row keeps its file
+            Path(job['path']).unlink(missing_ok=True)
+    if len(recorded) < len(jobs):
+        logger.warning('%d certificates of seminar %s collided with existing rows and were not issued', len(jobs) - len(recorded), seminar.pk)
+    return recorded
+
+
+def generate_certificates(seminar, workers=None, batch_size=None, on_progress=None):
+    """Render and record certificates for every eligible participant of ``seminar``.
+
+    Work is done in batches: each batch is rendered in parallel by a process pool
+    and then recorded with one bulk insert, so an interrupted run resumes where it
+    stopped (participants that already have a certificate are skipped). Rows that
+    collide with an existing certificate are not counted in ``done``.
+    """
+    workers = workers or settings.CERTIFICATE_WORKERS
+    batch_size = batch_size or settings.CERTIFICATE_BATCH_SIZE
+    pending = eligible_participants(seminar)
+    names = dict(
+        JoinedParticipant.objects.filter(seminar=seminar, participant_email__in=[email for email, _ in pending])
+        .values_list('participant_email', 'participant_name')
+    )
+    media_dir = Path(settings.MEDIA_ROOT) / 'certificates' / str(seminar.pk)
+    done = 0
+    _set_progress(seminar.pk, status=CertificateJob.RUNNING, total=len(pending), done=0, started_at=timezone.now(), finished_at=None)
+
+    # Workers are spawned, not forked: the web process has other threads whose locks a fork would copy
+    executor = ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+    ) if workers > 1 and len(pending) > 1 else None
+    try:
+        for offset in range(0, len(pending), batch_size):
+            jobs = []
+            for email, evaluation_id in pending[offset:offset + batch_size]:
+                number = certificate_number(seminar.pk, evaluation_id)
+                jobs.append({
+                    'email': email,
+                    'name': names.get(email) or email,
+                    'title': seminar.title,
+                    'date': seminar.date.isoformat() if seminar.date else '',
+                    'speaker': seminar.speaker or '',
+                    'template_url': seminar.certificate_template_url,
+                    'number': number,
+                    'path': str(media_dir / f'{number}.svg'),
+                })
+            if executor:
+                list(executor.map(render_certificate_svg, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+            else:
+                for job in jobs:
+                    render_certificate_svg(job)
+
+            Certificate.objects.bulk_create(
+                [
+                    Certificate(
+                        seminar=seminar,
+                        participant_email=job['email'],
+                        participant_name=names.get(job['email']),
+                        certificate_number=job['number'],
+                        file_url=f"{settings.PUBLIC_BASE_URL}{settings.MEDIA_URL}certificates/{seminar.pk}/{job['number']}.svg",
+                    )
+                    for job in jobs
+                ],
+                ignore_conflicts=True,
+            )
+            done += len(_recorded(seminar, jobs))
+            _set_progress(seminar.pk, done=done)
+            if on_progress:
+                on_progress(get_progress(seminar.pk))
+    except Exception:
+        _set_progress(seminar.pk, status=CertificateJob.FAILED)
+        raise
+    finally:
+        if executor:
+            executor.shutdown()
+
+    _set_progress(seminar.pk, status=CertificateJob.FINISHED, finished_at=timezone.now())
+    return get_progress(seminar.pk)
+
+
+def start_certificate_job(seminar_id):
+    """Run ``generate_certificates`` on a background thread; returns False if a job for this seminar is already running"""
+    if not claim_job(seminar_id):
+        return False
+
+    def run():
+        try:
+            generate_certificates(Seminar.objects.get(pk=seminar_id))
+        except Exception:
+            logger.exception('Certificate generation failed for seminar %s', seminar_id)
+            _set_progress(seminar_id, status=CertificateJob.FAILED)
+        finally:
+            connection.close()
+
+    threading.Thread(target=run, name=f'certificates-{seminar_id}', daemon=True).start()
+    return True
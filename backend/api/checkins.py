@@ -0,0 +1,134 @@
+from django.db import transaction
+from django.utils import timezone
+
+from .admission import JOINED, WAITLISTED, admit_many, present_keys, shift_present_counts
+from .events import record_events
+from .models import Attendance, JoinedParticipant
+from .stats import invalidate_seminar_stats
+
+
+def record_form_checkin(seminar_id, participant_email, participant_name=None, year_section=None, now=None):
+    """Record a Google Form check-in: attendance time IN plus the joined participant.
+
+    Returns the participant's admission status: JOINED, WAITLISTED or None when the
+    seminar is full (nothing is written then).
+    """
+    key = (seminar_id, participant_email)
+    return record_form_checkins([{
+        'seminar_id': seminar_id,
+        'participant_email': participant_email,
+        'participant_name': participant_name,
+        'year_section': year_section,
+        'checked_in_at': now or timezone.now(),
+    }]).get(key)
+
+
+def record_form_checkins(items):
+    """Record many Google Form check-ins at once; returns {(seminar_id, email): admission status}.
+
+    Participants who are not joined yet are admitted first (see api/admission.py).
+    Only joined participants are checked in; new waitlisted participants are only
+    added to the waitlist and participants refused by a full seminar are skipped.
+    Both tables are written in one transaction, each with a single
+    INSERT ... ON CONFLICT DO UPDATE, so duplicate or concurrent submissions for
+    the same participant never race between a failed insert and a follow-up update.
+    Applying the same items twice leaves the same rows behind. Items for the same
+    participant are merged so the last one wins.
+    """
+    latest = {(item['seminar_id'], item['participant_email']): item for item in items}
+    with transaction.atomic():
+        admitted = admit_many(latest)
+        checkins = [item for key, item in latest.items() if admitted.get(key, (None,))[0] == JOINED]
+        waitlisted = [item for key, item in latest.items() if admitted.get(key) == (WAITLISTED, True)]
+        checked_in = {(item['seminar_id'], item['participant_email']) for item in checkins}
+        present_before = present_keys(checked_in)
+        Attendance.objects.bulk_create(
+            [
+                Attendance(seminar_id=item['seminar_id'], participant_email=item['participant_email'], time_in=item['checked_in_at'])
+                for item in checkins
+            ],
+            update_conflicts=True,
+            unique_fields=['seminar', 'participant_email'],
+            update_fields=['time_in', 'updated_at'],
+        )
+        JoinedParticipant.objects.bulk_create(
+            [
+                JoinedParticipant(
+                    seminar_id=item['seminar_id'],
+                    participant_email=item['participant_email'],
+                    participant_name=item['participant_name'],
+                    metadata={'year_section': item['year_section']},
+                    present=True,
+                    check_in=item['checked_in_at'],
+                )
+                for item in checkins
+            ] + [
+                JoinedParticipant(
+                    seminar_id=item['seminar_id'],
+                    participant_email=item['participant_email'],
+                    participant_name=item['participant_name'],
+                    metadata={'year_section': item['year_section']},
+                    status=WAITLISTED,
+                )
+                for item in waitlisted
+            ],
+            update_conflicts=True,
+            unique_fields=['seminar', 'participant_email'],
+            update_fields=['participant_name', 'metadata', 'present', 'check_in', 'updated_at'],
+        )
+        record_events(
+            (item['seminar_id'], item['participant_email'], item['checked_in_at'], None)
+            for item in checkins
+        )
+        shift_present_counts(present_before, checked_in)
+    for seminar_id in {seminar_id for seminar_id, _ in latest}:
+        invalidate_seminar_stats(seminar_id)
+    return {key: status for key, (status, _) in admitted.items()}
+
+
+def apply_attendance_batch(items):
+    """Upsert validated scans in one transaction; returns {(seminar_id, email): (row, created)}.
+
+    Scans for the same participant are merged in order so the last time_in/time_out wins.
+    Rows are written with one INSERT ... ON CONFLICT DO UPDATE per set of provided
+    fields, so a field a scan leaves out keeps its stored value, including one set by
+    a concurrent scan. ``created`` is False for rows that existed before the batch.
+    """
+    merged = {}
+    for item in items:
+        key = (item['seminar'], item['participant_email'])
+        fields = merged.setdefault(key, {})
+        fields.update({f: item[f] for f in ('time_in', 'time_out') if f in item})
+
+    with transaction.atomic():
+        seminar_ids = {seminar_id for seminar_id, _ in merged}
+        emails = {email for _, email in merged}
+        existing = set(
+            Attendance.objects.filter(seminar_id__in=seminar_ids, participant_email__in=emails)
+            .values_list('seminar_id', 'participant_email')
+        )
+        groups = {}
+        for (seminar_id, email), fields in merged.items():
+            groups.setdefault(tuple(sorted(fields)), []).append(
+                Attendance(seminar_id=seminar_id, participant_email=email, **fields)
+            )
+        for provided, new_rows in groups.items():
+            Attendance.objects.bulk_create(
+                new_rows,
+                update_conflicts=True,
+                unique_fields=['seminar', 'participant_email'],
+                update_fields=[*provided, 'updated_at'],
+            )
+        # Re-read so the returned rows carry the fields this batch did not write
+        stored = {
+            (row.seminar_id, row.participant_email): row
+            for row in Attendance.objects.filter(seminar_id__in=seminar_ids, participant_email__in=emails)
+        }
+        rows = {key: (stored[key], key not in existing) for key in merged}
+        record_events(
+            (seminar_id, email, fields.get('time_in'), fields.get('time_out'))
+            for (seminar_id, email), fields in merged.items()
+        )
+    for seminar_id in seminar_ids:
+        invalidate_seminar_stats(seminar_id)
+    return rows
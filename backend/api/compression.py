@@ -0,0 +1,117 @@
+"""Response compression negotiated from the request's Accept-Encoding.
+
+gzip is always available; zstd and brotli (``br``) are offered when the ``zstandard``
+and ``brotli`` packages (requirements-speedups.txt) are installed. Among the codings
+the client accepts with the highest q-value, the first one in COMPRESSION_ENCODINGS
+wins. Bodies under COMPRESSION_MIN_SIZE bytes are sent as they are, since a few
+hundred bytes of JSON gain little and still cost a compressor run.
+
+Streaming responses are never compressed: the SSE attendance stream must reach the
+browser event by event, and exports are already written chunk by chunk.
+"""
+import gzip
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+COMPRESSIBLE_TYPES = ('application/json', 'text/', 'application/javascript', 'application/xml', 'image/svg+xml')
+
+# Levels tuned for per-request compression of dynamic JSON, not for archiving
+COMPRESSORS = {'gzip': lambda data: gzip.compress(data, compresslevel=6, mtime=0)}
+if brotli is not None:
+    COMPRESSORS['br'] = lambda data: brotli.compress(data, quality=5)
+if zstandard is not None:
+    # A compressor object must not be shared between threads, so each response gets its own
+    COMPRESSORS['zstd'] = lambda data: zstandard.ZstdCompressor(level=3).compress(data)
+
+
+def offered_encodings():
+    return [name for name in settings.COMPRESSION_ENCODINGS if name in COMPRESSORS]
+
+
+def parse_accept_encoding(header):
+    """{coding: q} of an Accept-Encoding header; malformed q-values count as 0"""
+    accepted = {}
+    for part in (header or '').split(','):
+        coding, _, params = part.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def negotiate(header, offered):
+    """The offered coding the client prefers (server order breaks ties); None for identity"""
+    accepted = parse_accept_encoding(header)
+    best, best_q = None, 0.0
+    for coding in offered:
+        q = accepted.get(coding, accepted.get('*', 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress_response(request, response):
+    if (
+        response.streaming
+        or response.has_header('Content-Encoding')
+        or len(response.content) < settings.COMPRESSION_MIN_SIZE
+        or not response.get('Content-Type', '').startswith(COMPRESSIBLE_TYPES)
+    ):
+        return response
+    patch_vary_headers(response, ('Accept-Encoding',))
+
+    coding = negotiate(request.headers.get('Accept-Encoding'), offered_encodings())
+    if coding is None:
+        return response
+    compressed = COMPRESSORS[coding](response.content)
+    if len(compressed) >= len(response.content):
+        return response
+
+    response.content = compressed
+    response['Content-Length'] = str(len(compressed))
+    response['Content-Encoding'] = coding
+    # The compressed bytes differ from what a strong validator promised (RFC 9110 8.8.1)
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        response['ETag'] = 'W/' + etag
+    return response
+
+
+class CompressionMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return compress_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return compress_response(request, await self.get_response(request))
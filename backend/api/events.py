@@ -0,0 +1,197 @@
+"""Per-seminar attendance feed served as Server-Sent Events.
+
+Every scan appends an AttendanceEvent (bulk paths in checkins.py, single-row
+saves through the post_save signal). The stream sends a ``snapshot`` of the
+seminar's attendance on a fresh connection, then one ``attendance`` event per
+scan, using the AttendanceEvent id as the SSE event id. Browsers reconnect with
+``Last-Event-ID`` (or ``?last_event_id=``) and get only the events they missed.
+
+Streams end after SSE_STREAM_SECONDS so a WSGI worker thread is not held
+forever; EventSource reconnects on its own and resumes from the last id. Each
+open stream polls the database every SSE_POLL_SECONDS, and under WSGI holds a
+worker thread for the whole SSE_STREAM_SECONDS, so large audiences belong on
+the ASGI route (``astream``), which only holds a coroutine.
+
+Ids are assigned at INSERT but become visible at COMMIT, so a scan can appear
+behind a higher id that was already sent. Each poll therefore also re-reads the
+events created in the last SSE_EVENT_LAG_SECONDS and sends the ones this stream
+has not sent yet (as /api/sync/ does with SYNC_CURSOR_LAG_SECONDS); the SSE id
+stays at the highest id sent, and a scan applied twice is harmless.
+
+Events older than SSE_EVENT_RETENTION_SECONDS are deleted by ``prune``; a
+client resuming from a deleted event gets a fresh snapshot instead.
+"""
+import asyncio
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Attendance, AttendanceEvent
+from .renderers import dumps
+from .serializers import AttendanceEventReadSerializer, AttendanceReadSerializer
+
+
+EVENT_FIELDS = ('id', 'participant_email', 'time_in', 'time_out')
+BATCH_SIZE = 500
+
+
+def record_events(scans):
+    """Append events for (seminar_id, email, time_in, time_out) tuples; call inside the writing transaction"""
+    AttendanceEvent.objects.bulk_create([
+        AttendanceEvent(seminar_id=seminar_id, participant_email=email, time_in=time_in, time_out=time_out)
+        for seminar_id, email, time_in, time_out in scans
+    ])
+
+
+def prune(older_than=None):
+    """Delete events older than ``older_than`` seconds (default SSE_EVENT_RETENTION_SECONDS); returns the count"""
+    if older_than is None:
+        older_than = settings.SSE_EVENT_RETENTION_SECONDS
+    cutoff = timezone.now() - timedelta(seconds=older_than)
+    deleted, _ = AttendanceEvent.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
+
+
+def parse_last_event_id(request):
+    """The resume cursor from the Last-Event-ID header or ``?last_event_id=``; None on a fresh connection"""
+    value = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    if value in (None, ''):
+        return None
+    try:
+        return max(int(value), 0)
+    except ValueError:
+        return None
+
+
+def format_event(event_type, event_id, data):
+    return f'id: {event_id}\nevent: {event_type}\ndata: {dumps(data).decode()}\n\n'
+
+
+def latest_event_id(seminar_id):
+    return AttendanceEvent.objects.filter(seminar_id=seminar_id).order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def resume_point(seminar_id, last_event_id):
+    """The cursor to resume from; None (so a snapshot is sent) when that event has been pruned"""
+    if last_event_id and not AttendanceEvent.objects.filter(seminar_id=seminar_id, id=last_event_id).exists():
+        return None
+    return last_event_id
+
+
+def snapshot(seminar_id):
+    """Current attendance of the seminar, stamped with the newest event id.
+
+    The id is read before the rows, so a scan committed in between is sent again
+    as an event afterwards; applying it twice is harmless.
+    """
+    event_id = latest_event_id(seminar_id)
+    serializer = AttendanceReadSerializer()
+    rows = Attendance.objects.filter(seminar_id=seminar_id).order_by('created_at', 'id').values(*serializer.fields)
+    return event_id, serializer.serialize(rows)
+
+
+def events_after(seminar_id, last_event_id, since=None, exclude=()):
+    """Events past the cursor, plus those created since ``since`` (late commits) that are not in ``exclude``"""
+    position = Q(id__gt=last_event_id)
+    if since is not None:
+        position |= Q(created_at__gte=since)
+    qs = AttendanceEvent.objects.filter(position, seminar_id=seminar_id)
+    if exclude:
+        qs = qs.exclude(id__in=exclude)
+    return qs.order_by('id').values(*EVENT_FIELDS)[:BATCH_SIZE]
+
+
+class Cursor:
+    """A stream's position: the highest event id sent and the ids sent inside the lag window"""
+
+    def __init__(self, last_event_id):
+        self.last_event_id = last_event_id
+        self.recent = {}  # event id -> monotonic time it was sent
+
+    def query(self, seminar_id):
+        lag = settings.SSE_EVENT_LAG_SECONDS
+        if not lag:
+            return events_after(seminar_id, self.last_event_id)
+        # Anything sent longer ago than the lag was created before the window as well
+        horizon = time.monotonic() - lag
+        self.recent = {id: sent for id, sent in self.recent.items() if sent >= horizon}
+        return events_after(seminar_id, self.last_event_id, timezone.now() - timedelta(seconds=lag), list(self.recent))
+
+    def format(self, rows):
+        now = time.monotonic()
+        for event in attendance_events(rows):
+            self.recent[event['id']] = now
+            self.last_event_id = max(self.last_event_id, event['id'])
+            yield format_event('attendance', self.last_event_id, event)
+
+
+def attendance_events(rows):
+    serializer = AttendanceEventReadSerializer(fields=EVENT_FIELDS)
+    for event in serializer.serialize(rows):
+        event['kind'] = 'check_out' if event['time_out'] else 'check_in'
+        yield event
+
+
+def stream(seminar_id, last_event_id):
+    """Blocking SSE generator for WSGI servers"""
+    yield f'retry: {settings.SSE_RETRY_MS}\n\n'
+    last_event_id = resume_point(seminar_id, last_event_id)
+    if last_event_id is None:
+        last_event_id, rows = snapshot(seminar_id)
+        yield format_event('snapshot', last_event_id, rows)
+
+    cursor = Cursor(last_event_id)
+    deadline = time.monotonic() + settings.SSE_STREAM_SECONDS
+    idle_since = time.monotonic()
+    while True:
+        rows = list(cursor.query(seminar_id))
+        yield from cursor.format(rows)
+        now = time.monotonic()
+        if now >= deadline:
+            return
+        if rows:
+            idle_since = now
+            continue
+        if now - idle_since >= settings.SSE_HEARTBEAT_SECONDS:
+            # Comment line: keeps proxies from closing an idle connection
+            yield ': keep-alive\n\n'
+            idle_since = now
+        time.sleep(settings.SSE_POLL_SECONDS)
+
+
+async def astream(seminar_id, last_event_id):
+    """Non-blocking SSE generator for ASGI servers"""
+    yield f'retry: {settings.SSE_RETRY_MS}\n\n'
+    last_event_id = await sync_to_async(resume_point)(seminar_id, last_event_id)
+    if last_event_id is None:
+        last_event_id, rows = await sync_to_async(snapshot)(seminar_id)
+        yield format_event('snapshot', last_event_id, rows)
+
+    cursor = Cursor(last_event_id)
+    deadline = time.monotonic() + settings.SSE_STREAM_SECONDS
+    idle_since = time.monotonic()
+    while True:
+        rows = [row async for row in cursor.query(seminar_id)]
+        for message in cursor.format(rows):
+            yield message
+        now = time.monotonic()
+        if now >= deadline:
+            return
+        if rows:
+            idle_since = now
+            continue
+        if now - idle_since >= settings.SSE_HEARTBEAT_SECONDS:
+            yield ': keep-alive\n\n'
+            idle_since = now
+        await asyncio.sleep(settings.SSE_POLL_SECONDS)
+
+
+def event_stream_headers(response):
+    response['Cache-Control'] = 'no-cache'
+    # Tell nginx-style proxies not to buffer the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,92 @@
+import csv
+import json
+from datetime import date, datetime
+
+from django.conf import settings
+
+from .models import Attendance, Evaluation, Seminar
+from .pagination import attendance_present_q
+
+
+ATTENDANCE_FIELDS = ['id', 'seminar_id', 'seminar__title', 'participant_email', 'time_in', 'time_out', 'created_at']
+EVALUATION_FIELDS = ['id', 'seminar_id', 'seminar__title', 'participant_email', 'created_at']
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def _header(fields):
+    return [field.replace('__', '_') for field in fields]
+
+
+def _cell(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+def attendance_export(qs):
+    """Return (header, rows) for attendance; rows are streamed from the database in chunks"""
+    rows = qs.order_by('created_at', 'id').values_list(*ATTENDANCE_FIELDS).iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+    return _header(ATTENDANCE_FIELDS), rows
+
+
+def question_ids(seminar_ids):
+    """Ordered question ids from ``Seminar.questions`` of the given seminars (``feedback`` always last)"""
+    ids = []
+    for questions in Seminar.objects.filter(pk__in=seminar_ids).order_by('id').values_list('questions', flat=True):
+        for question in questions or []:
+            qid = question.get('id') if isinstance(question, dict) else None
+            if qid is not None and str(qid) not in ids and str(qid) != 'feedback':
+                ids.append(str(qid))
+    return ids + ['feedback']
+
+
+def evaluation_export(qs):
+    """Return (header, rows) for evaluations with one column per question in ``Seminar.questions``"""
+    qids = question_ids(qs.order_by().values('seminar_id').distinct())
+    header = _header(EVALUATION_FIELDS) + [f'answer_{qid}' for qid in qids]
+
+    def rows():
+        values = qs.order_by('created_at', 'id').values_list(*EVALUATION_FIELDS, 'answers')
+        for *base, answers in values.iterator(chunk_size=settings.EXPORT_CHUNK_SIZE):
+            answers = answers if isinstance(answers, dict) else {}
+            yield (*base, *(answers.get(qid) for qid in qids))
+
+    return header, rows()
+
+
+class _Echo:
+    """File-like object whose write() hands the formatted line back to the caller"""
+
+    def write(self, value):
+        return value
+
+
+def render_csv(header, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow([_cell(value) for value in row])
+
+
+def render_ndjson(header, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(header, (_cell(value) for value in row)))) + '\n'
+
+
+def render(output, header, rows):
+    if output == 'ndjson':
+        return render_ndjson(header, rows)
+    return render_csv(header, rows)
+
+
+# resource -> (model, timestamp field, present filter, export builder)
+EXPORTS = {
+    'attendance': (Attendance, 'created_at', attendance_present_q, attendance_export),
+    'evaluations': (Evaluation, 'created_at', None, evaluation_export),
+}
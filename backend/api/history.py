@@ -0,0 +1,59 @@
+from django.db.models import FilteredRelation, Q
+
+from .models import Seminar
+
+
+SEMINAR_FIELDS = ('id', 'title', 'date', 'speaker', 'semester', 'start_datetime', 'end_datetime')
+
+# section -> (reverse relation on Seminar, columns reported for the participant's row)
+RELATIONS = {
+    'joined': ('joined_participants', ('participant_name', 'joined_at', 'present', 'check_in', 'check_out')),
+    'attendance': ('attendance', ('time_in', 'time_out')),
+    'evaluation': ('evaluations', ('created_at',)),
+    'certificate': ('certificates', ('certificate_number', 'file_url', 'issued_at')),
+}
+
+
+def _alias(section):
+    # Annotations may not reuse the reverse relation names (e.g. Seminar.attendance)
+    return f'participant_{section}'
+
+
+def participant_history_query(email):
+    """values() queryset with one row per seminar ``email`` joined, attended, evaluated or got a certificate for.
+
+    Each per-participant table is LEFT JOINed on (seminar, participant_email), which is
+    unique, so there is one row per seminar and a single query no matter how many
+    seminars the participant has.
+    """
+    relations = {
+        _alias(section): FilteredRelation(relation, condition=Q(**{f'{relation}__participant_email': email}))
+        for section, (relation, _) in RELATIONS.items()
+    }
+    # Seminars are picked through the participant_email indexes rather than by
+    # testing the joined columns, which would walk the whole seminar table
+    matched = Q()
+    columns = list(SEMINAR_FIELDS)
+    for section, (relation, fields) in RELATIONS.items():
+        model = Seminar._meta.get_field(relation).related_model
+        matched |= Q(pk__in=model.objects.filter(participant_email=email).values('seminar_id'))
+        alias = _alias(section)
+        columns += [f'{alias}__id'] + [f'{alias}__{field}' for field in fields]
+    return (
+        Seminar.objects.annotate(**relations)
+        .filter(matched)
+        .order_by('-date', '-id')
+        .values(*columns)
+    )
+
+
+def participant_history(email):
+    """Participant history as a list of {seminar, joined, attendance, evaluation, certificate} dicts"""
+    seminars = []
+    for row in participant_history_query(email):
+        entry = {'seminar': {field: row[field] for field in SEMINAR_FIELDS}}
+        for section, (_, fields) in RELATIONS.items():
+            alias = _alias(section)
+            entry[section] = {field: row[f'{alias}__{field}'] for field in fields} if row[f'{alias}__id'] else None
+        seminars.append(entry)
+    return seminars
@@ -0,0 +1,332 @@
+"""Write-behind ingestion queue for check-ins.
+
+With CHECKIN_INGESTION_MODE = 'queued', the check-in endpoints validate a
+submission, append it to a journal (a separate SQLite file, so appends never wait
+on the main database's writer lock) and answer 202 right away. A flusher thread
+then applies the journal to Attendance/JoinedParticipant in batched transactions.
+
+Delivery is at-least-once: entries are claimed with a lease, applied, and only
+deleted from the journal after the main database commits. An entry whose flusher
+died is picked up again once its lease expires. Re-applying an entry is harmless
+because every write is an upsert carrying the scan's original timestamps.
+
+Entries that can never be applied are moved to a ``dead_letter`` table in the
+same file instead of being retried forever: check-ins for a deleted or full
+seminar right away, and entries that keep failing for another reason after
+CHECKIN_MAX_ATTEMPTS flushes. Database errors that pass (a locked or unreachable
+database) do not count as attempts.
+"""
+import atexit
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.db import InterfaceError, OperationalError, connection
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .checkins import apply_attendance_batch, record_form_checkins
+from .models import Seminar
+
+
+logger = logging.getLogger(__name__)
+
+FORM_CHECKIN = 'form'
+ATTENDANCE_SCAN = 'attendance'
+
+# Errors of the main database that say nothing about the entries being applied
+TRANSIENT_ERRORS = (OperationalError, InterfaceError)
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS journal (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    enqueued_at REAL NOT NULL,
+    claimed_by TEXT,
+    claimed_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS dead_letter (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    enqueued_at REAL NOT NULL,
+    attempts INTEGER NOT NULL,
+    reason TEXT NOT NULL,
+    failed_at REAL NOT NULL
+);
+'''
+
+_local = threading.local()
+
+
+def is_enabled():
+    return settings.CHECKIN_INGESTION_MODE == 'queued'
+
+
+def _journal():
+    """Per-thread connection to the journal file named by settings"""
+    path = str(settings.CHECKIN_QUEUE_PATH)
+    conn = getattr(_local, 'conn', None)
+    if conn is None or _local.path != path:
+        conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=FULL')
+        conn.executescript(_SCHEMA)
+        _local.conn, _local.path = conn, path
+    return conn
+
+
+def enqueue(kind, payload):
+    """Durably append one validated check-in; returns its journal id"""
+    cursor = _journal().execute(
+        'INSERT INTO journal (kind, payload, enqueued_at) VALUES (?, ?, ?)',
+        (kind, json.dumps(payload, default=str), time.time()),
+    )
+    ensure_flusher()
+    return cursor.lastrowid
+
+
+def enqueue_form_checkin(seminar_id, participant_email, participant_name=None, year_section=None):
+    return enqueue(FORM_CHECKIN, {
+        'seminar_id': int(seminar_id),
+        'participant_email': participant_email,
+        'participant_name': participant_name,
+        'year_section': year_section,
+        # Stamped at acknowledgement so a replayed entry writes the same time
+        'checked_in_at': timezone.now().isoformat(),
+    })
+
+
+def enqueue_attendance_scan(item):
+    """``item`` is AttendanceBulkItemSerializer.validated_data"""
+    return enqueue(ATTENDANCE_SCAN, {
+        field: value.isoformat() if hasattr(value, 'isoformat') else value
+        for field, value in item.items()
+    })
+
+
+def journal_status():
+    """Depth of the journal, the age in seconds of its oldest entry and the number of dead letters"""
+    conn = _journal()
+    depth, oldest = conn.execute('SELECT COUNT(*), MIN(enqueued_at) FROM journal').fetchone()
+    return {
+        'depth': depth,
+        'oldest_age_seconds': round(time.time() - oldest, 3) if oldest is not None else None,
+        'dead_letters': conn.execute('SELECT COUNT(*) FROM dead_letter').fetchone()[0],
+    }
+
+
+def queue_status():
+    """``journal_status`` with the ingestion mode; in direct mode the journal file is not opened (nor created)"""
+    if not is_enabled():
+        return {'mode': settings.CHECKIN_INGESTION_MODE, 'depth': 0, 'oldest_age_seconds': None, 'dead_letters': 0}
+    return {'mode': settings.CHECKIN_INGESTION_MODE, **journal_status()}
+
+
+def dead_letters(limit=100):
+    """The most recent dead letters as dicts, newest first"""
+    rows = _journal().execute(
+        'SELECT id, kind, payload, enqueued_at, attempts, reason, failed_at FROM dead_letter ORDER BY failed_at DESC, id DESC LIMIT ?',
+        (limit,),
+    ).fetchall()
+    return [
+        {'id': id, 'kind': kind, 'payload': json.loads(payload), 'enqueued_at': enqueued_at,
+         'attempts': attempts, 'reason': reason, 'failed_at': failed_at}
+        for id, kind, payload, enqueued_at, attempts, reason, failed_at in rows
+    ]
+
+
+def _claim(batch_size):
+    """Lease the oldest unclaimed (or abandoned) entries to this flusher"""
+    token = uuid.uuid4().hex
+    now = time.time()
+    conn = _journal()
+    conn.execute(
+        '''UPDATE journal SET claimed_by = ?, claimed_until = ?
+           WHERE id IN (SELECT id FROM journal WHERE claimed_until IS NULL OR claimed_until < ? ORDER BY id LIMIT ?)''',
+        (token, now + settings.CHECKIN_QUEUE_LEASE_SECONDS, now, batch_size),
+    )
+    rows = conn.execute('SELECT id, kind, payload FROM journal WHERE claimed_by = ? ORDER BY id', (token,)).fetchall()
+    return token, rows
+
+
+def _seminar_of(kind, data):
+    return data['seminar_id'] if kind == FORM_CHECKIN else data['seminar']
+
+
+def _apply(rows):
+    """Apply journal rows to the main database; returns {journal id: reason} of rows that can never apply"""
+    entries = [(id, kind, json.loads(payload)) for id, kind, payload in rows]
+    # A seminar deleted after a check-in was acknowledged would fail the whole batch on its foreign key
+    seminar_ids = {_seminar_of(kind, data) for _, kind, data in entries}
+    existing = set(Seminar.objects.filter(pk__in=seminar_ids).values_list('pk', flat=True))
+    rejected = {id: 'seminar deleted' for id, kind, data in entries if _seminar_of(kind, data) not in existing}
+
+    checkins, scans = [], []
+    for id, kind, data in entries:
+        if id in rejected:
+            continue
+        if kind == FORM_CHECKIN:
+            data['checked_in_at'] = parse_datetime(data['checked_in_at'])
+            checkins.append((id, data))
+        elif kind == ATTENDANCE_SCAN:
+            for field in ('time_in', 'time_out'):
+                if data.get(field):
+                    data[field] = parse_datetime(data[field])
+            scans.append(data)
+    if checkins:
+        admitted = record_form_checkins([data for _, data in checkins])
+        # The webhook already answered 202, so check-ins refused by a full seminar are kept as dead letters
+        for id, data in checkins:
+            if admitted.get((data['seminar_id'], data['participant_email'])) is None:
+                rejected[id] = 'seminar full'
+    if scans:
+        apply_attendance_batch(scans)
+    if rejected:
+        logger.warning('Moving %d queued check-ins to the dead letters: %s', len(rejected), sorted(set(rejected.values())))
+    return rejected
+
+
+def _complete(ids, rejected):
+    """Delete applied entries and move rejected ones to the dead letters, in one journal transaction"""
+    conn = _journal()
+    now = time.time()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        for id, reason in rejected.items():
+            conn.execute(
+                '''INSERT OR REPLACE INTO dead_letter (id, kind, payload, enqueued_at, attempts, reason, failed_at)
+                   SELECT id, kind, payload, enqueued_at, attempts, ?, ? FROM journal WHERE id = ?''',
+                (reason, now, id),
+            )
+        conn.execute('DELETE FROM journal WHERE id IN (SELECT value FROM json_each(?))', (json.dumps(list(ids)),))
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    conn.execute('COMMIT')
+
+
+def _release(ids):
+    _journal().execute(
+        'UPDATE journal SET claimed_by = NULL, claimed_until = NULL WHERE id IN (SELECT value FROM json_each(?))',
+        (json.dumps(list(ids)),),
+    )
+
+
+def _failed(row, exc):
+    """Count a failed attempt of one entry; dead-letter it after CHECKIN_MAX_ATTEMPTS"""
+    id = row[0]
+    attempts = _journal().execute(
+        'UPDATE journal SET attempts = attempts + 1, claimed_by = NULL, claimed_until = NULL WHERE id = ? RETURNING attempts',
+        (id,),
+    ).fetchone()[0]
+    logger.error('Queued check-in %s failed (attempt %d): %r', id, attempts, exc)
+    if attempts >= settings.CHECKIN_MAX_ATTEMPTS:
+        _complete([id], {id: f'failed {attempts} times: {exc!r}'[:1000]})
+
+
+def flush(batch_size=None):
+    """Apply one batch from the journal; returns the number of entries taken (applied, dead-lettered or retried).
+
+    On a transient database error the claim is released so the entries are retried on
+    the next flush. Any other error is pinned on the entry that causes it by applying
+    the batch again one entry at a time, so one bad entry never holds up the rest.
+    """
+    token, rows = _claim(batch_size or settings.CHECKIN_FLUSH_BATCH_SIZE)
+    if not rows:
+        return 0
+    ids = [row[0] for row in rows]
+    try:
+        rejected = _apply(rows)
+    except TRANSIENT_ERRORS:
+        _release(ids)
+        raise
+    except Exception as exc:
+        if len(rows) == 1:
+            _failed(rows[0], exc)
+            return 1
+        for index, row in enumerate(rows):
+            try:
+                rejected = _apply([row])
+            except TRANSIENT_ERRORS:
+                _release(ids[index:])
+                raise
+            except Exception as exc:
+                _failed(row, exc)
+            else:
+                _complete([row[0]], rejected)
+        return len(rows)
+    _complete(ids, rejected)
+    return len(rows)
+
+
+def drain(batch_size=None):
+    """Flush until the journal is empty; returns the number of entries applied"""
+    total = 0
+    while True:
+        applied = flush(batch_size)
+        if not applied:
+            return total
+        total += applied
+
+
+class Flusher:
+    """Background thread that flushes the journal every CHECKIN_FLUSH_INTERVAL seconds"""
+
+    def __init__(self):
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self.run, name='checkin-flusher', daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def run(self):
+        while not self.stopping.is_set():
+            try:
+                while flush() and not self.stopping.is_set():
+                    pass
+            except Exception:
+                logger.exception('Check-in queue flush failed; will retry')
+            finally:
+                connection.close()
+            self.stopping.wait(settings.CHECKIN_FLUSH_INTERVAL)
+
+    def stop(self, timeout=None):
+        self.stopping.set()
+        self.thread.join(timeout)
+
+
+_flusher = None
+_flusher_lock = threading.Lock()
+
+
+def ensure_flusher():
+    """Start the in-process flusher on first use when CHECKIN_FLUSH_IN_PROCESS is on"""
+    global _flusher
+    if _flusher is not None or not settings.CHECKIN_FLUSH_IN_PROCESS:
+        return
+    with _flusher_lock:
+        if _flusher is None:
+            _flusher = Flusher()
+            _flusher.start()
+            atexit.register(stop_flusher)
+
+
+def stop_flusher(drain_queue=True):
+    """Stop the in-process flusher and, by default, apply whatever is still queued"""
+    global _flusher
+    with _flusher_lock:
+        flusher, _flusher = _flusher, None
+    if flusher is not None:
+        flusher.stop()
+    if drain_queue:
+        try:
+            drain()
+        except Exception:
+            logger.exception('Check-in queue drain on shutdown failed; entries stay in the journal')
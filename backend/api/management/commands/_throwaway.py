@@ -0,0 +1,45 @@
+"""Helpers for load-test commands that must run against a disposable SQLite database."""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+
+
+THROWAWAY_NAME = 'loadtest.sqlite3'
+
+
+def run_in_throwaway_db(command, args, env=None):
+    """Run ``manage.py <command> <args>`` in a fresh process against a temporary SQLite file.
+
+    The child is expected to print its result as JSON on its last line of output.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        child_env = dict(
+            os.environ,
+            SQLITE_NAME=str(Path(tmp) / THROWAWAY_NAME),
+            CHECKIN_QUEUE_PATH=str(Path(tmp) / 'checkin_queue.sqlite3'),
+            DEBUG='False',
+            # Load tests drive the write path from one address; the webhook rate limits would cap them
+            WEBHOOK_IP_RATE='0',
+            WEBHOOK_SEMINAR_RATE='0',
+        )
+        child_env.update(env or {})
+        cmd = [sys.executable, str(Path(settings.BASE_DIR) / 'manage.py'), command, *args]
+        proc = subprocess.run(cmd, env=child_env, capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise CommandError(f'{command} run failed:\n{proc.stderr}')
+        return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def prepare_throwaway_db():
+    """Migrate the throwaway database; refuses to run against any other database"""
+    if connection.vendor != 'sqlite' or not str(settings.DATABASES['default']['NAME']).endswith(THROWAWAY_NAME):
+        raise CommandError('This mode only runs inside a throwaway database started by the parent command')
+    call_command('migrate', verbosity=0)
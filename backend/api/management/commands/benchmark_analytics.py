@@ -0,0 +1,80 @@
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api import analytics
+from api.models import Evaluation, Seminar
+
+
+QUESTIONS = [
+    {'id': 'q1', 'type': 'select', 'question': 'Rate the speaker\'s clarity', 'options': ['Excellent', 'Good', 'Average', 'Poor']},
+    {'id': 'q2', 'type': 'select', 'question': 'How relevant was the seminar content?', 'options': ['Very Relevant', 'Somewhat Relevant', 'Not Relevant']},
+    {'id': 'q3', 'type': 'text', 'question': 'Any suggestions?'},
+] + [{'id': f'r{i}', 'type': 'rating', 'question': f'Rate part {i}'} for i in range(6)]
+
+COMMENTS = (
+    'Great speaker, very clear examples', 'The slides were hard to read from the back',
+    'More hands-on activities please', 'Too long, but the demos were useful', '',
+)
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a semester of evaluations in a rolled-back transaction and time the semester analytics '
+        'report cold (empty cache) and warm.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seminars', type=int, default=40)
+        parser.add_argument('--evaluations', type=int, default=30000, help='Total evaluations across the semester')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.seed(options['seminars'], options['evaluations'])
+                cache.clear()
+                cold = self.timed(lambda: analytics.evaluation_analytics(semester='1'))
+                warm = self.timed(lambda: analytics.evaluation_analytics(semester='1'))
+                self.stdout.write(f'cold {cold * 1000:8.1f} ms   warm {warm * 1000:8.1f} ms')
+                raise _Rollback
+        except _Rollback:
+            cache.clear()
+
+    def timed(self, fn):
+        started = time.perf_counter()
+        fn()
+        return time.perf_counter() - started
+
+    def seed(self, n_seminars, n_evaluations):
+        rng = random.Random(0)
+        seminars = Seminar.objects.bulk_create(
+            Seminar(title=f'Benchmark seminar {i}', speaker=f'Speaker {i % 9}', semester='1',
+                    date=date.today() + timedelta(days=i), questions=QUESTIONS)
+            for i in range(n_seminars)
+        )
+        Evaluation.objects.bulk_create(
+            (
+                Evaluation(
+                    seminar=seminars[i % n_seminars],
+                    participant_email=f'p{i}@example.com',
+                    answers={
+                        'q1': rng.choice(QUESTIONS[0]['options']),
+                        'q2': rng.choice(QUESTIONS[1]['options']),
+                        'q3': rng.choice(COMMENTS),
+                        'feedback': rng.choice(COMMENTS),
+                        **{f'r{j}': rng.randint(1, 5) for j in range(6)},
+                    },
+                )
+                for i in range(n_evaluations)
+            ),
+            batch_size=2000,
+        )
+        self.stdout.write(f'Seeded {n_seminars} seminars with {n_evaluations} evaluations')
@@ -0,0 +1,116 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import AsyncClient, Client
+
+from api.models import Seminar
+from api.stats import percentile
+
+from ._throwaway import prepare_throwaway_db, run_in_throwaway_db
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the sync (WSGI, fixed thread pool) and async (ASGI) webhook check-in paths with a few '
+        'hundred concurrent simulated scanners, in-process against a throwaway SQLite file. '
+        'Reports requests/sec and latency percentiles; queueing for a WSGI thread counts toward latency.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--handler', choices=['both', 'wsgi', 'asgi'], default='both')
+        parser.add_argument('--scanners', type=int, default=200)
+        parser.add_argument('--requests', type=int, default=5, help='Sequential check-ins sent by each scanner')
+        parser.add_argument('--wsgi-threads', type=int, default=8, help='Worker threads of the simulated WSGI server')
+        parser.add_argument('--child', action='store_true', help='internal: run inside the throwaway database')
+
+    def handle(self, *args, **options):
+        handlers = ['wsgi', 'asgi'] if options['handler'] == 'both' else [options['handler']]
+        if options['child']:
+            prepare_throwaway_db()
+            seminar_id = Seminar.objects.create(title='ASGI benchmark').pk
+            connection.close()
+            runner = self.run_wsgi if handlers == ['wsgi'] else self.run_asgi
+            self.stdout.write(json.dumps(runner(seminar_id, options)))
+            return
+
+        for handler in handlers:
+            result = run_in_throwaway_db('benchmark_asgi', [
+                '--child', '--handler', handler,
+                '--scanners', str(options['scanners']),
+                '--requests', str(options['requests']),
+                '--wsgi-threads', str(options['wsgi_threads']),
+            ])
+            self.stdout.write(
+                f"{handler:<5} {result['requests_per_sec']:>8} req/s  p50 {result['p50_ms']:>8} ms  "
+                f"p99 {result['p99_ms']:>8} ms  errors {result['errors']}"
+            )
+
+    def payload(self, seminar_id, scanner, n):
+        return {
+            'secret_token': settings.GOOGLE_FORM_SECRET,
+            'seminar_id': seminar_id,
+            'email': f'scanner{scanner}-{n}@example.com',
+            'name': f'Scanner {scanner}',
+        }
+
+    def summarize(self, latencies, errors, elapsed):
+        latencies.sort()
+        return {
+            'requests_per_sec': round(len(latencies) / elapsed, 1),
+            'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+            'errors': errors,
+        }
+
+    def run_wsgi(self, seminar_id, options):
+        """Scanners share a fixed pool of threads, like a threaded WSGI server"""
+        total = options['scanners'] * options['requests']
+        latencies, errors = [], [0]
+        lock = threading.Lock()
+        finished = threading.Event()
+        local = threading.local()
+
+        with ThreadPoolExecutor(max_workers=options['wsgi_threads']) as pool:
+            def send(scanner, n, queued_at):
+                client = getattr(local, 'client', None) or Client()
+                local.client = client
+                res = client.post('/api/google-form-submit/', self.payload(seminar_id, scanner, n), content_type='application/json')
+                with lock:
+                    latencies.append(time.perf_counter() - queued_at)
+                    errors[0] += res.status_code != 201
+                    if len(latencies) == total:
+                        finished.set()
+                if n + 1 < options['requests']:
+                    pool.submit(send, scanner, n + 1, time.perf_counter())
+
+            started = time.perf_counter()
+            for scanner in range(options['scanners']):
+                pool.submit(send, scanner, 0, started)
+            finished.wait()
+            elapsed = time.perf_counter() - started
+        return self.summarize(latencies, errors[0], elapsed)
+
+    def run_asgi(self, seminar_id, options):
+        """Every scanner is a coroutine on one event loop, like an ASGI server"""
+        latencies, errors = [], [0]
+
+        async def scanner(index):
+            client = AsyncClient()
+            for n in range(options['requests']):
+                sent = time.perf_counter()
+                res = await client.post('/api/async/google-form-submit/', self.payload(seminar_id, index, n), content_type='application/json')
+                latencies.append(time.perf_counter() - sent)
+                errors[0] += res.status_code != 201
+
+        async def main():
+            await asyncio.gather(*(scanner(i) for i in range(options['scanners'])))
+
+        started = time.perf_counter()
+        asyncio.run(main())
+        return self.summarize(latencies, errors[0], time.perf_counter() - started)
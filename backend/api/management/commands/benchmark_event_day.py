@@ -0,0 +1,401 @@
+import json
+import random
+import statistics
+import threading
+import time
+from datetime import date, datetime, time as day_time, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.utils import timezone
+
+from api import admission
+from api.models import Seminar, Attendance, JoinedParticipant, Evaluation
+from api.stats import percentile
+
+from ._throwaway import prepare_throwaway_db, run_in_throwaway_db
+
+
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / 'benchmarks' / 'event_day_baseline.json'
+
+# Options that shape the replayed traffic; a baseline is only comparable with a run of the same scenario
+SCENARIO_OPTIONS = (
+    'semesters', 'seminars_per_semester', 'participants', 'past_attendees',
+    'attendees', 'polls', 'exports', 'workers', 'seed',
+)
+
+PERCENTILES = (50, 95, 99)
+# A percentile is only gated once enough requests fall above it; below that it is the slowest request or two
+MIN_SAMPLES = {'p95_ms': 40, 'p99_ms': 200}
+
+# Evaluation forms in the shape the seminar editor saves them: select options best first
+QUESTION_SETS = (
+    [
+        {'id': 'q1', 'type': 'rating', 'question': 'Overall, how would you rate the seminar?', 'options': [1, 2, 3, 4, 5]},
+        {'id': 'q2', 'type': 'rating', 'question': 'How well did the speaker explain the topic?', 'options': [1, 2, 3, 4, 5]},
+        {'id': 'q3', 'type': 'select', 'question': 'How relevant was the topic to your course?',
+         'options': ['Very relevant', 'Relevant', 'Somewhat relevant', 'Not relevant']},
+        {'id': 'q4', 'type': 'select', 'question': 'Would you attend another seminar by this speaker?', 'options': ['Yes', 'Maybe', 'No']},
+        {'id': 'q5', 'type': 'text', 'question': 'What could be improved?'},
+    ],
+    [
+        {'id': 'content', 'type': 'rating', 'question': 'Content', 'options': [1, 2, 3, 4, 5]},
+        {'id': 'delivery', 'type': 'rating', 'question': 'Delivery', 'options': [1, 2, 3, 4, 5]},
+        {'id': 'venue', 'type': 'rating', 'question': 'Venue and sound', 'options': [1, 2, 3, 4, 5]},
+        {'id': 'pace', 'type': 'select', 'question': 'The pace of the seminar was', 'options': ['Just right', 'Too fast', 'Too slow']},
+        {'id': 'learned', 'type': 'text', 'question': 'What did you learn?'},
+        {'id': 'comments', 'type': 'text', 'question': 'Other comments'},
+    ],
+)
+
+COMMENTS = (
+    '', '', 'More time for questions please', 'The slides were hard to read from the back',
+    'Great speaker, very engaging', 'Start on time next time', 'Share the slides after the talk',
+    'The sound system kept cutting out', 'Loved the live demo', 'Too many topics for one afternoon',
+)
+TOPICS = (
+    'Cybersecurity Awareness', 'Cloud Computing Basics', 'Data Privacy Act', 'Machine Learning in Practice',
+    'Career Talk: Software Engineering', 'Research Writing', 'Mobile App Development', 'Networking Fundamentals',
+    'Entrepreneurship 101', 'Ethics in Computing', 'UI/UX Design Thinking', 'Database Administration',
+)
+SPEAKERS = ('Dr. Santos', 'Engr. Reyes', 'Prof. Cruz', 'Ms. Bautista', 'Mr. Garcia', 'Dr. Villanueva', 'Engr. Mendoza')
+FIRST_NAMES = ('Juan', 'Maria', 'Jose', 'Ana', 'Mark', 'Kristine', 'John', 'Angela', 'Paolo', 'Camille', 'Miguel', 'Andrea')
+LAST_NAMES = ('Dela Cruz', 'Santos', 'Reyes', 'Garcia', 'Mendoza', 'Torres', 'Flores', 'Ramos', 'Aquino', 'Castillo')
+SECTIONS = tuple(f'{year}{section}' for year in range(1, 5) for section in 'ABCD')
+
+
+def answers_for(questions, rng):
+    """Answers to ``questions`` as the evaluation form submits them, skewed towards good scores"""
+    answers = {}
+    for question in questions:
+        if question['type'] == 'rating':
+            answers[question['id']] = rng.choices(question['options'], weights=(1, 2, 6, 14, 12))[0]
+        elif question['type'] == 'select':
+            weights = [len(question['options']) - i for i in range(len(question['options']))]
+            answers[question['id']] = rng.choices(question['options'], weights=weights)[0]
+        else:
+            answers[question['id']] = rng.choice(COMMENTS)
+    return answers
+
+
+def seed(rng, semesters, seminars_per_semester, participants, past_attendees, attendees):
+    """Past semesters of seminars with their participants, attendance and evaluations, plus today's event.
+
+    Returns (event seminar, participant pool as (email, name, section) tuples).
+    """
+    now = timezone.now()
+    people = []
+    for i in range(participants):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        email = f"{first}.{last.replace(' ', '')}{i}@students.example.edu".lower()
+        people.append((email, f'{first} {last}', rng.choice(SECTIONS)))
+
+    # Semesters run back from today, two per year
+    past = []
+    for s in range(semesters):
+        start = date.today() - timedelta(days=(semesters - s) * 120)
+        for i in range(seminars_per_semester):
+            day = start + timedelta(days=i * 100 // seminars_per_semester)
+            begins = timezone.make_aware(datetime.combine(day, day_time(13, 0)))
+            past.append(Seminar(
+                title=f'{rng.choice(TOPICS)} ({s + 1}-{i + 1})', speaker=rng.choice(SPEAKERS), date=day,
+                start_time='13:00', end_time='15:00', start_datetime=begins, end_datetime=begins + timedelta(hours=2),
+                duration=120, semester=str(s % 2 + 1), capacity=past_attendees + 50,
+                questions=QUESTION_SETS[(s + i) % len(QUESTION_SETS)], metadata={'room': f'AVR {i % 4 + 1}'},
+            ))
+    past = Seminar.objects.bulk_create(past)
+
+    joined, attendance, evaluations = [], [], []
+    for seminar in past:
+        begins = seminar.start_datetime
+        for email, name, section in rng.sample(people, min(past_attendees, len(people))):
+            present = rng.random() < 0.85
+            time_in = begins + timedelta(minutes=rng.randint(-15, 20)) if present else None
+            time_out = begins + timedelta(minutes=rng.randint(100, 130)) if present else None
+            joined.append(JoinedParticipant(
+                seminar=seminar, participant_email=email, participant_name=name, metadata={'year_section': section},
+                present=present, check_in=time_in, check_out=time_out,
+            ))
+            if present:
+                attendance.append(Attendance(seminar=seminar, participant_email=email, time_in=time_in, time_out=time_out))
+                if rng.random() < 0.8:
+                    evaluations.append(Evaluation(
+                        seminar=seminar, participant_email=email, answers=answers_for(seminar.questions, rng),
+                    ))
+    JoinedParticipant.objects.bulk_create(joined, batch_size=500)
+    Attendance.objects.bulk_create(attendance, batch_size=500)
+    Evaluation.objects.bulk_create(evaluations, batch_size=500)
+    # bulk_create bypasses admission, so the counters are rebuilt from the rows
+    admission.recount([seminar.pk for seminar in past])
+
+    event = Seminar.objects.create(
+        title='General Assembly: Careers in Tech', speaker=rng.choice(SPEAKERS), date=date.today(),
+        start_time='08:00', end_time='12:00', start_datetime=now, end_datetime=now + timedelta(hours=4),
+        duration=240, semester=str(semesters % 2 + 1), capacity=attendees, questions=QUESTION_SETS[0],
+        metadata={'room': 'Gymnasium'},
+    )
+    return event, people
+
+
+def scenario(rng, event, people, options):
+    """The event day as (phase, [(label, method, path, data), ...]) in replay order"""
+    event_id = event.pk
+    catalog = ('GET /api/seminars/', 'GET', '/api/seminars/?include=questions,metadata', None)
+    admission_poll = ('GET /api/seminars/<id>/admission/', 'GET', f'/api/seminars/{event_id}/admission/', None)
+    attendance_list = ('GET /api/attendance/<id>/', 'GET', f'/api/attendance/{event_id}/?limit=50', None)
+    stats = ('GET /api/seminars/<id>/stats/', 'GET', f'/api/seminars/{event_id}/stats/', None)
+    analytics = ('GET /api/seminars/<id>/analytics/', 'GET', f'/api/seminars/{event_id}/analytics/', None)
+    attendees = rng.sample(people, min(options['attendees'], len(people)))
+
+    # Students keep the seminar page open before doors open; most polls revalidate an ETag
+    polling = [admission_poll if i % 5 == 4 else catalog for i in range(options['polls'])]
+
+    checkins = []
+    for i, (email, name, section) in enumerate(attendees):
+        checkins.append(('POST /api/google-form-submit/', 'POST', '/api/google-form-submit/', {
+            'secret_token': settings.GOOGLE_FORM_SECRET, 'seminar_id': event_id,
+            'email': email, 'name': name, 'year_section': section,
+        }))
+        # Students in the queue watch the seat counter
+        if i % 4 == 3:
+            checkins.append(admission_poll)
+        if i % 10 == 9:
+            checkins.append(attendance_list)
+        if i % 25 == 24:
+            checkins.append(stats)
+
+    # Most scanners post each check-out; the offline ones sync in batches when they reconnect
+    checkouts, batch = [], []
+    leaving = rng.sample(attendees, int(len(attendees) * 0.9))
+    for i, (email, _, _) in enumerate(leaving):
+        time_out = event.end_datetime - timedelta(minutes=rng.randint(0, 30))
+        record = {'seminar': event_id, 'participant_email': email, 'time_out': time_out.isoformat()}
+        if i % 4 == 3:
+            batch.append(record)
+            if len(batch) == 20:
+                checkouts.append(('POST /api/attendance/bulk/', 'POST', '/api/attendance/bulk/', {'records': batch}))
+                batch = []
+        else:
+            checkouts.append(('POST /api/attendance/', 'POST', '/api/attendance/', record))
+        if i % 10 == 9:
+            checkouts.append(attendance_list)
+    if batch:
+        checkouts.append(('POST /api/attendance/bulk/', 'POST', '/api/attendance/bulk/', {'records': batch}))
+
+    evaluating = []
+    for i, (email, _, _) in enumerate(rng.sample(leaving, int(len(leaving) * 0.75))):
+        evaluating.append(('POST /api/evaluations/', 'POST', '/api/evaluations/', {
+            'seminar': event_id, 'participant_email': email, 'answers': answers_for(event.questions, rng),
+        }))
+        if i % 20 == 19:
+            evaluating.append(analytics if i % 40 == 39 else stats)
+
+    past_ids = list(Seminar.objects.exclude(pk=event_id).values_list('id', flat=True))
+    exports = []
+    for i in range(options['exports']):
+        exports += [
+            ('GET /api/attendance/<id>/export/', 'GET', f'/api/attendance/{event_id}/export/', None),
+            ('GET /api/evaluations/<id>/export/', 'GET', f'/api/evaluations/{event_id}/export/?output=ndjson', None),
+            ('GET /api/evaluations/<id>/export/', 'GET', f'/api/evaluations/{rng.choice(past_ids)}/export/', None),
+            ('GET /api/evaluations/export/', 'GET', f'/api/evaluations/export/?semester={i % 2 + 1}', None),
+            ('GET /api/analytics/evaluations/', 'GET', f'/api/analytics/evaluations/?semester={i % 2 + 1}', None),
+        ]
+
+    return [
+        ('catalog polling', polling),
+        ('check-in burst', checkins),
+        ('scanner check-outs', checkouts),
+        ('evaluation rush', evaluating),
+        ('admin exports', exports),
+    ]
+
+
+def run_phase(calls, workers):
+    """Send ``calls`` in order from ``workers`` client threads; returns ([(label, seconds, ok)], elapsed)"""
+    lock = threading.Lock()
+    pending = iter(calls)
+    samples = []
+
+    def worker():
+        # Like a browser: gzip accepted, ETags remembered per URL and sent back in If-None-Match
+        client = Client(HTTP_ACCEPT_ENCODING='gzip')
+        etags, local = {}, []
+        try:
+            while True:
+                with lock:
+                    call = next(pending, None)
+                if call is None:
+                    break
+                label, method, path, data = call
+                started = time.perf_counter()
+                if method == 'GET':
+                    headers = {'HTTP_IF_NONE_MATCH': etags[path]} if path in etags else {}
+                    res = client.get(path, **headers)
+                else:
+                    res = client.post(path, json.dumps(data), content_type='application/json')
+                if res.streaming:
+                    b''.join(res.streaming_content)
+                local.append((label, time.perf_counter() - started, res.status_code < 400))
+                if res.has_header('ETag'):
+                    etags[path] = res['ETag']
+        finally:
+            connection.close()
+        with lock:
+            samples.extend(local)
+
+    threads = [threading.Thread(target=worker) for _ in range(workers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - started
+
+
+def summarize(samples, seconds):
+    """count, errors, req/s over ``seconds`` and latency percentiles (ms) of one endpoint"""
+    timings = sorted(elapsed for _, elapsed, _ in samples)
+    summary = {
+        'count': len(samples),
+        'errors': sum(1 for _, _, ok in samples if not ok),
+        'rps': round(len(samples) / seconds, 1),
+    }
+    for pct in PERCENTILES:
+        summary[f'p{pct}_ms'] = round(percentile(timings, pct) * 1000, 2)
+    return summary
+
+
+def replay(options):
+    """Seed the current database and replay the event day; returns the per-phase and per-endpoint report"""
+    rng = random.Random(options['seed'])
+    event, people = seed(
+        rng, options['semesters'], options['seminars_per_semester'], options['participants'],
+        options['past_attendees'], options['attendees'],
+    )
+    phases = scenario(rng, event, people, options)
+    connection.close()
+
+    report = {'scenario': {name: options[name] for name in SCENARIO_OPTIONS}, 'phases': {}, 'endpoints': {}}
+    by_label, busy = {}, {}
+    for name, calls in phases:
+        samples, elapsed = run_phase(calls, options['workers'])
+        report['phases'][name] = {'requests': len(samples), 'seconds': round(elapsed, 3), 'rps': round(len(samples) / elapsed, 1)}
+        for label in {label for label, _, _ in samples}:
+            busy[label] = busy.get(label, 0) + elapsed
+        for sample in samples:
+            by_label.setdefault(sample[0], []).append(sample)
+    # Throughput of an endpoint is measured over the phases it was called in
+    for label in sorted(by_label):
+        report['endpoints'][label] = summarize(by_label[label], busy[label])
+    return report
+
+
+def median_report(reports):
+    """One report from several runs of the same scenario: the median of every figure, errors summed"""
+    merged = {'scenario': reports[0]['scenario'], 'runs': len(reports), 'phases': {}, 'endpoints': {}}
+    for section in ('phases', 'endpoints'):
+        for name in reports[0][section]:
+            rows = [report[section][name] for report in reports if name in report[section]]
+            merged[section][name] = {key: statistics.median(row[key] for row in rows) for key in rows[0]}
+            if section == 'endpoints':
+                merged[section][name]['errors'] = sum(row['errors'] for row in rows)
+    return merged
+
+
+def compare(report, baseline, tolerance, slack_ms):
+    """Regressions of ``report`` against ``baseline`` as messages; empty when the run passes"""
+    if baseline['scenario'] != report['scenario']:
+        return ['scenario differs from the baseline: re-record it with --save-baseline']
+    failures = []
+    for label, current in report['endpoints'].items():
+        if current['errors']:
+            failures.append(f"{label}: {current['errors']} failed requests")
+        base = baseline['endpoints'].get(label)
+        if base is None:
+            continue
+        for key, min_samples in MIN_SAMPLES.items():
+            if current['count'] < min_samples:
+                continue
+            limit = base[key] * (1 + tolerance) + slack_ms
+            if current[key] > limit:
+                failures.append(f'{label}: {key} {current[key]} > {limit:.2f} (baseline {base[key]})')
+        floor = base['rps'] * (1 - tolerance)
+        if current['rps'] < floor:
+            failures.append(f"{label}: {current['rps']} req/s < {floor:.1f} (baseline {base['rps']})")
+    return failures
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed semesters of seminars, participants and evaluations in a throwaway SQLite file and replay an '
+        'event day through the URLconf: catalog polling, webhook check-ins, scanner check-outs, an evaluation '
+        'rush and admin exports. Reports req/s and p50/p95/p99 per endpoint and fails on regressions '
+        'against a stored baseline.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--semesters', type=int, default=4)
+        parser.add_argument('--seminars-per-semester', type=int, default=30)
+        parser.add_argument('--participants', type=int, default=3000, help='Size of the student pool')
+        parser.add_argument('--past-attendees', type=int, default=150, help='Participants per past seminar')
+        parser.add_argument('--attendees', type=int, default=600, help='Participants checking in to the event')
+        parser.add_argument('--polls', type=int, default=1500, help='Catalog and admission polls before doors open')
+        parser.add_argument('--exports', type=int, default=6, help='Rounds of admin exports and reports')
+        parser.add_argument('--workers', type=int, default=8, help='Concurrent client threads')
+        parser.add_argument('--seed', type=int, default=2026, help='Random seed of the generated data and traffic')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs in fresh databases; the median of each figure is kept')
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help='Baseline JSON to compare against')
+        parser.add_argument('--save-baseline', action='store_true', help='Write this run as the new baseline')
+        parser.add_argument('--tolerance', type=float, default=0.5,
+                            help='Allowed relative p95/p99 increase and req/s drop before a run fails')
+        parser.add_argument('--slack-ms', type=float, default=10.0,
+                            help='Latency slack added to each limit, so sub-millisecond jitter never fails a run')
+        parser.add_argument('--json', action='store_true', help='Print the raw report as JSON')
+        parser.add_argument('--child', action='store_true', help='internal: run inside the throwaway database')
+
+    def handle(self, *args, **options):
+        if options['child']:
+            prepare_throwaway_db()
+            self.stdout.write(json.dumps(replay(options)))
+            return
+
+        args = ['--child']
+        for name in SCENARIO_OPTIONS:
+            args += [f"--{name.replace('_', '-')}", str(options[name])]
+        report = median_report([run_in_throwaway_db('benchmark_event_day', args) for _ in range(options['repeat'])])
+
+        if options['json']:
+            self.stdout.write(json.dumps(report))
+        else:
+            self.write_report(report)
+
+        baseline_path = Path(options['baseline'])
+        if options['save_baseline']:
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(json.dumps(report, indent=2, sort_keys=True) + '\n')
+            self.stdout.write(f'Baseline written to {baseline_path}')
+            return
+        if not baseline_path.exists():
+            self.stdout.write(self.style.WARNING(f'No baseline at {baseline_path}; record one with --save-baseline'))
+            return
+
+        failures = compare(report, json.loads(baseline_path.read_text()), options['tolerance'], options['slack_ms'])
+        if failures:
+            for failure in failures:
+                self.stderr.write(failure)
+            raise CommandError(f'{len(failures)} regression(s) against {baseline_path}')
+        self.stdout.write(self.style.SUCCESS(f'No regressions against {baseline_path}'))
+
+    def write_report(self, report):
+        for name, phase in report['phases'].items():
+            self.stdout.write(f"{name:<20} {phase['requests']:>6} requests {phase['seconds']:>8.2f} s {phase['rps']:>8} req/s")
+        self.stdout.write('')
+        self.stdout.write(f"{'endpoint':<38} {'count':>6} {'errors':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+        for label, row in report['endpoints'].items():
+            self.stdout.write(
+                f"{label:<38} {row['count']:>6} {row['errors']:>6} {row['rps']:>8} "
+                f"{row['p50_ms']:>8} {row['p95_ms']:>8} {row['p99_ms']:>8}"
+            )
@@ -0,0 +1,129 @@
+import re
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from api.events import events_after
+from api.history import participant_history_query
+from api.search import matching_pks
+from api.models import Seminar, Attendance, JoinedParticipant, Evaluation, Certificate
+
+
+# SQLite reports "SCAN <table>" for a full table walk, "SCAN <table> USING [COVERING] INDEX"
+# for an ordered index walk (which stops at LIMIT) and "SCAN <table> VIRTUAL TABLE INDEX" for
+# an FTS5 lookup; PostgreSQL reports "Seq Scan on <table>".
+FULL_SCAN_PATTERNS = (
+    re.compile(r'\bSCAN (?:TABLE )?(\w+)(?! USING| VIRTUAL TABLE)(?:\s|$)'),
+    re.compile(r'\bSeq Scan on (\w+)'),
+)
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed N seminars x M participants in a rolled-back transaction and assert via '
+        'EXPLAIN that the list and lookup queries used by the API never fall back to a full table scan.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seminars', type=int, default=50)
+        parser.add_argument('--participants', type=int, default=200)
+        parser.add_argument('--page-size', type=int, default=50)
+        parser.add_argument('--show-plans', action='store_true', help='Print the full plan for every query')
+
+    def handle(self, *args, **options):
+        self.options = options
+        failures = []
+        try:
+            with transaction.atomic():
+                seminar, email = self.seed(options['seminars'], options['participants'])
+                if connection.vendor == 'sqlite':
+                    with connection.cursor() as cursor:
+                        cursor.execute('ANALYZE')
+                for label, qs in self.queries(seminar, email, options['page_size']):
+                    failures.extend(self.check_plan(label, qs))
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        if failures:
+            raise CommandError('Full table scans detected:\n  ' + '\n  '.join(failures))
+        self.stdout.write(self.style.SUCCESS('No full table scans detected'))
+
+    def seed(self, n_seminars, n_participants):
+        started = time.perf_counter()
+        today = date.today()
+        seminars = Seminar.objects.bulk_create(
+            Seminar(title=f'Benchmark seminar {i}', speaker=f'Speaker {i % 7}', semester=str(i % 2 + 1),
+                    date=today + timedelta(days=i), capacity=n_participants)
+            for i in range(n_seminars)
+        )
+        now = timezone.now()
+        for seminar in seminars:
+            emails = [f'participant{j}@example.com' for j in range(n_participants)]
+            JoinedParticipant.objects.bulk_create(
+                JoinedParticipant(seminar=seminar, participant_email=e, present=j % 3 != 0)
+                for j, e in enumerate(emails)
+            )
+            Attendance.objects.bulk_create(
+                Attendance(seminar=seminar, participant_email=e, time_in=now) for e in emails
+            )
+            Evaluation.objects.bulk_create(
+                Evaluation(seminar=seminar, participant_email=e, answers={'q1': 5}) for e in emails[::2]
+            )
+            Certificate.objects.bulk_create(
+                Certificate(seminar=seminar, participant_email=e, certificate_number=f'BENCH-{seminar.pk}-{j}')
+                for j, e in enumerate(emails[::2])
+            )
+        self.stdout.write(
+            f'Seeded {n_seminars} seminars x {n_participants} participants '
+            f'in {time.perf_counter() - started:.2f}s'
+        )
+        return seminars[len(seminars) // 2], f'participant{n_participants // 2}@example.com'
+
+    def queries(self, seminar, email, page_size):
+        yield 'seminar catalog', Seminar.objects.order_by('date')
+        yield 'seminars by semester', Seminar.objects.filter(semester='1').order_by('date')
+        yield 'attendance lookup', Attendance.objects.filter(seminar_id=seminar.pk, participant_email=email)
+        yield 'joined lookup', JoinedParticipant.objects.filter(seminar_id=seminar.pk, participant_email=email)
+        yield 'participant history', participant_history_query(email)
+        yield 'attendance feed poll', events_after(seminar.pk, 0)
+        for model, query in ((Seminar, 'seminar 1'), (JoinedParticipant, email.split('@')[0])):
+            pks = matching_pks(model, query, connection.alias)
+            if pks is not None:
+                yield f'{model._meta.model_name} search', model.objects.filter(pk__in=pks)
+
+        lists = (
+            (Attendance, 'created_at'),
+            (JoinedParticipant, 'joined_at'),
+            (Evaluation, 'created_at'),
+            (Certificate, 'issued_at'),
+        )
+        now = timezone.now()
+        for model, field in lists:
+            name = model._meta.model_name
+            ordered = model.objects.order_by(field, 'id')
+            yield f'{name} page', ordered[:page_size + 1]
+            yield f'{name} page after cursor', ordered.filter(**{f'{field}__gt': now - timedelta(days=1)})[:page_size + 1]
+            yield f'{name} for seminar', ordered.filter(seminar_id=seminar.pk)
+            yield f'{name} by email', ordered.filter(participant_email=email)
+            yield f'{name} sync changes', model.objects.order_by('updated_at', 'id').filter(updated_at__gt=now - timedelta(days=1))[:page_size + 1]
+
+    def check_plan(self, label, qs):
+        started = time.perf_counter()
+        list(qs)
+        elapsed = (time.perf_counter() - started) * 1000
+        plan = qs.explain()
+        scans = sorted({m.group(1) for pattern in FULL_SCAN_PATTERNS for m in pattern.finditer(plan)})
+        status = self.style.ERROR('FULL SCAN') if scans else self.style.SUCCESS('ok')
+        self.stdout.write(f'{label:<36} {elapsed:8.2f} ms  {status}')
+        if self.options['show_plans'] or scans:
+            for line in plan.splitlines():
+                self.stdout.write(f'    {line}')
+        return [f'{label}: {", ".join(scans)}'] if scans else []
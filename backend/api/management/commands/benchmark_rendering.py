@@ -0,0 +1,77 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+from django.urls import resolve
+from rest_framework.renderers import JSONRenderer
+
+from api.compression import COMPRESSORS
+from api.renderers import dumps, orjson
+
+from .benchmark_serialization import seed
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed N rows per model in a rolled-back transaction, fetch the list endpoints through the URLconf and '
+        'compare render time (json module vs orjson) and bytes on the wire per available content coding.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=5, help='Best of this many runs is reported')
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(self.style.WARNING('orjson is not installed: both render columns use the json module'))
+        try:
+            with transaction.atomic():
+                seminar = seed(options['rows'])
+                endpoints = (
+                    ('seminar catalog', '/api/seminars/', {}),
+                    ('seminar catalog (full)', '/api/seminars/', {'include': 'questions,metadata'}),
+                    ('attendance', f'/api/attendance/{seminar.pk}/', {}),
+                    ('joined participants', f'/api/joined-participants/{seminar.pk}/', {}),
+                    ('evaluations', f'/api/evaluations/{seminar.pk}/', {}),
+                )
+                codings = list(COMPRESSORS)
+                self.stdout.write(
+                    f"{'endpoint':<26} {'json':>9} {'orjson':>9} {'bytes':>10}"
+                    + ''.join(f' {coding + " bytes (ms)":>20}' for coding in codings)
+                )
+                for label, path, params in endpoints:
+                    data = self.fetch(path, params)
+                    before = self.best(options['repeat'], lambda: JSONRenderer().render(data))
+                    after = self.best(options['repeat'], lambda: dumps(data))
+                    body = dumps(data)
+                    line = f'{label:<26} {before * 1000:>6.1f} ms {after * 1000:>6.1f} ms {len(body):>10}'
+                    for coding in codings:
+                        compress = COMPRESSORS[coding]
+                        elapsed = self.best(options['repeat'], lambda: compress(body))
+                        line += f' {len(compress(body)):>10} ({elapsed * 1000:>5.1f})'
+                    self.stdout.write(line)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def fetch(self, path, params):
+        """Response data of a GET through the URLconf (the catalog comes pre-rendered, so it is decoded)"""
+        match = resolve(path)
+        response = match.func(RequestFactory().get(path, params), *match.args, **match.kwargs)
+        if hasattr(response, 'data'):
+            return response.data
+        return json.loads(response.content)
+
+    def best(self, repeat, fn):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
@@ -0,0 +1,95 @@
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from api.models import Seminar, Attendance, JoinedParticipant, Evaluation
+from api.serializers import (
+    AttendanceReadSerializer, AttendanceSerializer, EvaluationReadSerializer, EvaluationSerializer,
+    JoinedParticipantReadSerializer, JoinedParticipantSerializer, SeminarReadSerializer, SeminarSerializer,
+)
+
+
+QUESTIONS = [
+    {'id': f'q{i}', 'type': 'rating', 'question': f'How would you rate part {i} of the seminar?', 'options': [1, 2, 3, 4, 5]}
+    for i in range(12)
+]
+
+CASES = (
+    # label, model, ModelSerializer, ReadSerializer, read serializer options
+    ('seminars (full)', Seminar, SeminarSerializer, SeminarReadSerializer, {'include': ('questions', 'metadata')}),
+    ('seminars (default list)', Seminar, SeminarSerializer, SeminarReadSerializer, {}),
+    ('seminars (?fields=title,date,speaker)', Seminar, SeminarSerializer, SeminarReadSerializer, {'fields': ('title', 'date', 'speaker')}),
+    ('attendance', Attendance, AttendanceSerializer, AttendanceReadSerializer, {}),
+    ('joined participants', JoinedParticipant, JoinedParticipantSerializer, JoinedParticipantReadSerializer, {}),
+    ('evaluations', Evaluation, EvaluationSerializer, EvaluationReadSerializer, {}),
+)
+
+
+def seed(n):
+    """n seminars, plus n participants with attendance and evaluations for the first seminar; returns that seminar"""
+    today = date.today()
+    now = timezone.now()
+    seminars = Seminar.objects.bulk_create(
+        Seminar(title=f'Benchmark seminar {i}', speaker=f'Speaker {i % 7}', date=today + timedelta(days=i % 365),
+                start_datetime=now, capacity=100, questions=QUESTIONS, metadata={'room': f'R{i % 20}'})
+        for i in range(n)
+    )
+    seminar = seminars[0]
+    JoinedParticipant.objects.bulk_create(
+        JoinedParticipant(seminar=seminar, participant_email=f'p{i}@example.com', participant_name=f'P {i}',
+                          metadata={'year_section': '3A'}, present=True, check_in=now)
+        for i in range(n)
+    )
+    Attendance.objects.bulk_create(
+        Attendance(seminar=seminar, participant_email=f'p{i}@example.com', time_in=now, time_out=now)
+        for i in range(n)
+    )
+    Evaluation.objects.bulk_create(
+        Evaluation(seminar=seminar, participant_email=f'p{i}@example.com', answers={q['id']: 5 for q in QUESTIONS})
+        for i in range(n)
+    )
+    return seminar
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed N rows per model in a rolled-back transaction and compare fetch + serialization time of '
+        'the ModelSerializer list path against the values()-based read serializers, per 10k rows.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=3, help='Best of this many runs is reported')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                seed(options['rows'])
+                self.stdout.write(f"{'list':<40} {'ModelSerializer':>16} {'read serializer':>16} {'speedup':>8}")
+                for label, model, model_serializer, read_serializer, read_options in CASES:
+                    # A fresh queryset per run, so both sides pay for the fetch every time
+                    before = self.best(options['repeat'], lambda: model_serializer(model.objects.order_by('id'), many=True).data)
+                    serializer = read_serializer(**read_options)
+                    after = self.best(options['repeat'], lambda: serializer.serialize(model.objects.order_by('id').values(*serializer.fields)))
+                    scale = 10000 / options['rows']
+                    self.stdout.write(
+                        f'{label:<40} {before * scale * 1000:>13.1f} ms {after * scale * 1000:>13.1f} ms {before / after:>7.1f}x'
+                    )
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def best(self, repeat, fn):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
@@ -0,0 +1,34 @@
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api import ingest
+
+
+class Command(BaseCommand):
+    help = (
+        'Apply every check-in waiting in the ingestion queue and exit. Run it after stopping the '
+        'server on shutdown; with --follow it keeps flushing as a standalone worker until interrupted, '
+        'then drains what is left.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='Entries per transaction (default: CHECKIN_FLUSH_BATCH_SIZE)')
+        parser.add_argument('--follow', action='store_true', help='Keep flushing until SIGINT/SIGTERM')
+
+    def handle(self, *args, **options):
+        applied = ingest.drain(options['batch_size'])
+        if options['follow']:
+            stopping = threading.Event()
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(sig, lambda *_: stopping.set())
+            while not stopping.is_set():
+                applied += ingest.drain(options['batch_size'])
+                stopping.wait(settings.CHECKIN_FLUSH_INTERVAL)
+            applied += ingest.drain(options['batch_size'])
+        status = ingest.journal_status()
+        self.stdout.write(self.style.SUCCESS(f"Applied {applied} queued check-ins; {status['depth']} remaining"))
+        if status['dead_letters']:
+            self.stdout.write(self.style.WARNING(f"{status['dead_letters']} check-ins in the dead letters"))
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.exports import EXPORTS, EXPORT_FORMATS, render
+from api.pagination import InvalidListParams, filter_queryset
+
+
+class Command(BaseCommand):
+    help = 'Export attendance or evaluations as CSV or NDJSON without loading the whole table into memory.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('resource', choices=sorted(EXPORTS))
+        parser.add_argument('--output', choices=sorted(EXPORT_FORMATS), default='csv')
+        parser.add_argument('--file', help='Write to this path instead of stdout')
+        parser.add_argument('--seminar', type=int)
+        parser.add_argument('--semester')
+        parser.add_argument('--email')
+        parser.add_argument('--from', dest='from')
+        parser.add_argument('--to')
+        parser.add_argument('--present', help='true/false (attendance only)')
+
+    def handle(self, *args, **options):
+        model, timestamp_field, present_q, build = EXPORTS[options['resource']]
+        qs = model.objects.all()
+        if options['seminar']:
+            qs = qs.filter(seminar_id=options['seminar'])
+        params = {key: options[key] for key in ('semester', 'email', 'from', 'to', 'present') if options[key]}
+        try:
+            qs = filter_queryset(params, qs, timestamp_field, present_q=present_q)
+        except InvalidListParams as e:
+            raise CommandError(str(e))
+
+        header, rows = build(qs)
+        out = open(options['file'], 'w', newline='', encoding='utf-8') if options['file'] else self.stdout
+        try:
+            count = -1 if options['output'] == 'csv' else 0
+            for line in render(options['output'], header, rows):
+                out.write(line)
+                count += 1
+        finally:
+            if options['file']:
+                out.close()
+        if options['file']:
+            self.stderr.write(f"Exported {count} rows to {options['file']}")
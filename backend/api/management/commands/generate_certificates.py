@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.certificates import generate_certificates
+from api.models import Seminar
+
+
+class Command(BaseCommand):
+    help = 'Render certificates for every present and evaluated participant of a seminar. Safe to re-run: existing certificates are skipped.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('seminar_id', type=int)
+        parser.add_argument('--workers', type=int, help='Worker processes (default: CERTIFICATE_WORKERS)')
+        parser.add_argument('--batch-size', type=int, help='Participants per batch (default: CERTIFICATE_BATCH_SIZE)')
+
+    def handle(self, *args, **options):
+        try:
+            seminar = Seminar.objects.get(pk=options['seminar_id'])
+        except Seminar.DoesNotExist:
+            raise CommandError(f"Seminar {options['seminar_id']} not found")
+
+        def report(progress):
+            self.stdout.write(f"{progress['done']}/{progress['total']} certificates")
+
+        progress = generate_certificates(seminar, workers=options['workers'], batch_size=options['batch_size'], on_progress=report)
+        elapsed = progress['finished_at'] - progress['started_at']
+        self.stdout.write(self.style.SUCCESS(f"Generated {progress['done']} certificates in {elapsed:.2f}s"))
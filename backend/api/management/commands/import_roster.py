@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import Seminar
+from api.roster import RosterError, import_roster, read_roster
+
+
+class Command(BaseCommand):
+    help = 'Pre-register the participants listed in a CSV or XLSX roster for a seminar.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('seminar_id', type=int)
+        parser.add_argument('path', help='Roster file; .xlsx is read with openpyxl, anything else as CSV')
+        parser.add_argument('--chunk-size', type=int, help='Rows per transaction (default ROSTER_IMPORT_CHUNK_SIZE)')
+
+    def handle(self, *args, **options):
+        if not Seminar.objects.filter(pk=options['seminar_id']).exists():
+            raise CommandError(f"Seminar {options['seminar_id']} not found")
+        started = time.perf_counter()
+        try:
+            with open(options['path'], 'rb') as file:
+                result = import_roster(options['seminar_id'], read_roster(file, options['path']), options['chunk_size'])
+        except RosterError as e:
+            if e.result:
+                self.report(e.result, started)
+            raise CommandError(str(e))
+        except OSError as e:
+            raise CommandError(str(e))
+        self.report(result, started)
+
+    def report(self, result, started):
+        for error in result['errors']:
+            self.stderr.write(f"row {error['row']}: {error['error']}")
+        self.stdout.write(
+            f"Inserted {result['inserted']}, skipped {result['skipped']}, invalid {result['invalid']} "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
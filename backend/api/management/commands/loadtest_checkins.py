@@ -0,0 +1,103 @@
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+
+from api.models import Seminar
+
+from ._throwaway import prepare_throwaway_db, run_in_throwaway_db
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure check-in write and attendance read throughput with concurrent clients against a '
+        'throwaway SQLite file. --mode both runs the stock and tuned SQLite configurations side by side.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=['both', 'baseline', 'tuned', 'current'], default='both')
+        parser.add_argument('--writers', type=int, default=16)
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--duration', type=float, default=5.0, help='Seconds to run each configuration')
+        parser.add_argument('--json', action='store_true', help='Print the raw result as JSON')
+
+    def handle(self, *args, **options):
+        if options['mode'] == 'current':
+            result = self.run_load(options)
+            self.stdout.write(json.dumps(result) if options['json'] else self.format(settings.SQLITE_TUNING, result))
+            return
+
+        modes = ['baseline', 'tuned'] if options['mode'] == 'both' else [options['mode']]
+        results = {mode: self.spawn(mode, options) for mode in modes}
+        if options['json']:
+            self.stdout.write(json.dumps(results))
+            return
+        for mode, result in results.items():
+            self.stdout.write(self.format(mode == 'tuned', result))
+
+    def spawn(self, mode, options):
+        """Run one configuration in a fresh process so its settings and connections are isolated"""
+        return run_in_throwaway_db('loadtest_checkins', [
+            '--mode', 'current', '--json',
+            '--writers', str(options['writers']),
+            '--readers', str(options['readers']),
+            '--duration', str(options['duration']),
+        ], env={'SQLITE_TUNING': 'True' if mode == 'tuned' else 'False'})
+
+    def run_load(self, options):
+        prepare_throwaway_db()
+        seminar = Seminar.objects.create(title='Load test')
+        connection.close()
+
+        deadline = time.perf_counter() + options['duration']
+        lock = threading.Lock()
+        stats = {'writes': 0, 'reads': 0, 'errors': 0}
+
+        def writer(worker):
+            client = Client()
+            n = 0
+            while time.perf_counter() < deadline:
+                res = client.post('/api/google-form-submit/', {
+                    'secret_token': settings.GOOGLE_FORM_SECRET,
+                    'seminar_id': seminar.id,
+                    'email': f'w{worker}-{n}@example.com',
+                    'name': f'Writer {worker}',
+                }, content_type='application/json')
+                n += 1
+                with lock:
+                    stats['writes' if res.status_code == 201 else 'errors'] += 1
+            connection.close()
+
+        def reader():
+            client = Client()
+            while time.perf_counter() < deadline:
+                res = client.get(f'/api/attendance/{seminar.id}/', {'limit': 50})
+                with lock:
+                    stats['reads' if res.status_code == 200 else 'errors'] += 1
+            connection.close()
+
+        threads = [threading.Thread(target=writer, args=(i,)) for i in range(options['writers'])]
+        threads += [threading.Thread(target=reader) for _ in range(options['readers'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        return {
+            'writes_per_sec': round(stats['writes'] / elapsed, 1),
+            'reads_per_sec': round(stats['reads'] / elapsed, 1),
+            'errors': stats['errors'],
+        }
+
+    def format(self, tuned, result):
+        label = 'tuned' if tuned else 'baseline'
+        return (
+            f"{label:<9} writes/s {result['writes_per_sec']:>8}  "
+            f"reads/s {result['reads_per_sec']:>8}  errors {result['errors']}"
+        )
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from api import events
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete attendance feed events older than SSE_EVENT_RETENTION_SECONDS. Run it from cron; '
+        'streams resuming from a deleted event are sent a fresh snapshot.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, help='Age in seconds (default: SSE_EVENT_RETENTION_SECONDS)')
+
+    def handle(self, *args, **options):
+        deleted = events.prune(options['older_than'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} attendance events'))
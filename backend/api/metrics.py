@@ -0,0 +1,250 @@
+"""Per-route request metrics: latency, DB queries and time, response size.
+
+RequestMetricsMiddleware times every request and counts the queries it runs
+through a database execute wrapper, which reads the current request's counters
+from a context variable (so queries issued from sync_to_async threads are
+counted too). Totals are kept in process memory and rendered in the Prometheus
+text format by ``/api/metrics/``; each request is also logged as one JSON line
+on the ``api.requests`` logger. Requests that run more queries than
+QUERY_BUDGET are logged as warnings with the most repeated statement, which is
+usually the N+1 culprit.
+"""
+import json
+import logging
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+
+logger = logging.getLogger('api.requests')
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+_current = ContextVar('api_request_stats', default=None)
+
+
+class RequestStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.bytes = 0
+        self.statements = Counter()
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper installed on every connection (see ApiConfig.ready)"""
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.db_time += time.perf_counter() - started
+        stats.queries += 1
+        stats.statements[sql] += 1
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """connection_created receiver"""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+
+class RouteMetrics:
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.db_seconds = 0.0
+        self.response_bytes = 0
+        self.over_budget = 0
+
+
+class Registry:
+    """Process-local metric store keyed by (route, method, status)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.routes = {}
+
+    def observe(self, labels, stats, duration, over_budget):
+        with self.lock:
+            metrics = self.routes.get(labels)
+            if metrics is None:
+                metrics = self.routes[labels] = RouteMetrics()
+            metrics.latency.observe(duration)
+            metrics.queries.observe(stats.queries)
+            metrics.db_seconds += stats.db_time
+            metrics.response_bytes += stats.bytes
+            metrics.over_budget += over_budget
+
+    def reset(self):
+        with self.lock:
+            self.routes.clear()
+
+    def render(self):
+        with self.lock:
+            routes = sorted(self.routes.items())
+            lines = []
+            lines += _histogram('api_request_duration_seconds', 'Request latency in seconds', routes, lambda m: m.latency)
+            lines += _histogram('api_request_db_queries', 'Database queries per request', routes, lambda m: m.queries)
+            lines += _counter('api_request_db_seconds_total', 'Time spent in database queries', routes, lambda m: m.db_seconds)
+            lines += _counter('api_response_bytes_total', 'Response body bytes sent', routes, lambda m: m.response_bytes)
+            lines += _counter('api_query_budget_exceeded_total', 'Requests over QUERY_BUDGET queries', routes, lambda m: m.over_budget)
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels, **extra):
+    route, method, status = labels
+    pairs = {'route': route, 'method': method, 'status': status, **extra}
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs.items()) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _histogram(name, help_text, routes, get):
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+    for labels, metrics in routes:
+        histogram = get(metrics)
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            lines.append(f'{name}_bucket{_labels(labels, le=_number(float(bound)))} {count}')
+        lines.append(f'{name}_bucket{_labels(labels, le="+Inf")} {histogram.count}')
+        lines.append(f'{name}_sum{_labels(labels)} {_number(histogram.sum)}')
+        lines.append(f'{name}_count{_labels(labels)} {histogram.count}')
+    return lines
+
+
+def _counter(name, help_text, routes, get):
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+    lines += [f'{name}{_labels(labels)} {_number(get(metrics))}' for labels, metrics in routes]
+    return lines
+
+
+registry = Registry()
+
+
+def route_label(request):
+    match = getattr(request, 'resolver_match', None)
+    return f'/{match.route}' if match and match.route else '<unmatched>'
+
+
+def finish(request, response, stats):
+    duration = time.perf_counter() - stats.started
+    route = route_label(request)
+    budget = settings.QUERY_BUDGET
+    over_budget = budget > 0 and stats.queries > budget
+    registry.observe((route, request.method, response.status_code), stats, duration, over_budget)
+
+    record = {
+        'route': route,
+        'method': request.method,
+        'status': response.status_code,
+        'duration_ms': round(duration * 1000, 2),
+        'db_queries': stats.queries,
+        'db_ms': round(stats.db_time * 1000, 2),
+        'response_bytes': stats.bytes,
+    }
+    if over_budget:
+        statement, repeats = stats.statements.most_common(1)[0]
+        record.update(query_budget=budget, most_repeated_query=statement, most_repeated_count=repeats)
+        logger.warning(json.dumps(record))
+    else:
+        logger.info(json.dumps(record))
+
+
+def _count_stream(request, response, stats):
+    """Wrap a streaming body so its size and the queries run while streaming are recorded at the end"""
+    content = response.streaming_content
+
+    if response.is_async:
+        async def counted():
+            token = _current.set(stats)
+            try:
+                async for chunk in content:
+                    stats.bytes += len(chunk)
+                    yield chunk
+            finally:
+                _current.reset(token)
+                finish(request, response, stats)
+    else:
+        def counted():
+            token = _current.set(stats)
+            try:
+                for chunk in content:
+                    stats.bytes += len(chunk)
+                    yield chunk
+            finally:
+                _current.reset(token)
+                finish(request, response, stats)
+
+    response.streaming_content = counted()
+
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+        stats = RequestStats()
+        token = _current.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.record(request, response, stats)
+
+    async def __acall__(self, request):
+        if not settings.METRICS_ENABLED:
+            return await self.get_response(request)
+        stats = RequestStats()
+        token = _current.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.record(request, response, stats)
+
+    def record(self, request, response, stats):
+        if response.streaming:
+            _count_stream(request, response, stats)
+        else:
+            stats.bytes = len(response.content)
+            finish(request, response, stats)
+        return response
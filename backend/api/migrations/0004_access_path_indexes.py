@@ -0,0 +1,69 @@
+# Generated by Django 5.2.9 on 2026-10-17 13:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_seminar_semester'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['seminar', 'created_at'], name='attendance_seminar_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['created_at'], name='attendance_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['participant_email'], name='attendance_email_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='certificate',
+            index=models.Index(fields=['seminar', 'issued_at'], name='certificate_seminar_issued_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='certificate',
+            index=models.Index(fields=['issued_at'], name='certificate_issued_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='certificate',
+            index=models.Index(fields=['participant_email'], name='certificate_email_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='evaluation',
+            index=models.Index(fields=['seminar', 'created_at'], name='evaluation_seminar_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='evaluation',
+            index=models.Index(fields=['created_at'], name='evaluation_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='evaluation',
+            index=models.Index(fields=['participant_email'], name='evaluation_email_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='joinedparticipant',
+            index=models.Index(fields=['seminar', 'joined_at'], name='joined_seminar_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='joinedparticipant',
+            index=models.Index(fields=['joined_at'], name='joined_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='joinedparticipant',
+            index=models.Index(fields=['participant_email'], name='joined_email_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='seminar',
+            index=models.Index(fields=['date'], name='seminar_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='seminar',
+            index=models.Index(fields=['semester', 'date'], name='seminar_semester_date_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.9 on 2026-10-17 13:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('participant_email', models.EmailField(max_length=254)),
+                ('time_in', models.DateTimeField(blank=True, null=True)),
+                ('time_out', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('seminar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_events', to='api.seminar')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['seminar', 'id'], name='attendance_event_seminar_idx')],
+            },
+        ),
+    ]
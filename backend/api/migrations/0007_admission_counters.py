@@ -0,0 +1,51 @@
+# Generated by Django 5.2.9 on 2026-10-17 13:49
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Seminar = apps.get_model('api', 'Seminar')
+    JoinedParticipant = apps.get_model('api', 'JoinedParticipant')
+
+    def count(**filters):
+        rows = JoinedParticipant.objects.filter(seminar=OuterRef('pk'), **filters).order_by().values('seminar')
+        return Coalesce(Subquery(rows.annotate(n=Count('id')).values('n')), Value(0))
+
+    Seminar.objects.update(joined_count=count(), present_count=count(present=True))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_sync_tracking'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='joinedparticipant',
+            name='status',
+            field=models.CharField(choices=[('joined', 'Joined'), ('waitlisted', 'Waitlisted')], default='joined', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='seminar',
+            name='joined_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='seminar',
+            name='present_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='seminar',
+            name='waitlist_enabled',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='joinedparticipant',
+            index=models.Index(fields=['seminar', 'status', 'id'], name='joined_seminar_status_idx'),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
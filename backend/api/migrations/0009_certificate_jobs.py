@@ -0,0 +1,27 @@
+# Generated by Django 5.2.9 on 2026-10-17 14:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CertificateJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(default='queued', max_length=16)),
+                ('total', models.IntegerField(blank=True, null=True)),
+                ('done', models.IntegerField(default=0)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('seminar', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='certificate_job', to='api.seminar')),
+            ],
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.9 on 2026-10-17 14:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_certificate_jobs'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendanceevent',
+            index=models.Index(fields=['created_at'], name='attendance_event_created_idx'),
+        ),
+    ]
@@ -1,11 +1,42 @@
 from django.db import models
 
 # Create your models here.
-class Seminar(models.Model):
+class ChangeTrackingMixin:
+	"""Remembers ``tracked_fields`` as loaded or last saved, so post_save receivers can tell what a save changed"""
+	tracked_fields = ()
+
+	@classmethod
+	def from_db(cls, db, field_names, values):
+		instance = super().from_db(db, field_names, values)
+		instance._saved_values = {
+			name: value for name, value in zip(field_names, values)
+			if name in cls.tracked_fields and value is not models.DEFERRED
+		}
+		return instance
+
+	def save(self, *args, **kwargs):
+		super().save(*args, **kwargs)
+		self._saved_values = {name: getattr(self, name) for name in self.tracked_fields}
+
+	def changed_fields(self, update_fields=None):
+		"""Tracked fields written by the current save with a new value; all written ones for an instance not loaded from the database"""
+		written = [name for name in self.tracked_fields if update_fields is None or name in update_fields]
+		saved = getattr(self, '_saved_values', None)
+		if saved is None:
+			return set(written)
+		return {name for name in written if name not in saved or getattr(self, name) != saved[name]}
+
+
+class Seminar(ChangeTrackingMixin, models.Model):
 	title = models.CharField(max_length=255)
 	duration = models.IntegerField(null=True, blank=True)
 	speaker = models.CharField(max_length=255, null=True, blank=True)
 	capacity = models.IntegerField(null=True, blank=True)
+	# When full, new joins go to a waitlist (promoted in order as seats free up) instead of being refused
+	waitlist_enabled = models.BooleanField(default=False)
+	# Admission counters kept by api/admission.py so joins never count rows to check capacity
+	joined_count = models.PositiveIntegerField(default=0, editable=False)
+	present_count = models.PositiveIntegerField(default=0, editable=False)
 	date = models.DateField(null=True, blank=True)
 	start_time = models.CharField(max_length=32, null=True, blank=True)
 	end_time = models.CharField(max_length=32, null=True, blank=True)
@@ -18,11 +49,37 @@ class Seminar(models.Model):
 	created_at = models.DateTimeField(auto_now_add=True)
 	updated_at = models.DateTimeField(auto_now=True)
 
+	COUNTER_FIELDS = ('joined_count', 'present_count')
+	# Raising the capacity or enabling the waitlist can promote waitlisted participants
+	tracked_fields = ('capacity', 'waitlist_enabled')
+
 	def __str__(self):
 		return f"{self.title} ({self.date})"
 
+	def save(self, *args, **kwargs):
+		# An instance loaded before concurrent joins must not write back stale counters
+		if not self._state.adding and not kwargs.get('force_insert') and kwargs.get('update_fields') is None:
+			kwargs['update_fields'] = [
+				field.name for field in self._meta.concrete_fields
+				if not field.primary_key and field.name not in self.COUNTER_FIELDS
+			]
+		super().save(*args, **kwargs)
+
+	class Meta:
+		indexes = [
+			models.Index(fields=['date'], name='seminar_date_idx'),
+			models.Index(fields=['semester', 'date'], name='seminar_semester_date_idx'),
+			models.Index(fields=['updated_at', 'id'], name='seminar_updated_idx'),
+		]
+
+
+class JoinedParticipant(ChangeTrackingMixin, models.Model):
+	JOINED = 'joined'
+	WAITLISTED = 'waitlisted'
+	STATUS_CHOICES = [(JOINED, 'Joined'), (WAITLISTED, 'Waitlisted')]
+	# The fields the seminar's admission counters are derived from
+	tracked_fields = ('status', 'present')
 
-class JoinedParticipant(models.Model):
 	seminar = models.ForeignKey(Seminar, on_delete=models.CASCADE, related_name='joined_participants')
 	participant_email = models.EmailField()
 	participant_name = models.CharField(max_length=255, null=True, blank=True)
@@ -31,39 +88,87 @@ class JoinedParticipant(models.Model):
 	present = models.BooleanField(default=False)
 	check_in = models.DateTimeField(null=True, blank=True)
 	check_out = models.DateTimeField(null=True, blank=True)
+	status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=JOINED)
+	updated_at = models.DateTimeField(auto_now=True)
 
 	def __str__(self):
 		return f"{self.participant_email} - {self.seminar.title}"
 
 	class Meta:
 		unique_together = ('seminar', 'participant_email')
+		indexes = [
+			models.Index(fields=['seminar', 'joined_at'], name='joined_seminar_at_idx'),
+			models.Index(fields=['seminar', 'status', 'id'], name='joined_seminar_status_idx'),
+			models.Index(fields=['joined_at'], name='joined_at_idx'),
+			models.Index(fields=['participant_email'], name='joined_email_idx'),
+			models.Index(fields=['updated_at', 'id'], name='joined_updated_idx'),
+		]
 
 
-class Attendance(models.Model):
+class Attendance(ChangeTrackingMixin, models.Model):
 	seminar = models.ForeignKey(Seminar, on_delete=models.CASCADE, related_name='attendance')
 	participant_email = models.EmailField()
 	time_in = models.DateTimeField(null=True, blank=True)
 	time_out = models.DateTimeField(null=True, blank=True)
 	created_at = models.DateTimeField(auto_now_add=True)
+	updated_at = models.DateTimeField(auto_now=True)
+	# The AttendanceEvent for a save only carries the scan times it changed
+	tracked_fields = ('time_in', 'time_out')
 
 	def __str__(self):
 		return f"{self.participant_email} - {self.seminar.title}"
 
 	class Meta:
 		unique_together = ('seminar', 'participant_email')
+		indexes = [
+			models.Index(fields=['seminar', 'created_at'], name='attendance_seminar_created_idx'),
+			models.Index(fields=['created_at'], name='attendance_created_idx'),
+			models.Index(fields=['participant_email'], name='attendance_email_idx'),
+			models.Index(fields=['updated_at', 'id'], name='attendance_updated_idx'),
+		]
+
 
 
+class AttendanceEvent(models.Model):
+	"""Append-only log of check-in/check-out scans, read by the per-seminar SSE feed.
+
+	time_in/time_out carry the values written by the scan; null means the scan did not touch that field.
+	Events older than SSE_EVENT_RETENTION_SECONDS are removed by ``manage.py prune_attendance_events``.
+	"""
+	seminar = models.ForeignKey(Seminar, on_delete=models.CASCADE, related_name='attendance_events')
+	participant_email = models.EmailField()
+	time_in = models.DateTimeField(null=True, blank=True)
+	time_out = models.DateTimeField(null=True, blank=True)
+	created_at = models.DateTimeField(auto_now_add=True)
+
+	def __str__(self):
+		return f"{self.participant_email} - {self.seminar_id} (#{self.pk})"
+
+	class Meta:
+		indexes = [
+			models.Index(fields=['seminar', 'id'], name='attendance_event_seminar_idx'),
+			# Pruning and the streams' lag window select by age
+			models.Index(fields=['created_at'], name='attendance_event_created_idx'),
+		]
+
 class Evaluation(models.Model):
 	seminar = models.ForeignKey(Seminar, on_delete=models.CASCADE, related_name='evaluations')
 	participant_email = models.EmailField()
 	answers = models.JSONField(null=True, blank=True)
 	created_at = models.DateTimeField(auto_now_add=True)
+	updated_at = models.DateTimeField(auto_now=True)
 
 	def __str__(self):
 		return f"Evaluation - {self.participant_email} ({self.seminar.title})"
 
 	class Meta:
 		unique_together = ('seminar', 'participant_email')
+		indexes = [
+			models.Index(fields=['seminar', 'created_at'], name='evaluation_seminar_created_idx'),
+			models.Index(fields=['created_at'], name='evaluation_created_idx'),
+			models.Index(fields=['participant_email'], name='evaluation_email_idx'),
+			models.Index(fields=['updated_at', 'id'], name='evaluation_updated_idx'),
+		]
 
 
 class Certificate(models.Model):
@@ -73,9 +178,51 @@ class Certificate(models.Model):
 	file_url = models.URLField(max_length=1024, null=True, blank=True)
 	issued_at = models.DateTimeField(auto_now_add=True)
 	certificate_number = models.CharField(max_length=255, unique=True)
+	updated_at = models.DateTimeField(auto_now=True)
 
 	def __str__(self):
 		return f"Certificate - {self.participant_email} ({self.seminar.title})"
 
 	class Meta:
 		unique_together = ('seminar', 'participant_email')
+		indexes = [
+			models.Index(fields=['seminar', 'issued_at'], name='certificate_seminar_issued_idx'),
+			models.Index(fields=['issued_at'], name='certificate_issued_idx'),
+			models.Index(fields=['participant_email'], name='certificate_email_idx'),
+			models.Index(fields=['updated_at', 'id'], name='certificate_updated_idx'),
+		]
+
+
+class CertificateJob(models.Model):
+	"""Progress of a seminar's certificate generation, shared by every web and worker process"""
+	QUEUED = 'queued'
+	RUNNING = 'running'
+	FINISHED = 'finished'
+	FAILED = 'failed'
+	ACTIVE = (QUEUED, RUNNING)
+
+	seminar = models.OneToOneField(Seminar, on_delete=models.CASCADE, related_name='certificate_job')
+	status = models.CharField(max_length=16, default=QUEUED)
+	total = models.IntegerField(null=True, blank=True)
+	done = models.IntegerField(default=0)
+	started_at = models.DateTimeField(null=True, blank=True)
+	finished_at = models.DateTimeField(null=True, blank=True)
+	updated_at = models.DateTimeField(auto_now=True)
+
+	def __str__(self):
+		return f"Certificates - {self.seminar_id} ({self.status})"
+
+
+class Tombstone(models.Model):
+	"""Record of a deleted row, so /api/sync/ clients can drop it from their local copy"""
+	collection = models.CharField(max_length=32)
+	object_id = models.BigIntegerField()
+	deleted_at = models.DateTimeField(auto_now_add=True)
+
+	def __str__(self):
+		return f"{self.collection} #{self.object_id} deleted"
+
+	class Meta:
+		indexes = [
+			models.Index(fields=['deleted_at', 'id'], name='tombstone_deleted_idx'),
+		]
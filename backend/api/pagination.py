@@ -0,0 +1,199 @@
+import base64
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.response import Response
+
+
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+FALSE_VALUES = ('0', 'false', 'no', 'off')
+
+
+class InvalidListParams(ValueError):
+    """Raised when list query parameters (cursor, limit, filters) are malformed"""
+
+
+def parse_bool(value):
+    value = str(value).strip().lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise InvalidListParams(f"Invalid boolean value: {value!r}")
+
+
+def encode_cursor(timestamp, pk):
+    raw = f"{timestamp.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        timestamp, pk = base64.urlsafe_b64decode(padded.encode()).decode().split('|', 1)
+        parsed = parse_datetime(timestamp)
+        if parsed is None:
+            raise ValueError(timestamp)
+        return parsed, int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidListParams('Invalid cursor')
+
+
+def _parse_day(value):
+    try:
+        return parse_date(value)
+    except ValueError:
+        raise InvalidListParams(f"Invalid date: {value!r}")
+
+
+def _parse_moment(value):
+    try:
+        parsed = parse_datetime(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise InvalidListParams(f"Invalid date: {value!r}")
+    return parsed
+
+
+def _parse_bound(value, end=False):
+    """Parse a date or datetime query value. A bare date used as an upper bound covers the whole day."""
+    day = _parse_day(value)
+    if day is not None:
+        if end:
+            day += timedelta(days=1)
+        parsed = datetime.combine(day, time.min)
+    else:
+        parsed = _parse_moment(value)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def attendance_present_q(flag):
+    """An attendance row counts as present once it has a time_in"""
+    return Q(time_in__isnull=not flag)
+
+
+def joined_present_q(flag):
+    return Q(present=flag)
+
+
+def filter_queryset(params, qs, timestamp_field, present_q=None):
+    """Apply the shared server-side list filters.
+
+    Supported query params: ``email``, ``from``/``to`` (on ``timestamp_field``),
+    ``semester`` (of the related seminar) and ``present`` when ``present_q`` is given.
+    """
+    email = params.get('email')
+    if email:
+        qs = qs.filter(participant_email=email)
+
+    date_from = params.get('from')
+    if date_from:
+        qs = qs.filter(**{f'{timestamp_field}__gte': _parse_bound(date_from)})
+    date_to = params.get('to')
+    if date_to:
+        lookup = 'lt' if _parse_day(date_to) is not None else 'lte'
+        qs = qs.filter(**{f'{timestamp_field}__{lookup}': _parse_bound(date_to, end=True)})
+
+    semester = params.get('semester')
+    if semester:
+        qs = qs.filter(seminar__semester=semester)
+
+    present = params.get('present')
+    if present not in (None, ''):
+        if present_q is None:
+            raise InvalidListParams('The present filter is not supported for this resource')
+        qs = qs.filter(present_q(parse_bool(present)))
+
+    return qs
+
+
+def get_page_size(params):
+    limit = params.get('limit')
+    if limit in (None, ''):
+        return settings.API_PAGE_SIZE
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise InvalidListParams('limit must be an integer')
+    if limit < 1:
+        raise InvalidListParams('limit must be positive')
+    return min(limit, settings.API_MAX_PAGE_SIZE)
+
+
+def wants_pagination(params, scoped):
+    """Unscoped lists are paginated unless ``all=true``; per-seminar lists only when asked to."""
+    if 'all' in params:
+        return not parse_bool(params['all'])
+    if scoped:
+        return 'cursor' in params or 'limit' in params
+    return True
+
+
+def keyset_page(params, qs, timestamp_field):
+    """Return one page of ``qs`` ordered by (timestamp_field, id) and the cursor for the next page.
+
+    Seeks past the cursor with a range condition instead of OFFSET so every page
+    costs the same regardless of its position in the table.
+    """
+    qs = qs.order_by(timestamp_field, 'id')
+    cursor = params.get('cursor')
+    if cursor:
+        timestamp, pk = decode_cursor(cursor)
+        qs = qs.filter(
+            Q(**{f'{timestamp_field}__gt': timestamp})
+            | Q(**{timestamp_field: timestamp, 'id__gt': pk})
+        )
+    page_size = get_page_size(params)
+    rows = list(qs[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        if isinstance(last, dict):
+            next_cursor = encode_cursor(last[timestamp_field], last['id'])
+        else:
+            next_cursor = encode_cursor(getattr(last, timestamp_field), last.pk)
+    return rows, next_cursor
+
+
+def _name_list(params, name):
+    return [part.strip() for part in params.get(name, '').split(',') if part.strip()]
+
+
+def read_serializer(params, serializer_class):
+    """Build a ReadSerializer for the sparse fieldset in ``?fields=`` plus deferred fields in ``?include=``"""
+    available = serializer_class.field_names()
+    fields, include = _name_list(params, 'fields'), _name_list(params, 'include')
+    unknown = [name for name in fields if name not in available]
+    if unknown:
+        raise InvalidListParams(f"Unknown fields: {', '.join(unknown)}")
+    unknown = [name for name in include if name not in serializer_class.deferred_fields]
+    if unknown:
+        raise InvalidListParams(f"Cannot include: {', '.join(unknown)}")
+    if fields:
+        fields += [name for name in include if name not in fields]
+    return serializer_class(fields=fields, include=include)
+
+
+def list_response(request, qs, timestamp_field, serializer_class, scoped=False, present_q=None):
+    """Filter, optionally paginate and serialize a list endpoint.
+
+    ``serializer_class`` is a ReadSerializer: rows are fetched with ``values()``
+    restricted to the requested fields (plus the keyset columns).
+    Raises ``InvalidListParams`` for malformed parameters; callers turn it into a 400.
+    """
+    params = request.query_params
+    serializer = read_serializer(params, serializer_class)
+    qs = filter_queryset(params, qs, timestamp_field, present_q=present_q)
+    qs = qs.values(*dict.fromkeys([*serializer.fields, timestamp_field, 'id']))
+    if not wants_pagination(params, scoped):
+        return Response(serializer.serialize(qs.order_by(timestamp_field, 'id')))
+
+    rows, next_cursor = keyset_page(params, qs, timestamp_field)
+    return Response({'results': serializer.serialize(rows), 'next_cursor': next_cursor})
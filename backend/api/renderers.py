@@ -0,0 +1,53 @@
+"""JSON rendering with orjson when it is installed (requirements-speedups.txt).
+
+orjson writes the same compact UTF-8 JSON as DRF's JSONRenderer with this project's
+settings (COMPACT_JSON, UNICODE_JSON), several times faster. Values it does not
+encode natively (datetimes, Decimal, lazy strings, ...) are handed to DRF's encoder,
+so their representation is unchanged. Without orjson, or for the browsable API's
+indented output, rendering falls back to DRF's JSONRenderer.
+"""
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+if orjson is not None:
+    # Integer dict keys become strings like in the json module; datetimes go to DRF's
+    # encoder, which writes UTC as 'Z' and keeps the ISO format of date and time values
+    OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+_default = JSONEncoder().default
+
+
+def dumps(data):
+    """``data`` as compact UTF-8 JSON bytes, identical to ``JSONRenderer().render(data)``"""
+    if orjson is None:
+        return JSONRenderer().render(data)
+    try:
+        ret = orjson.dumps(data, default=_default, option=OPTIONS)
+    except orjson.JSONEncodeError:
+        # e.g. integers beyond 64 bits; the json module handles them (or raises the usual error)
+        return JSONRenderer().render(data)
+    # Like JSONRenderer: U+2028/U+2029 are valid JSON but end a line in older JavaScript
+    if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+        ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return ret
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        if (
+            orjson is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context)
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
@@ -0,0 +1,175 @@
+"""Bulk pre-registration of participants from CSV or XLSX rosters.
+
+Rows are read lazily and written ROSTER_IMPORT_CHUNK_SIZE at a time: each chunk is
+admitted with ``admit_many`` (one seminar lock, one ``participant_email__in`` query
+for the participants already joined) and inserted with one ``bulk_create``, in its
+own transaction so a large file does not hold the write lock for the whole import.
+Rows beyond the seminar's capacity are waitlisted or, without a waitlist, refused.
+XLSX needs openpyxl (requirements-xlsx.txt).
+"""
+import codecs
+import csv
+from itertools import islice
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from .admission import admit_many
+from .models import JoinedParticipant
+from .stats import invalidate_seminar_stats
+
+
+# Accepted header spellings (compared lower-cased, spaces and dashes as underscores),
+# including the column names of a Google Forms response sheet
+COLUMNS = {
+    'participant_email': ('participant_email', 'email', 'email_address', 'e_mail'),
+    'participant_name': ('participant_name', 'name', 'full_name'),
+    'year_section': ('year_section', 'year_&_section', 'year_and_section', 'section'),
+}
+
+# Invalid rows reported back individually; the rest are only counted
+MAX_REPORTED_ERRORS = 50
+
+
+class RosterError(ValueError):
+    """Raised when a roster file cannot be read (format, header, missing openpyxl).
+
+    When it stops being readable partway, ``result`` holds the counts of the
+    chunks already imported; otherwise it is None and nothing was written.
+    """
+
+    def __init__(self, message, result=None):
+        super().__init__(message)
+        self.result = result
+
+
+def _normalize(header):
+    return str(header or '').strip().lower().replace(' ', '_').replace('-', '_')
+
+
+def _column_map(header):
+    """Map our field names to column positions of ``header``"""
+    positions = {_normalize(name): i for i, name in enumerate(header)}
+    columns = {}
+    for field, aliases in COLUMNS.items():
+        for alias in aliases:
+            if alias in positions:
+                columns[field] = positions[alias]
+                break
+    if 'participant_email' not in columns:
+        raise RosterError('The roster needs an email column')
+    return columns
+
+
+def _records(rows):
+    """(row number, {field: value}) for each data row; row numbers count the header as row 1"""
+    rows = iter(rows)
+    header = next(rows, None)
+    if header is None:
+        raise RosterError('The roster is empty')
+    columns = _column_map(header)
+    for number, row in enumerate(rows, start=2):
+        if not any(cell not in (None, '') for cell in row):
+            continue
+        yield number, {
+            field: str(row[i]).strip() if i < len(row) and row[i] is not None else ''
+            for field, i in columns.items()
+        }
+
+
+def _csv_rows(file):
+    # utf-8-sig drops the byte order mark Excel puts in front of exported CSV files
+    return csv.reader(codecs.iterdecode(file, 'utf-8-sig'))
+
+
+def _xlsx_rows(file):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise RosterError('XLSX rosters need openpyxl; install requirements-xlsx.txt or upload a CSV')
+    try:
+        workbook = load_workbook(file, read_only=True, data_only=True)
+    except Exception as e:
+        raise RosterError(f'Cannot read XLSX file: {e}')
+    return workbook.active.iter_rows(values_only=True)
+
+
+def read_roster(file, filename):
+    """Lazily parsed (row number, record) pairs from a binary file object; the format follows the extension"""
+    if str(filename).lower().endswith('.xlsx'):
+        return _records(_xlsx_rows(file))
+    return _records(_csv_rows(file))
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def import_roster(seminar_id, records, chunk_size=None):
+    """Join every valid, not yet registered participant in ``records`` to the seminar.
+
+    Returns ``{'inserted', 'waitlisted', 'full', 'skipped', 'invalid', 'errors'}``:
+    inserted counts every new row and waitlisted the ones among them put on the
+    waitlist; full rows were refused by a full seminar without a waitlist; skipped
+    rows were already joined or repeat an earlier row of the file; ``errors`` lists
+    the first MAX_REPORTED_ERRORS invalid rows. A file that turns unreadable partway
+    raises RosterError carrying the counts of the chunks imported before it.
+    """
+    chunk_size = chunk_size or settings.ROSTER_IMPORT_CHUNK_SIZE
+    result = {'inserted': 0, 'waitlisted': 0, 'full': 0, 'skipped': 0, 'invalid': 0, 'errors': []}
+    seen = set()
+    last_row = None
+    try:
+        for chunk in _chunks(records, chunk_size):
+            candidates = {}
+            for number, record in chunk:
+                email = record['participant_email']
+                try:
+                    validate_email(email)
+                except ValidationError:
+                    result['invalid'] += 1
+                    if len(result['errors']) < MAX_REPORTED_ERRORS:
+                        result['errors'].append({'row': number, 'error': f'Invalid email: {email!r}'})
+                    continue
+                if email in seen:
+                    result['skipped'] += 1
+                    continue
+                seen.add(email)
+                candidates[email] = record
+
+            with transaction.atomic():
+                admitted = admit_many((seminar_id, email) for email in candidates)
+                new = []
+                for email, record in candidates.items():
+                    status, created = admitted.get((seminar_id, email), (None, False))
+                    if not created:
+                        result['skipped'] += 1
+                    elif status is None:
+                        result['full'] += 1
+                    else:
+                        new.append(JoinedParticipant(
+                            seminar_id=seminar_id,
+                            participant_email=email,
+                            participant_name=record.get('participant_name') or None,
+                            metadata={'year_section': record['year_section']} if record.get('year_section') else None,
+                            status=status,
+                        ))
+                # admit_many holds the seminar lock and only marks participants it did not
+                # find as created, so no other join can insert one of these rows meanwhile
+                JoinedParticipant.objects.bulk_create(new)
+            result['inserted'] += len(new)
+            result['waitlisted'] += sum(row.status == JoinedParticipant.WAITLISTED for row in new)
+            last_row = chunk[-1][0]
+    except (csv.Error, UnicodeDecodeError) as e:
+        if last_row is None:
+            raise RosterError(f'Cannot read CSV file: {e}')
+        # Earlier chunks are committed: report them with the error instead of as a failed import
+        raise RosterError(f'Cannot read CSV file after row {last_row}: {e}; the rows up to it were imported', result)
+    finally:
+        if result['inserted']:
+            invalidate_seminar_stats(seminar_id)
+    return result
@@ -0,0 +1,97 @@
+"""Full-text search over seminars and joined participants.
+
+On SQLite, migration 0008 keeps an FTS5 table with the trigram tokenizer next to
+each indexed table, maintained by triggers so bulk inserts and upserts are indexed
+too. Trigrams answer substring queries (``smith@ex``, ``dela cruz``) from the index
+instead of a ``LIKE '%...%'`` scan over the whole table. Every term of a query must
+occur in one of the indexed columns. Terms shorter than three characters have no
+trigram, so such queries (and databases without the FTS tables, e.g. PostgreSQL)
+fall back to ``icontains`` on the same columns.
+"""
+from functools import lru_cache
+
+from django.db import connections, router
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import JoinedParticipant, Seminar
+from .serializers import JoinedParticipantReadSerializer, SeminarReadSerializer
+
+
+# result key -> (model, indexed fields, read serializer)
+INDEXES = {
+    'seminars': (Seminar, ('title', 'speaker'), SeminarReadSerializer()),
+    'participants': (JoinedParticipant, ('participant_email', 'participant_name'), JoinedParticipantReadSerializer()),
+}
+
+MIN_TERM_LENGTH = 3
+
+
+def fts_table(model):
+    return f'{model._meta.db_table}_fts'
+
+
+@lru_cache(maxsize=None)
+def _fts_tables(alias, name):
+    connection = connections[alias]
+    if connection.vendor != 'sqlite':
+        return frozenset()
+    return frozenset(table for table in connection.introspection.table_names() if table.endswith('_fts'))
+
+
+def has_index(model, using):
+    return fts_table(model) in _fts_tables(using, str(connections[using].settings_dict['NAME']))
+
+
+def match_expression(query):
+    """FTS5 query requiring every term as a substring; None when a term is too short for trigrams"""
+    terms = str(query or '').split()
+    if not terms or any(len(term) < MIN_TERM_LENGTH for term in terms):
+        return None
+    # Quoted strings are matched literally, so '@', '.' and FTS5 operators in the input are safe
+    return ' '.join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def matching_pks(model, query, using):
+    """Subquery of the primary keys matching ``query``; None when the index cannot answer it"""
+    expression = match_expression(query)
+    if expression is None or not has_index(model, using):
+        return None
+    table = fts_table(model)
+    return RawSQL(f'SELECT rowid FROM {table} WHERE {table} MATCH %s', (expression,))
+
+
+def fallback_q(fields, query):
+    q = Q()
+    for term in str(query or '').split():
+        term_q = Q()
+        for field in fields:
+            term_q |= Q(**{f'{field}__icontains': term})
+        q &= term_q
+    return q
+
+
+def _search(model, fields, serializer, query, limit):
+    using = router.db_for_read(model)
+    columns = dict.fromkeys([*serializer.fields, 'id'])
+    expression = match_expression(query)
+    if expression is None or not has_index(model, using):
+        return serializer.serialize(
+            model.objects.using(using).filter(fallback_q(fields, query)).order_by('-id').values(*columns)[:limit]
+        )
+    table = fts_table(model)
+    # Newest first: a rowid order stops at LIMIT, while ORDER BY rank (bm25) scores every match
+    # first, which takes ~100 ms for a term shared by tens of thousands of participants
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'SELECT rowid FROM {table} WHERE {table} MATCH %s ORDER BY rowid DESC LIMIT %s', [expression, limit])
+        pks = [row[0] for row in cursor.fetchall()]
+    rows = {row['id']: row for row in model.objects.using(using).filter(pk__in=pks).values(*columns)}
+    return serializer.serialize([rows[pk] for pk in pks if pk in rows])
+
+
+def search(query, limit):
+    """Seminars and joined participants matching ``query``, newest first, at most ``limit`` of each"""
+    return {
+        name: _search(model, fields, serializer, query, limit)
+        for name, (model, fields, serializer) in INDEXES.items()
+    }
@@ -1,10 +1,14 @@
+from django.db import models
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Seminar, Attendance, JoinedParticipant, Certificate, Evaluation
+from .models import Seminar, Attendance, AttendanceEvent, JoinedParticipant, Certificate, Evaluation
 
 class SeminarSerializer(serializers.ModelSerializer):
     class Meta:
         model = Seminar
-        fields = '__all__'
+        # Admission counters change on every join without a save(); they are served live
+        # by /api/seminars/<id>/admission/ instead of going stale in the cached catalog
+        exclude = Seminar.COUNTER_FIELDS
 
 
 class AttendanceSerializer(serializers.ModelSerializer):
@@ -17,6 +21,8 @@ class JoinedParticipantSerializer(serializers.ModelSerializer):
     class Meta:
         model = JoinedParticipant
         fields = '__all__'
+        # Decided by admission (api/admission.py), never by the client
+        read_only_fields = ('status',)
 
 
 class CertificateSerializer(serializers.ModelSerializer):
@@ -29,3 +35,159 @@ class EvaluationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Evaluation
         fields = '__all__'
+
+
+class AttendanceBulkItemSerializer(serializers.Serializer):
+    """One scan in a bulk check-in/check-out batch"""
+    seminar = serializers.IntegerField()
+    participant_email = serializers.EmailField()
+    time_in = serializers.DateTimeField(required=False)
+    time_out = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        if 'time_in' not in attrs and 'time_out' not in attrs:
+            raise serializers.ValidationError('Either time_in or time_out is required')
+        return attrs
+
+
+class JoinedParticipantSyncItemSerializer(serializers.Serializer):
+    """One offline join/check-in pushed through POST /api/sync/; omitted fields keep their stored value"""
+    seminar = serializers.IntegerField()
+    participant_email = serializers.EmailField()
+    participant_name = serializers.CharField(max_length=255, required=False, allow_null=True, allow_blank=True)
+    metadata = serializers.JSONField(required=False, allow_null=True)
+    present = serializers.BooleanField(required=False)
+    check_in = serializers.DateTimeField(required=False, allow_null=True)
+    check_out = serializers.DateTimeField(required=False, allow_null=True)
+
+
+class EvaluationSyncItemSerializer(serializers.Serializer):
+    """One offline evaluation pushed through POST /api/sync/"""
+    seminar = serializers.IntegerField()
+    participant_email = serializers.EmailField()
+    answers = serializers.JSONField(allow_null=True)
+
+
+class HistorySeminarSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    title = serializers.CharField()
+    date = serializers.DateField()
+    speaker = serializers.CharField()
+    semester = serializers.CharField()
+    start_datetime = serializers.DateTimeField()
+    end_datetime = serializers.DateTimeField()
+
+
+class HistoryJoinedSerializer(serializers.Serializer):
+    participant_name = serializers.CharField()
+    joined_at = serializers.DateTimeField()
+    present = serializers.BooleanField()
+    check_in = serializers.DateTimeField()
+    check_out = serializers.DateTimeField()
+
+
+class HistoryAttendanceSerializer(serializers.Serializer):
+    time_in = serializers.DateTimeField()
+    time_out = serializers.DateTimeField()
+
+
+class HistoryEvaluationSerializer(serializers.Serializer):
+    submitted_at = serializers.DateTimeField(source='created_at')
+
+
+class HistoryCertificateSerializer(serializers.Serializer):
+    certificate_number = serializers.CharField()
+    file_url = serializers.CharField()
+    issued_at = serializers.DateTimeField()
+
+
+class ParticipantHistorySerializer(serializers.Serializer):
+    """One seminar in a participant's history; sections are null when the participant has no row there"""
+    seminar = HistorySeminarSerializer()
+    joined = HistoryJoinedSerializer(allow_null=True)
+    attendance = HistoryAttendanceSerializer(allow_null=True)
+    evaluation = HistoryEvaluationSerializer(allow_null=True)
+    certificate = HistoryCertificateSerializer(allow_null=True)
+
+class ReadSerializer:
+    """Lean read-only list serializer over ``QuerySet.values()`` rows.
+
+    Produces the same JSON as the ModelSerializer of the same model without
+    building model instances or running DRF field machinery per row.
+    ``deferred_fields`` are left out unless requested by ``fields`` or ``include``.
+    """
+    model = None
+    deferred_fields = ()
+
+    def __init__(self, fields=None, include=()):
+        self.fields = list(fields) if fields else [
+            name for name in self.field_names() if name not in self.deferred_fields or name in include
+        ]
+
+    @classmethod
+    def field_names(cls):
+        # ModelSerializer order: primary key, plain fields, then foreign keys
+        fields = cls.model._meta.concrete_fields
+        return (
+            [cls.model._meta.pk.name]
+            + [field.name for field in fields if not field.primary_key and not field.is_relation]
+            + [field.name for field in fields if field.is_relation]
+        )
+
+    def converters(self):
+        tz = timezone.get_current_timezone()
+
+        def datetime_value(value):
+            # Same output as DRF's DateTimeField: current time zone, ISO 8601, 'Z' for UTC
+            value = value.astimezone(tz).isoformat()
+            return value[:-6] + 'Z' if value.endswith('+00:00') else value
+
+        result = []
+        for name in self.fields:
+            field = self.model._meta.get_field(name)
+            if isinstance(field, models.DateTimeField):
+                result.append((name, datetime_value))
+            elif isinstance(field, models.DateField):
+                result.append((name, lambda value: value.isoformat()))
+            else:
+                result.append((name, None))
+        return result
+
+    def serialize(self, rows):
+        """Render ``values()`` rows (which may carry extra keys) as a list of dicts"""
+        converters = self.converters()
+        return [
+            {name: convert(row[name]) if convert and row[name] is not None else row[name] for name, convert in converters}
+            for row in rows
+        ]
+
+
+class SeminarReadSerializer(ReadSerializer):
+    model = Seminar
+    # The evaluation form and free-form metadata dwarf the fields a seminar list shows
+    deferred_fields = ('questions', 'metadata')
+
+    @classmethod
+    def field_names(cls):
+        excluded = SeminarSerializer.Meta.exclude
+        return [name for name in super().field_names() if name not in excluded]
+
+
+class AttendanceReadSerializer(ReadSerializer):
+    model = Attendance
+
+
+class JoinedParticipantReadSerializer(ReadSerializer):
+    model = JoinedParticipant
+
+
+class CertificateReadSerializer(ReadSerializer):
+    model = Certificate
+
+
+class EvaluationReadSerializer(ReadSerializer):
+    model = Evaluation
+
+
+class AttendanceEventReadSerializer(ReadSerializer):
+    model = AttendanceEvent
@@ -0,0 +1,96 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import admission
+from .caching import bump_version
+from .models import Seminar, Attendance, AttendanceEvent, JoinedParticipant, Evaluation, Certificate, Tombstone
+from .stats import invalidate_seminar_stats
+from .sync import COLLECTIONS, collection_of
+
+
+def deleted_with_seminar(origin):
+    """True when a child row is going away as part of a seminar delete (instance or queryset)"""
+    return isinstance(origin, Seminar) or getattr(origin, 'model', None) is Seminar
+
+
+@receiver([post_save, post_delete], sender=Seminar)
+def invalidate_seminar_catalog(sender, instance, **kwargs):
+    # After commit: a catalog read in between would otherwise cache the old rows under the new version
+    transaction.on_commit(lambda: bump_version('seminars'))
+    invalidate_seminar_stats(instance.pk)
+
+
+# bulk_create/bulk_update do not send these signals; the bulk write paths in
+# views.py invalidate the affected seminars' stats themselves.
+@receiver([post_save, post_delete], sender=Attendance)
+@receiver([post_save, post_delete], sender=JoinedParticipant)
+@receiver([post_save, post_delete], sender=Evaluation)
+def invalidate_stats_on_participation_change(sender, instance, origin=None, **kwargs):
+    # The seminar's own receiver already dropped them when the whole seminar goes
+    if not deleted_with_seminar(origin):
+        invalidate_seminar_stats(instance.seminar_id)
+
+
+# Feeds the SSE attendance stream for single-row writes (attendance POST, async
+# check-ins, admin edits); the bulk paths in checkins.py append their own events.
+# Like theirs, the event only carries the scan times this save wrote.
+@receiver(post_save, sender=Attendance)
+def record_attendance_event(sender, instance, update_fields=None, **kwargs):
+    written = {
+        field: getattr(instance, field) for field in instance.changed_fields(update_fields)
+        if getattr(instance, field) is not None
+    }
+    if written:
+        AttendanceEvent.objects.create(
+            seminar_id=instance.seminar_id,
+            participant_email=instance.participant_email,
+            **written,
+        )
+
+
+# Lets /api/sync/ clients drop deleted rows. A deleted seminar tombstones itself and
+# all its synced child rows up front, one id query per collection and one insert;
+# the per-row receiver below then skips the cascaded children.
+@receiver(pre_delete, sender=Seminar)
+def record_seminar_tombstones(sender, instance, **kwargs):
+    tombstones = [Tombstone(collection=collection_of(Seminar), object_id=instance.pk)]
+    for name, (model, _) in COLLECTIONS.items():
+        if model is not Seminar:
+            ids = model.objects.filter(seminar_id=instance.pk).values_list('id', flat=True)
+            tombstones.extend(Tombstone(collection=name, object_id=id) for id in ids)
+    Tombstone.objects.bulk_create(tombstones)
+
+
+@receiver(post_delete, sender=Attendance)
+@receiver(post_delete, sender=JoinedParticipant)
+@receiver(post_delete, sender=Evaluation)
+@receiver(post_delete, sender=Certificate)
+def record_tombstone(sender, instance, origin=None, **kwargs):
+    if not deleted_with_seminar(origin):
+        Tombstone.objects.create(collection=collection_of(sender), object_id=instance.pk)
+
+
+@receiver(post_save, sender=Seminar)
+def promote_waitlist(sender, instance, created, update_fields=None, **kwargs):
+    # A raised capacity (or a newly enabled unlimited one) frees seats for the waitlist
+    if not created and instance.changed_fields(update_fields):
+        admission.promote(instance.pk)
+
+
+@receiver(post_save, sender=JoinedParticipant)
+def recount_admission(sender, instance, update_fields=None, **kwargs):
+    # admission.admit moves the counters itself; other saves that change status or
+    # presence (admin edits, check-in views) are recounted
+    if not getattr(instance, '_admission_counted', False) and instance.changed_fields(update_fields):
+        admission.recount([instance.seminar_id])
+        admission.promote(instance.seminar_id)
+
+
+@receiver(post_delete, sender=JoinedParticipant)
+def release_seat(sender, instance, origin=None, **kwargs):
+    # Nothing to give back when the whole seminar is being deleted
+    if deleted_with_seminar(origin):
+        return
+    admission.release(instance)
+    admission.promote(instance.seminar_id)
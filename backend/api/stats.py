@@ -0,0 +1,119 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, FloatField, Q, TextField
+from django.db.models.fields.json import KeyTextTransform
+from django.db.models.functions import Cast
+
+from .caching import bump_version, versioned_key
+from .models import Attendance, Evaluation, JoinedParticipant, Seminar
+
+
+DWELL_PERCENTILES = (50, 90, 95, 99)
+
+# Question types whose answers form a finite set worth counting per value
+DISTRIBUTION_TYPES = ('rating', 'select')
+
+
+def stats_namespace(seminar_id):
+    return f'stats:{seminar_id}'
+
+
+def invalidate_seminar_stats(seminar_id):
+    bump_version(stats_namespace(seminar_id))
+
+
+def percentile(sorted_values, pct):
+    """Linear-interpolated percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = (len(sorted_values) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def attendance_stats(seminar):
+    joined = JoinedParticipant.objects.filter(seminar=seminar).aggregate(
+        joined=Count('id', filter=Q(status=JoinedParticipant.JOINED)),
+        present=Count('id', filter=Q(status=JoinedParticipant.JOINED, present=True)),
+        waitlisted=Count('id', filter=Q(status=JoinedParticipant.WAITLISTED)),
+    )
+    attendance = Attendance.objects.filter(seminar=seminar).aggregate(
+        checked_in=Count('id', filter=Q(time_in__isnull=False)),
+        checked_out=Count('id', filter=Q(time_out__isnull=False)),
+    )
+    capacity = seminar.capacity
+    return {
+        'capacity': capacity,
+        'joined': joined['joined'],
+        'present': joined['present'],
+        'waitlisted': joined['waitlisted'],
+        'checked_in': attendance['checked_in'],
+        'checked_out': attendance['checked_out'],
+        'attendance_rate': round(attendance['checked_in'] / joined['joined'], 4) if joined['joined'] else None,
+        'fill_rate': round(joined['joined'] / capacity, 4) if capacity else None,
+    }
+
+
+def dwell_stats(seminar):
+    """Percentiles of time_out - time_in, in seconds, over participants who checked in and out"""
+    durations = sorted(
+        duration.total_seconds()
+        for duration in Attendance.objects.filter(
+            seminar=seminar, time_in__isnull=False, time_out__gt=F('time_in'),
+        ).annotate(
+            dwell=ExpressionWrapper(F('time_out') - F('time_in'), output_field=DurationField()),
+        ).values_list('dwell', flat=True)
+    )
+    result = {'count': len(durations), 'mean_seconds': round(sum(durations) / len(durations), 1) if durations else None}
+    for pct in DWELL_PERCENTILES:
+        value = percentile(durations, pct)
+        result[f'p{pct}_seconds'] = round(value, 1) if value is not None else None
+    return result
+
+
+def evaluation_stats(seminar):
+    evaluations = Evaluation.objects.filter(seminar=seminar)
+    questions = []
+    for question in seminar.questions or []:
+        if not isinstance(question, dict) or question.get('id') is None:
+            continue
+        qid = str(question['id'])
+        # Cast to plain text so the empty-answer comparison is not treated as a JSON lookup
+        answer = Cast(KeyTextTransform(qid, 'answers'), TextField())
+        answered = evaluations.annotate(answer=answer).exclude(answer__isnull=True).exclude(answer='')
+        entry = {'id': qid, 'question': question.get('question'), 'type': question.get('type')}
+        if question.get('type') in DISTRIBUTION_TYPES:
+            entry['distribution'] = {
+                row['answer']: row['n']
+                for row in answered.values('answer').annotate(n=Count('id')).order_by('answer')
+            }
+            entry['answered'] = sum(entry['distribution'].values())
+        else:
+            entry['answered'] = answered.count()
+        if question.get('type') == 'rating':
+            mean = answered.aggregate(mean=Avg(Cast(answer, FloatField())))['mean']
+            entry['mean'] = round(mean, 3) if mean is not None else None
+        questions.append(entry)
+    return {'count': evaluations.count(), 'questions': questions}
+
+
+def seminar_stats(seminar_id):
+    """Aggregated attendance, dwell-time and evaluation statistics for one seminar, cached until new data arrives.
+
+    Returns None when the seminar does not exist.
+    """
+    key = versioned_key(stats_namespace(seminar_id), 'summary')
+    stats = cache.get(key)
+    if stats is None:
+        seminar = Seminar.objects.filter(pk=seminar_id).first()
+        if seminar is None:
+            return None
+        stats = {
+            'seminar_id': seminar.pk,
+            'attendance': attendance_stats(seminar),
+            'dwell_time': dwell_stats(seminar),
+            'evaluations': evaluation_stats(seminar),
+        }
+        cache.set(key, stats, timeout=settings.SEMINAR_STATS_CACHE_TIMEOUT)
+    return stats
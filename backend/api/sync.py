@@ -0,0 +1,264 @@
+"""Incremental sync for the offline-first frontend.
+
+``GET /api/sync/?since=<cursor>`` returns the rows of each collection created or
+updated after the cursor, ordered by (updated_at, id), plus the ids deleted since
+then (from Tombstone, written by the delete receivers in signals.py). The cursor is opaque to
+clients: URL-safe base64 JSON with one (timestamp, id) position per collection.
+
+A transaction that started earlier can commit an updated_at older than rows already
+handed out, so once a collection is caught up its position is held back to
+``now - SYNC_CURSOR_LAG_SECONDS``; rows in that window are sent again on the next
+call and clients apply them by id, which is idempotent.
+
+``POST /api/sync/`` applies a batch of offline writes (attendance scans, joins and
+evaluations) as upserts on (seminar, participant_email), the last write winning.
+New participants go through admission (api/admission.py): they may be waitlisted,
+which drops their presence fields, or refused when the seminar is full.
+"""
+import base64
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .admission import PRESENCE_FIELDS, WAITLISTED, admit_many, present_keys, shift_present_counts
+from .checkins import apply_attendance_batch
+from .models import Seminar, Attendance, JoinedParticipant, Evaluation, Certificate, Tombstone
+from .pagination import InvalidListParams
+from .serializers import (
+    AttendanceBulkItemSerializer, AttendanceReadSerializer, AttendanceSerializer, CertificateReadSerializer,
+    EvaluationReadSerializer, EvaluationSerializer, EvaluationSyncItemSerializer, JoinedParticipantReadSerializer,
+    JoinedParticipantSerializer, JoinedParticipantSyncItemSerializer, SeminarReadSerializer,
+)
+from .stats import invalidate_seminar_stats
+
+
+# collection name -> (model, read serializer); the names are also used for Tombstone.collection
+COLLECTIONS = {
+    'seminars': (Seminar, SeminarReadSerializer(include=SeminarReadSerializer.deferred_fields)),
+    'attendance': (Attendance, AttendanceReadSerializer()),
+    'joined_participants': (JoinedParticipant, JoinedParticipantReadSerializer()),
+    'evaluations': (Evaluation, EvaluationReadSerializer()),
+    'certificates': (Certificate, CertificateReadSerializer()),
+}
+
+# Cursor slot holding the tombstone position
+DELETED = 'deleted'
+
+# collection name -> (item serializer, fields written on upsert); seminars are created
+# online only, since an offline client cannot allocate their ids
+PUSH_COLLECTIONS = {
+    'attendance': (AttendanceBulkItemSerializer, ('time_in', 'time_out')),
+    'joined_participants': (
+        JoinedParticipantSyncItemSerializer,
+        ('participant_name', 'metadata', 'present', 'check_in', 'check_out'),
+    ),
+    'evaluations': (EvaluationSyncItemSerializer, ('answers',)),
+}
+
+
+def collection_of(model):
+    for name, (collection_model, _) in COLLECTIONS.items():
+        if collection_model is model:
+            return name
+    return None
+
+
+def encode_sync_cursor(positions):
+    raw = json.dumps({name: [timestamp.isoformat(), pk] for name, (timestamp, pk) in positions.items()})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_sync_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        positions = {}
+        for name, (timestamp, pk) in raw.items():
+            parsed = parse_datetime(timestamp)
+            if parsed is None or (name not in COLLECTIONS and name != DELETED):
+                raise ValueError(name)
+            positions[name] = (parsed, int(pk))
+        return positions
+    except (ValueError, TypeError, AttributeError, UnicodeDecodeError):
+        raise InvalidListParams('Invalid sync cursor')
+
+
+def _page(qs, timestamp_field, position, floor, page_size):
+    """Rows after ``position`` and the position to resume from; the position never moves past ``floor`` once caught up"""
+    qs = qs.order_by(timestamp_field, 'id')
+    if position:
+        timestamp, pk = position
+        qs = qs.filter(Q(**{f'{timestamp_field}__gt': timestamp}) | Q(**{timestamp_field: timestamp, 'id__gt': pk}))
+    rows = list(qs[:page_size + 1])
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        return rows, (rows[-1][timestamp_field], rows[-1]['id']), True
+    return rows, max(position, floor) if position else floor, False
+
+
+def changes_since(cursor=None):
+    """Changes and deletions after ``cursor`` (None for a full download), at most SYNC_PAGE_SIZE rows per collection"""
+    positions = decode_sync_cursor(cursor) if cursor else {}
+    floor = (timezone.now() - timedelta(seconds=settings.SYNC_CURSOR_LAG_SECONDS), 0)
+    page_size = settings.SYNC_PAGE_SIZE
+    next_positions, changes, has_more = {}, {}, False
+
+    for name, (model, serializer) in COLLECTIONS.items():
+        qs = model.objects.values(*dict.fromkeys([*serializer.fields, 'updated_at', 'id']))
+        rows, next_positions[name], more = _page(qs, 'updated_at', positions.get(name), floor, page_size)
+        changes[name] = serializer.serialize(rows)
+        has_more |= more
+
+    deleted = {name: [] for name in COLLECTIONS}
+    if cursor:
+        qs = Tombstone.objects.values('id', 'collection', 'object_id', 'deleted_at')
+        rows, next_positions[DELETED], more = _page(qs, 'deleted_at', positions.get(DELETED), floor, page_size)
+        for row in rows:
+            deleted[row['collection']].append(row['object_id'])
+        has_more |= more
+    else:
+        # A full download has nothing local to delete
+        next_positions[DELETED] = floor
+
+    return {
+        'cursor': encode_sync_cursor(next_positions),
+        'has_more': has_more,
+        'changes': changes,
+        'deleted': deleted,
+    }
+
+
+def _merge(items, fields):
+    merged = {}
+    for item in items:
+        values = merged.setdefault((item['seminar'], item['participant_email']), {})
+        values.update({field: item[field] for field in fields if field in item})
+    return merged
+
+
+def _upsert(model, items, fields):
+    """Upsert items on (seminar, participant_email); returns {key: (row, created)}.
+
+    One INSERT ... ON CONFLICT DO UPDATE per set of provided fields, so fields an
+    item leaves out keep their stored value.
+    """
+    merged = _merge(items, fields)
+    seminar_ids = {seminar_id for seminar_id, _ in merged}
+    emails = {email for _, email in merged}
+    existing = set(
+        model.objects.filter(seminar_id__in=seminar_ids, participant_email__in=emails)
+        .values_list('seminar_id', 'participant_email')
+    )
+    groups = {}
+    for (seminar_id, email), values in merged.items():
+        groups.setdefault(tuple(sorted(values)), []).append(
+            model(seminar_id=seminar_id, participant_email=email, **values)
+        )
+    for provided, rows in groups.items():
+        model.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['seminar', 'participant_email'],
+            update_fields=[*provided, 'updated_at'],
+        )
+    rows = {
+        (row.seminar_id, row.participant_email): row
+        for row in model.objects.filter(seminar_id__in=seminar_ids, participant_email__in=emails)
+    }
+    return {key: (rows[key], key not in existing) for key in merged}
+
+
+def _join(items):
+    """Admit, then upsert joined participants; keys refused by a full seminar are left out"""
+    admitted = admit_many((item['seminar'], item['participant_email']) for item in items)
+    accepted = []
+    for item in items:
+        status, created = admitted[(item['seminar'], item['participant_email'])]
+        if status is None:
+            continue
+        if status == WAITLISTED:
+            item = {field: value for field, value in item.items() if field not in PRESENCE_FIELDS}
+        if created:
+            item = {**item, 'status': status}
+        accepted.append(item)
+    keys = {(item['seminar'], item['participant_email']) for item in accepted}
+    present_before = present_keys(keys)
+    rows = _upsert(JoinedParticipant, accepted, (*PUSH_COLLECTIONS['joined_participants'][1], 'status'))
+    shift_present_counts(present_before, present_keys(keys))
+    return rows
+
+
+def _apply(name, items):
+    if name == 'attendance':
+        return apply_attendance_batch(items), AttendanceSerializer
+    if name == 'joined_participants':
+        return _join(items), JoinedParticipantSerializer
+    return _upsert(Evaluation, items, PUSH_COLLECTIONS[name][1]), EvaluationSerializer
+
+
+def apply_changes(payload):
+    """Validate and apply ``{collection: [item, ...]}``; returns per-item results in request order.
+
+    Raises ``InvalidListParams`` when the payload itself is malformed.
+    """
+    if not isinstance(payload, dict):
+        raise InvalidListParams('Expected an object of collections')
+    unknown = [name for name in payload if name not in PUSH_COLLECTIONS]
+    if unknown:
+        raise InvalidListParams(f"Cannot sync: {', '.join(unknown)}")
+    if any(not isinstance(items, list) for items in payload.values()):
+        raise InvalidListParams('Each collection must be a list of items')
+    if sum(len(items) for items in payload.values()) > settings.SYNC_MAX_ITEMS:
+        raise InvalidListParams(f'At most {settings.SYNC_MAX_ITEMS} items per request')
+
+    results, valid = {}, {}
+    for name, items in payload.items():
+        item_serializer = PUSH_COLLECTIONS[name][0]
+        results[name], valid[name] = [], []
+        for index, item in enumerate(items):
+            serializer = item_serializer(data=item)
+            if serializer.is_valid():
+                valid[name].append((index, serializer.validated_data))
+                results[name].append(None)
+            else:
+                results[name].append({'index': index, 'status': 'error', 'errors': serializer.errors})
+
+    # Validate every referenced seminar with a single query
+    seminar_ids = {item['seminar'] for entries in valid.values() for _, item in entries}
+    known = set(Seminar.objects.filter(pk__in=seminar_ids).values_list('id', flat=True))
+
+    with transaction.atomic():
+        for name, entries in valid.items():
+            applicable = []
+            for index, item in entries:
+                if item['seminar'] in known:
+                    applicable.append((index, item))
+                else:
+                    results[name][index] = {'index': index, 'status': 'error', 'errors': {'seminar': ['Seminar not found']}}
+            if not applicable:
+                continue
+            rows, serializer_class = _apply(name, [item for _, item in applicable])
+            for index, item in applicable:
+                key = (item['seminar'], item['participant_email'])
+                if key not in rows:
+                    results[name][index] = {'index': index, 'status': 'error', 'errors': {'seminar': ['Seminar is full']}}
+                    continue
+                row, created = rows[key]
+                results[name][index] = {
+                    'index': index,
+                    'status': 'created' if created else 'updated',
+                    'data': serializer_class(row).data,
+                }
+    for seminar_id in known:
+        invalidate_seminar_stats(seminar_id)
+
+    counts = {'created': 0, 'updated': 0, 'error': 0}
+    for entries in results.values():
+        for result in entries:
+            counts[result['status']] += 1
+    return {'results': results, 'created': counts['created'], 'updated': counts['updated'], 'failed': counts['error']}
@@ -1,3 +1,1438 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import tempfile
+import threading
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from . import admission, ingest, roster, throttling
+from .metrics import registry as metrics_registry
+from .certificates import generate_certificates, get_progress as get_certificate_progress
+from .models import Seminar, Attendance, AttendanceEvent, JoinedParticipant, Evaluation, Certificate, CertificateJob, Tombstone
+from .routers import REPLICA_ALIAS, ReadReplicaRouter, replica_reads
+from .serializers import (
+    AttendanceReadSerializer, AttendanceSerializer, JoinedParticipantReadSerializer, JoinedParticipantSerializer,
+    SeminarReadSerializer, SeminarSerializer,
+)
+
+
+@override_settings(API_PAGE_SIZE=2, API_MAX_PAGE_SIZE=3)
+class ListPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.seminar = Seminar.objects.create(title='Intro', semester='1')
+        self.other = Seminar.objects.create(title='Advanced', semester='2')
+        now = timezone.now()
+        for i in range(5):
+            row = Attendance.objects.create(seminar=self.seminar, participant_email=f'p{i}@example.com', time_in=now if i % 2 == 0 else None)
+            # Force identical timestamps to exercise the id tie-breaker
+            Attendance.objects.filter(pk=row.pk).update(created_at=now)
+        Attendance.objects.create(seminar=self.other, participant_email='x@example.com')
+
+    def test_unscoped_list_walks_all_pages_without_duplicates(self):
+        seen, cursor = [], None
+        while True:
+            params = {'cursor': cursor} if cursor else {}
+            res = self.client.get('/api/attendance/', params)
+            self.assertEqual(res.status_code, 200)
+            self.assertLessEqual(len(res.data['results']), 2)
+            seen.extend(row['id'] for row in res.data['results'])
+            cursor = res.data['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(sorted(seen), sorted(Attendance.objects.values_list('id', flat=True)))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_limit_is_capped(self):
+        res = self.client.get('/api/attendance/', {'limit': 100})
+        self.assertEqual(len(res.data['results']), 3)
+
+    def test_all_opt_in_returns_plain_list(self):
+        res = self.client.get('/api/attendance/', {'all': 'true'})
+        self.assertIsInstance(res.data, list)
+        self.assertEqual(len(res.data), 6)
+
+    def test_scoped_list_stays_unpaginated_by_default(self):
+        res = self.client.get(f'/api/attendance/{self.seminar.id}/')
+        self.assertIsInstance(res.data, list)
+        self.assertEqual(len(res.data), 5)
+
+    def test_filters(self):
+        res = self.client.get('/api/attendance/', {'all': 'true', 'semester': '2'})
+        self.assertEqual([row['participant_email'] for row in res.data], ['x@example.com'])
+        res = self.client.get('/api/attendance/', {'all': 'true', 'email': 'p1@example.com'})
+        self.assertEqual(len(res.data), 1)
+        res = self.client.get(f'/api/attendance/{self.seminar.id}/', {'present': 'true'})
+        self.assertEqual(len(res.data), 3)
+        tomorrow = (timezone.localdate() + timedelta(days=1)).isoformat()
+        res = self.client.get('/api/attendance/', {'all': 'true', 'from': tomorrow})
+        self.assertEqual(res.data, [])
+        res = self.client.get('/api/attendance/', {'all': 'true', 'to': timezone.localdate().isoformat()})
+        self.assertEqual(len(res.data), 6)
+
+    def test_joined_participants_present_filter(self):
+        JoinedParticipant.objects.create(seminar=self.seminar, participant_email='a@example.com', present=True)
+        JoinedParticipant.objects.create(seminar=self.seminar, participant_email='b@example.com')
+        res = self.client.get('/api/joined-participants/', {'present': 'false'})
+        self.assertEqual([row['participant_email'] for row in res.data['results']], ['b@example.com'])
+
+    def test_invalid_params_return_400(self):
+        self.assertEqual(self.client.get('/api/attendance/', {'cursor': 'garbage'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/attendance/', {'limit': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/evaluations/', {'present': 'true'}).status_code, 400)
+
+
+class QueryPlanTests(TestCase):
+    def test_api_queries_use_indexes(self):
+        out = StringIO()
+        call_command('benchmark_queries', seminars=5, participants=40, stdout=out)
+        self.assertIn('No full table scans detected', out.getvalue())
+
+
+@override_settings(GOOGLE_FORM_SECRET='secret')
+class GoogleFormSubmitTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.seminar = Seminar.objects.create(title='Intro')
+
+    def submit(self, **extra):
+        payload = {'secret_token': 'secret', 'seminar_id': self.seminar.id, 'email': 'a@example.com', 'name': 'Ann', 'year_section': '3A'}
+        payload.update(extra)
+        return APIClient().post('/api/google-form-submit/', payload, format='json')
+
+    def test_submit_upserts_both_rows(self):
+        self.assertEqual(self.submit().status_code, 201)
+        # Seminar check, BEGIN, admission (seminar lock, existing participant), presence
+        # lookup, one upsert per table, feed event insert, COMMIT; the participant was
+        # already present, so present_count is not touched
+        with self.assertNumQueries(9):
+            res = self.submit(name='Ann B', year_section='3B')
+        self.assertEqual(res.status_code, 201)
+        joined = JoinedParticipant.objects.get()
+        self.assertEqual((joined.participant_name, joined.metadata, joined.present), ('Ann B', {'year_section': '3B'}, True))
+        self.assertIsNotNone(joined.check_in)
+        self.assertIsNotNone(Attendance.objects.get().time_in)
+
+    def test_rejects_bad_input(self):
+        self.assertEqual(self.submit(secret_token='wrong').status_code, 401)
+        self.assertEqual(self.submit(email='not-an-email').status_code, 400)
+        self.assertEqual(self.submit(seminar_id=self.seminar.id + 1).status_code, 404)
+        res = APIClient().post('/api/google-form-submit/', '{not json', content_type='application/json')
+        self.assertEqual((res.status_code, res.json()), (400, {'error': 'Invalid JSON body'}))
+
+    def test_concurrent_duplicate_submissions(self):
+        barrier = threading.Barrier(8)
+        statuses, replayed = [], []
+
+        def worker():
+            try:
+                barrier.wait()
+                res = self.submit()
+                statuses.append(res.status_code)
+                replayed.append(res.get('Idempotent-Replayed'))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Only the first submission is processed; the others get its response or are told to retry
+        self.assertEqual(statuses.count(201) - replayed.count('true'), 1)
+        self.assertLessEqual(set(statuses), {201, 409})
+        self.assertEqual(Attendance.objects.count(), 1)
+        self.assertEqual(JoinedParticipant.objects.count(), 1)
+
+
+class AttendanceBulkTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.seminar = Seminar.objects.create(title='Intro')
+        Attendance.objects.create(seminar=self.seminar, participant_email='old@example.com', time_in=timezone.now())
+
+    def test_batch_creates_updates_and_reports_errors(self):
+        later = (timezone.now() + timedelta(hours=1)).isoformat()
+        records = [
+            {'seminar': self.seminar.id, 'participant_email': 'old@example.com', 'time_out': later},
+            {'seminar': self.seminar.id, 'participant_email': 'new@example.com', 'time_in': timezone.now().isoformat()},
+            {'seminar': self.seminar.id, 'participant_email': 'new@example.com', 'time_out': later},
+            {'seminar': self.seminar.id, 'participant_email': 'bad'},
+            {'seminar': self.seminar.id + 1, 'participant_email': 'x@example.com', 'time_in': later},
+        ]
+        # Seminar check, savepoint, existing-key lookup, one upsert per field set, re-read, feed event insert, release
+        with self.assertNumQueries(8):
+            res = self.client.post('/api/attendance/bulk/', records, format='json')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([r['status'] for r in res.data['results']], ['updated', 'created', 'updated', 'error', 'error'])
+        self.assertEqual((res.data['created'], res.data['updated'], res.data['failed']), (1, 2, 2))
+        self.assertIsNotNone(Attendance.objects.get(participant_email='old@example.com').time_out)
+        # The time_in the batch did not send is kept and returned
+        self.assertIsNotNone(res.data['results'][0]['data']['time_in'])
+        new = Attendance.objects.get(participant_email='new@example.com')
+        self.assertIsNotNone(new.time_in)
+        self.assertIsNotNone(new.time_out)
+
+    def test_scan_written_after_the_lookup_is_kept(self):
+        from unittest import mock
+        from . import checkins
+        checked_out = timezone.now() + timedelta(hours=1)
+        real_filter = Attendance.objects.filter
+
+        def filter_then_race(*args, **kwargs):
+            rows = real_filter(*args, **kwargs)
+            len(rows)  # evaluated before the race, as a lookup read into memory would be
+            # A concurrent check-out commits between the lookup and this batch's write
+            real_filter(participant_email='old@example.com').update(time_out=checked_out)
+            return rows
+
+        with mock.patch.object(Attendance.objects, 'filter', side_effect=filter_then_race):
+            rows = checkins.apply_attendance_batch([
+                {'seminar': self.seminar.id, 'participant_email': 'old@example.com', 'time_in': timezone.now()},
+            ])
+        _, created = rows[(self.seminar.id, 'old@example.com')]
+        self.assertFalse(created)
+        self.assertEqual(Attendance.objects.get(participant_email='old@example.com').time_out, checked_out)
+
+    def test_rejects_non_list_and_oversized_batches(self):
+        self.assertEqual(self.client.post('/api/attendance/bulk/', {'records': 'x'}, format='json').status_code, 400)
+        with override_settings(ATTENDANCE_BULK_MAX_ITEMS=1):
+            record = {'seminar': self.seminar.id, 'participant_email': 'a@example.com', 'time_in': timezone.now().isoformat()}
+            res = self.client.post('/api/attendance/bulk/', {'records': [record, record]}, format='json')
+            self.assertEqual(res.status_code, 400)
+
+
+class ReadReplicaRouterTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # A second migrated SQLite file registered as the replica alias. The test runner only
+        # knows the configured databases, so it is added (and allowed) once the class is set up.
+        cls.replica_dir = tempfile.TemporaryDirectory()
+        connections.settings[REPLICA_ALIAS] = {
+            **connections.settings['default'], 'NAME': str(Path(cls.replica_dir.name) / 'replica.sqlite3'),
+        }
+        cls.databases = cls.databases | {REPLICA_ALIAS}
+        call_command('migrate', database=REPLICA_ALIAS, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.databases = cls.databases - {REPLICA_ALIAS}
+        connections[REPLICA_ALIAS].close()
+        del connections[REPLICA_ALIAS]
+        del connections.settings[REPLICA_ALIAS]
+        cls.replica_dir.cleanup()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.router = ReadReplicaRouter()
+
+    def test_get_reads_replica_file_and_writes_go_to_primary(self):
+        seminar = Seminar.objects.create(title='Intro')
+        Seminar.objects.using(REPLICA_ALIAS).create(pk=seminar.pk, title='Intro')
+        Attendance.objects.using(REPLICA_ALIAS).create(seminar_id=seminar.pk, participant_email='replica@example.com')
+
+        client = APIClient()
+        res = client.get(f'/api/attendance/{seminar.pk}/')
+        self.assertEqual([row['participant_email'] for row in res.data], ['replica@example.com'])
+
+        res = client.post('/api/attendance/', {'seminar': seminar.pk, 'participant_email': 'a@example.com', 'time_in': timezone.now().isoformat()}, format='json')
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(list(Attendance.objects.values_list('participant_email', flat=True)), ['a@example.com'])
+        self.assertEqual(list(Attendance.objects.using(REPLICA_ALIAS).values_list('participant_email', flat=True)), ['replica@example.com'])
+
+    def test_non_get_requests_read_from_primary(self):
+        @replica_reads
+        def view(request):
+            return self.router.db_for_read(Seminar)
+
+        self.assertEqual(view(RequestFactory().get('/')), REPLICA_ALIAS)
+        self.assertEqual(view(RequestFactory().post('/')), 'default')
+        self.assertEqual(self.router.db_for_read(Seminar), 'default')
+
+
+class ReadReplicaFallbackTests(TestCase):
+    def test_falls_back_to_primary_without_replica(self):
+        @replica_reads
+        def view(request):
+            return ReadReplicaRouter().db_for_read(Seminar)
+
+        self.assertEqual(view(RequestFactory().get('/')), 'default')
+
+
+class SeminarCatalogCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        Seminar.objects.create(title='Intro', questions=[{'id': 'q1'}])
+
+    def test_catalog_is_cached_and_revalidated(self):
+        first = self.client.get('/api/seminars/')
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual([s['title'] for s in first.json()], ['Intro'])
+        self.assertTrue(first['ETag'].startswith('"'))
+        self.assertIn('Last-Modified', first)
+
+        with self.assertNumQueries(0):
+            again = self.client.get('/api/seminars/')
+            not_modified = self.client.get('/api/seminars/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(again.content, first.content)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified['ETag'], first['ETag'])
+
+    def test_writes_invalidate_the_catalog(self):
+        etag = self.client.get('/api/seminars/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/seminars/', {'title': 'Advanced'}, format='json')
+        res = self.client.get('/api/seminars/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(res.json()), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Seminar.objects.get(title='Advanced').delete()
+        self.assertEqual(len(self.client.get('/api/seminars/').json()), 1)
+
+    def test_catalog_is_invalidated_when_the_write_commits(self):
+        self.client.get('/api/seminars/')
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                seminar = Seminar.objects.get(title='Intro')
+                seminar.title = 'Intro to Databases'
+                seminar.save()
+                # Uncommitted: the version stays, so no read can cache these rows as current
+                self.assertEqual(self.client.get('/api/seminars/').json()[0]['title'], 'Intro')
+        self.assertEqual(self.client.get('/api/seminars/').json()[0]['title'], 'Intro to Databases')
+
+    def test_last_modified_moves_forward_on_delete(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Seminar.objects.create(title='Advanced')
+        seen = self.client.get('/api/seminars/')['Last-Modified']
+        # The newest seminar goes away: the catalog changed although no remaining row is newer
+        with self.captureOnCommitCallbacks(execute=True):
+            Seminar.objects.get(title='Advanced').delete()
+        res = self.client.get('/api/seminars/', HTTP_IF_MODIFIED_SINCE=seen)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([s['title'] for s in res.json()], ['Intro'])
+        self.assertEqual(self.client.get('/api/seminars/', HTTP_IF_MODIFIED_SINCE=res['Last-Modified']).status_code, 304)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.seminar = Seminar.objects.create(title='Intro', questions=[{'id': 'q1', 'type': 'rating'}, {'id': 'q2', 'type': 'text'}])
+        Evaluation.objects.create(seminar=self.seminar, participant_email='a@example.com', answers={'q1': 5, 'q2': 'Great', 'feedback': 'Thanks'})
+        Evaluation.objects.create(seminar=self.seminar, participant_email='b@example.com', answers={'q1': 3})
+        Attendance.objects.create(seminar=self.seminar, participant_email='a@example.com', time_in=timezone.now())
+
+    def read(self, response):
+        return b''.join(response.streaming_content).decode()
+
+    def test_evaluation_csv_flattens_answers_by_question(self):
+        res = self.client.get(f'/api/evaluations/{self.seminar.id}/export/')
+        self.assertEqual(res['Content-Type'], 'text/csv')
+        rows = list(csv.reader(io.StringIO(self.read(res))))
+        self.assertEqual(rows[0][-3:], ['answer_q1', 'answer_q2', 'answer_feedback'])
+        self.assertEqual(rows[1][-3:], ['5', 'Great', 'Thanks'])
+        self.assertEqual(rows[2][-3:], ['3', '', ''])
+
+    def test_attendance_ndjson_with_filters(self):
+        res = self.client.get('/api/attendance/export/', {'output': 'ndjson', 'present': 'true'})
+        lines = [json.loads(line) for line in self.read(res).splitlines()]
+        self.assertEqual([line['participant_email'] for line in lines], ['a@example.com'])
+        self.assertEqual(lines[0]['seminar_title'], 'Intro')
+        self.assertEqual(self.client.get('/api/attendance/export/', {'output': 'xml'}).status_code, 400)
+
+    def test_export_command(self):
+        out = StringIO()
+        call_command('export', 'evaluations', '--output', 'ndjson', stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 2)
+
+
+class SeminarStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.seminar = Seminar.objects.create(title='Intro', capacity=4, questions=[
+            {'id': 'q1', 'question': 'Rate the talk', 'type': 'rating'},
+            {'id': 'q2', 'question': 'Comments', 'type': 'text'},
+        ])
+        start = timezone.now()
+        for i, minutes in enumerate([30, 60]):
+            JoinedParticipant.objects.create(seminar=self.seminar, participant_email=f'p{i}@example.com', present=True)
+            Attendance.objects.create(seminar=self.seminar, participant_email=f'p{i}@example.com', time_in=start, time_out=start + timedelta(minutes=minutes))
+        JoinedParticipant.objects.create(seminar=self.seminar, participant_email='absent@example.com')
+        Evaluation.objects.create(seminar=self.seminar, participant_email='p0@example.com', answers={'q1': 5, 'q2': 'Nice'})
+        Evaluation.objects.create(seminar=self.seminar, participant_email='p1@example.com', answers={'q1': 4})
+
+    def test_stats(self):
+        data = self.client.get(f'/api/seminars/{self.seminar.id}/stats/').json()
+        self.assertEqual(data['attendance'], {
+            'capacity': 4, 'joined': 3, 'present': 2, 'waitlisted': 0, 'checked_in': 2, 'checked_out': 2,
+            'attendance_rate': round(2 / 3, 4), 'fill_rate': 0.75,
+        })
+        self.assertEqual(data['dwell_time']['p50_seconds'], 2700.0)
+        rating, comments = data['evaluations']['questions']
+        self.assertEqual((rating['distribution'], rating['mean'], rating['answered']), ({'4': 1, '5': 1}, 4.5, 2))
+        self.assertEqual(comments['answered'], 1)
+
+    def test_stats_are_cached_and_invalidated(self):
+        url = f'/api/seminars/{self.seminar.id}/stats/'
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            self.client.get(url)
+        self.client.post('/api/attendance/bulk/', [{'seminar': self.seminar.id, 'participant_email': 'late@example.com', 'time_in': timezone.now().isoformat()}], format='json')
+        self.assertEqual(self.client.get(url).json()['attendance']['checked_in'], 3)
+        Evaluation.objects.create(seminar=self.seminar, participant_email='late@example.com', answers={'q1': 3})
+        self.assertEqual(self.client.get(url).json()['evaluations']['count'], 3)
+
+    def test_missing_seminar(self):
+        self.assertEqual(self.client.get('/api/seminars/999/stats/').status_code, 404)
+
+
+class CertificateGenerationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        self.seminar = Seminar.objects.create(title='Intro & <Basics>', certificate_template_url='https://example.com/bg.png')
+        for i in range(5):
+            email = f'p{i}@example.com'
+            JoinedParticipant.objects.create(seminar=self.seminar, participant_email=email, participant_name=f'Person {i}')
+            if i < 4:
+                Attendance.objects.create(seminar=self.seminar, participant_email=email, time_in=timezone.now())
+            if i % 2 == 0:
+                Evaluation.objects.create(seminar=self.seminar, participant_email=email, answers={})
+
+    def test_generates_for_eligible_participants_and_resumes(self):
+        with override_settings(MEDIA_ROOT=self.media.name):
+            progress = generate_certificates(self.seminar, workers=2, batch_size=1)
+            self.assertEqual((progress['status'], progress['total'], progress['done']), ('finished', 2, 2))
+            self.assertEqual(generate_certificates(self.seminar, workers=1)['total'], 0)
+
+        certificates = Certificate.objects.order_by('participant_email')
+        self.assertEqual([c.participant_email for c in certificates], ['p0@example.com', 'p2@example.com'])
+        self.assertEqual(len({c.certificate_number for c in certificates}), 2)
+        svg = (Path(self.media.name) / 'certificates' / str(self.seminar.id) / f'{certificates[0].certificate_number}.svg').read_text()
+        self.assertIn('Person 0', svg)
+        self.assertIn('Intro &amp; &lt;Basics&gt;', svg)
+        self.assertEqual(get_certificate_progress(self.seminar.id)['status'], 'finished')
+
+    def test_colliding_certificates_are_not_counted_as_issued(self):
+        from .certificate_render import certificate_number
+        evaluation = Evaluation.objects.get(seminar=self.seminar, participant_email='p0@example.com')
+        Certificate.objects.create(seminar=self.seminar, participant_email='p4@example.com', certificate_number=certificate_number(self.seminar.pk, evaluation.pk))
+        with override_settings(MEDIA_ROOT=self.media.name):
+            progress = generate_certificates(self.seminar, workers=1)
+        self.assertEqual((progress['total'], progress['done']), (2, 1))
+        self.assertFalse(Certificate.objects.filter(participant_email='p0@example.com').exists())
+
+    def test_only_one_job_per_seminar_is_active(self):
+        from .certificates import claim_job
+        self.assertTrue(claim_job(self.seminar.id))
+        self.assertFalse(claim_job(self.seminar.id))
+        self.assertEqual(get_certificate_progress(self.seminar.id)['status'], 'queued')
+
+        # A job left behind by a dead process is taken over once it goes stale
+        CertificateJob.objects.filter(seminar=self.seminar).update(status='running', updated_at=timezone.now() - timedelta(hours=2))
+        self.assertTrue(claim_job(self.seminar.id))
+
+    def test_job_endpoint_reports_missing_progress(self):
+        self.assertEqual(APIClient().get(f'/api/seminars/{self.seminar.id}/certificates/generate/').status_code, 404)
+        self.assertEqual(APIClient().post('/api/seminars/999/certificates/generate/').status_code, 404)
+
+
+@override_settings(GOOGLE_FORM_SECRET='secret')
+class AsyncCheckInTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    async def test_async_google_form_submit(self):
+        seminar = await Seminar.objects.acreate(title='Intro')
+        payload = {'secret_token': 'secret', 'seminar_id': seminar.id, 'email': 'a@example.com', 'name': 'Ann'}
+        for _ in range(2):
+            res = await self.async_client.post('/api/async/google-form-submit/', payload, content_type='application/json')
+            self.assertEqual(res.status_code, 201)
+        self.assertEqual(await Attendance.objects.acount(), 1)
+        joined = await JoinedParticipant.objects.aget()
+        self.assertTrue(joined.present)
+
+        res = await self.async_client.post('/api/async/google-form-submit/', {**payload, 'secret_token': 'x'}, content_type='application/json')
+        self.assertEqual(res.status_code, 401)
+
+    async def test_async_attendance_check_in_and_out(self):
+        seminar = await Seminar.objects.acreate(title='Intro')
+        body = {'seminar': seminar.id, 'participant_email': 'a@example.com'}
+        res = await self.async_client.post('/api/async/attendance/', {**body, 'time_in': timezone.now().isoformat()}, content_type='application/json')
+        self.assertEqual(res.status_code, 201)
+        res = await self.async_client.post('/api/async/attendance/', {**body, 'time_out': timezone.now().isoformat()}, content_type='application/json')
+        self.assertEqual(res.status_code, 200)
+        self.assertIsNotNone(res.json()['time_in'])
+        self.assertIsNotNone(res.json()['time_out'])
+        res = await self.async_client.post('/api/async/attendance/', body, content_type='application/json')
+        self.assertEqual(res.status_code, 400)
+
+    async def test_async_health(self):
+        res = await self.async_client.get('/api/async/health/')
+        self.assertEqual(res.json()['mode'], 'async')
+
+
+@override_settings(GOOGLE_FORM_SECRET='secret', CHECKIN_INGESTION_MODE='queued', CHECKIN_FLUSH_IN_PROCESS=False)
+class IngestionQueueTests(TestCase):
+    def setUp(self):
+        self.journal_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.journal_dir.cleanup)
+        queue_path = override_settings(CHECKIN_QUEUE_PATH=str(Path(self.journal_dir.name) / 'queue.sqlite3'))
+        queue_path.enable()
+        self.addCleanup(queue_path.disable)
+        cache.clear()
+        self.seminar = Seminar.objects.create(title='Intro')
+
+    def submit(self, email='a@example.com'):
+        payload = {'secret_token': 'secret', 'seminar_id': self.seminar.id, 'email': email, 'name': 'Ann', 'year_section': '3A'}
+        return APIClient().post('/api/google-form-submit/', payload, format='json')
+
+    def test_checkins_are_acknowledged_then_flushed_in_one_batch(self):
+        self.assertEqual(self.submit().status_code, 202)
+        self.assertEqual(self.submit('b@example.com').status_code, 202)
+        res = APIClient().post('/api/attendance/', {
+            'seminar': self.seminar.id, 'participant_email': 'a@example.com', 'time_out': timezone.now().isoformat(),
+        }, format='json')
+        self.assertEqual(res.status_code, 202)
+        self.assertEqual(Attendance.objects.count(), 0)
+        self.assertEqual(APIClient().get('/api/ingest/status/').json()['depth'], 3)
+
+        self.assertEqual(ingest.drain(), 3)
+        self.assertEqual(ingest.queue_status()['depth'], 0)
+        row = Attendance.objects.get(participant_email='a@example.com')
+        self.assertIsNotNone(row.time_in)
+        self.assertIsNotNone(row.time_out)
+        self.assertEqual(JoinedParticipant.objects.filter(present=True).count(), 2)
+
+    def test_invalid_checkins_are_rejected_before_queueing(self):
+        self.assertEqual(self.submit('not-an-email').status_code, 400)
+        res = APIClient().post('/api/attendance/', {'seminar': self.seminar.id + 1, 'participant_email': 'a@example.com', 'time_in': timezone.now().isoformat()}, format='json')
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(ingest.queue_status()['depth'], 0)
+
+    def test_abandoned_claim_is_reapplied_idempotently(self):
+        self.submit()
+        ingest.flush()
+        checked_in = Attendance.objects.get().time_in
+        # Simulate a flusher that committed but died before deleting its entries
+        ingest._journal().execute("INSERT INTO journal (kind, payload, enqueued_at, claimed_by, claimed_until) VALUES ('form', ?, 0, 'dead', 0)", (json.dumps({
+            'seminar_id': self.seminar.id, 'participant_email': 'a@example.com', 'participant_name': 'Ann',
+            'year_section': '3A', 'checked_in_at': checked_in.isoformat(),
+        }),))
+        self.assertEqual(ingest.flush(), 1)
+        self.assertEqual(Attendance.objects.get().time_in, checked_in)
+        self.assertEqual(JoinedParticipant.objects.count(), 1)
+
+    def test_entries_for_deleted_seminars_are_dropped(self):
+        self.submit()
+        other = Seminar.objects.create(title='Other')
+        APIClient().post('/api/google-form-submit/', {'secret_token': 'secret', 'seminar_id': other.id, 'email': 'b@example.com'}, format='json')
+        self.seminar.delete()
+        self.assertEqual(ingest.flush(), 2)
+        self.assertEqual(list(Attendance.objects.values_list('participant_email', flat=True)), ['b@example.com'])
+        self.assertEqual((ingest.queue_status()['depth'], ingest.queue_status()['dead_letters']), (0, 1))
+        self.assertEqual(ingest.dead_letters()[0]['reason'], 'seminar deleted')
+
+    def test_checkins_refused_by_a_full_seminar_are_dead_lettered(self):
+        Seminar.objects.filter(pk=self.seminar.pk).update(capacity=1)
+        self.submit()
+        self.submit('b@example.com')
+        self.assertEqual(ingest.drain(), 2)
+        self.assertEqual(list(JoinedParticipant.objects.values_list('participant_email', flat=True)), ['a@example.com'])
+        [letter] = ingest.dead_letters()
+        self.assertEqual((letter['reason'], letter['payload']['participant_email']), ('seminar full', 'b@example.com'))
+
+    @override_settings(CHECKIN_MAX_ATTEMPTS=2)
+    def test_a_failing_entry_is_retried_alone_then_dead_lettered(self):
+        # No checked_in_at: applying it raises, whatever else is in the batch
+        ingest.enqueue(ingest.FORM_CHECKIN, {'seminar_id': self.seminar.id, 'participant_email': 'bad@example.com'})
+        self.submit()
+        with self.assertLogs('api.ingest', 'ERROR'):
+            self.assertEqual(ingest.flush(), 2)
+        self.assertEqual(list(Attendance.objects.values_list('participant_email', flat=True)), ['a@example.com'])
+        self.assertEqual((ingest.queue_status()['depth'], ingest.queue_status()['dead_letters']), (1, 0))
+
+        with self.assertLogs('api.ingest', 'ERROR'):
+            self.assertEqual(ingest.flush(), 1)
+        self.assertEqual((ingest.queue_status()['depth'], ingest.queue_status()['dead_letters']), (0, 1))
+        self.assertIn('failed 2 times', ingest.dead_letters()[0]['reason'])
+
+    def test_status_in_direct_mode_does_not_create_the_journal(self):
+        with override_settings(CHECKIN_INGESTION_MODE='direct'):
+            self.assertEqual(APIClient().get('/api/ingest/status/').json()['depth'], 0)
+        self.assertFalse(Path(settings.CHECKIN_QUEUE_PATH).exists())
+
+    def test_drain_command(self):
+        self.submit()
+        out = StringIO()
+        call_command('drain_checkin_queue', stdout=out)
+        self.assertIn('Applied 1 queued check-ins; 0 remaining', out.getvalue())
+        self.assertEqual(Attendance.objects.count(), 1)
+
+
+class ReadSerializerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        now = timezone.now()
+        self.seminar = Seminar.objects.create(
+            title='Intro', speaker='Dr. A', date=now.date(), start_datetime=now,
+            questions=[{'id': 'q1', 'type': 'rating'}], metadata={'room': 'A1'},
+        )
+        Attendance.objects.create(seminar=self.seminar, participant_email='a@example.com', time_in=now)
+        JoinedParticipant.objects.create(seminar=self.seminar, participant_email='a@example.com', metadata={'year_section': '3A'}, present=True)
+
+    def test_output_matches_model_serializers(self):
+        cases = (
+            (Seminar, SeminarSerializer, SeminarReadSerializer(include=('questions', 'metadata'))),
+            (Attendance, AttendanceSerializer, AttendanceReadSerializer()),
+            (JoinedParticipant, JoinedParticipantSerializer, JoinedParticipantReadSerializer()),
+        )
+        for model, model_serializer, read_serializer in cases:
+            expected = model_serializer(model.objects.order_by('id'), many=True).data
+            actual = read_serializer.serialize(model.objects.order_by('id').values(*read_serializer.fields))
+            self.assertEqual(json.dumps(actual), json.dumps(expected))
+
+    def test_seminar_list_defers_questions_and_metadata(self):
+        client = APIClient()
+        row = client.get('/api/seminars/').json()[0]
+        self.assertNotIn('questions', row)
+        self.assertNotIn('metadata', row)
+        self.assertEqual(row['speaker'], 'Dr. A')
+
+        row = client.get('/api/seminars/', {'include': 'questions'}).json()[0]
+        self.assertEqual(row['questions'], [{'id': 'q1', 'type': 'rating'}])
+        self.assertEqual(list(client.get('/api/seminars/', {'fields': 'title,date'}).json()[0]), ['title', 'date'])
+        self.assertEqual(client.get('/api/seminars/', {'fields': 'title,bogus'}).status_code, 400)
+        self.assertEqual(client.get('/api/seminars/', {'include': 'title'}).status_code, 400)
+
+    def test_sparse_fieldsets_on_paginated_lists(self):
+        Attendance.objects.create(seminar=self.seminar, participant_email='b@example.com')
+        res = APIClient().get('/api/attendance/', {'fields': 'participant_email', 'limit': 1}).json()
+        self.assertEqual(res['results'], [{'participant_email': 'a@example.com'}])
+        res = APIClient().get('/api/attendance/', {'fields': 'participant_email', 'cursor': res['next_cursor']}).json()
+        self.assertEqual(res['results'], [{'participant_email': 'b@example.com'}])
+
+
+class ParticipantHistoryTests(TestCase):
+    def add_seminar(self, n, evaluated=False, certified=False):
+        seminar = Seminar.objects.create(title=f'Seminar {n}', date=timezone.now().date() + timedelta(days=n))
+        JoinedParticipant.objects.create(seminar=seminar, participant_email='a@example.com', participant_name='Ann', present=True)
+        Attendance.objects.create(seminar=seminar, participant_email='a@example.com', time_in=timezone.now())
+        Attendance.objects.create(seminar=seminar, participant_email='other@example.com', time_in=timezone.now())
+        if evaluated:
+            Evaluation.objects.create(seminar=seminar, participant_email='a@example.com', answers={'q1': 5})
+        if certified:
+            Certificate.objects.create(seminar=seminar, participant_email='a@example.com', certificate_number=f'CERT-{n}')
+        return seminar
+
+    def test_history_combines_every_table_in_one_query(self):
+        self.add_seminar(1, evaluated=True, certified=True)
+        self.add_seminar(2, evaluated=True)
+        with self.assertNumQueries(1):
+            res = APIClient().get('/api/participants/a@example.com/history/')
+        for n in range(3, 8):
+            self.add_seminar(n)
+        with self.assertNumQueries(1):
+            APIClient().get('/api/participants/a@example.com/history/')
+
+        history = res.json()['seminars']
+        self.assertEqual([entry['seminar']['title'] for entry in history], ['Seminar 2', 'Seminar 1'])
+        self.assertTrue(history[0]['joined']['present'])
+        self.assertIsNotNone(history[0]['attendance']['time_in'])
+        self.assertIsNotNone(history[0]['evaluation']['submitted_at'])
+        self.assertIsNone(history[0]['certificate'])
+        self.assertEqual(history[1]['certificate']['certificate_number'], 'CERT-1')
+
+    def test_history_includes_seminars_without_a_joined_row(self):
+        seminar = Seminar.objects.create(title='Walk-in')
+        Attendance.objects.create(seminar=seminar, participant_email='a@example.com', time_in=timezone.now())
+        history = APIClient().get('/api/participants/a@example.com/history/').json()['seminars']
+        self.assertEqual(len(history), 1)
+        self.assertIsNone(history[0]['joined'])
+
+    def test_unknown_and_invalid_emails(self):
+        self.assertEqual(APIClient().get('/api/participants/nobody@example.com/history/').json()['seminars'], [])
+        self.assertEqual(APIClient().get('/api/participants/not-an-email/history/').status_code, 400)
+
+
+@override_settings(GOOGLE_FORM_SECRET='secret')
+class WebhookThrottlingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.seminar = Seminar.objects.create(title='Intro')
+
+    def submit(self, email='a@example.com', ip='10.0.0.1', client=None, **extra):
+        payload = {'secret_token': 'secret', 'seminar_id': self.seminar.id, 'email': email, 'name': 'Ann', **extra}
+        return (client or APIClient()).post('/api/google-form-submit/', payload, format='json', REMOTE_ADDR=ip)
+
+    @override_settings(WEBHOOK_IP_RATE=0.001, WEBHOOK_IP_BURST=2)
+    def test_ip_bucket_rejects_before_any_query(self):
+        self.assertEqual(self.submit('a@example.com').status_code, 201)
+        self.assertEqual(self.submit('b@example.com').status_code, 201)
+        with self.assertNumQueries(0):
+            res = self.submit('c@example.com')
+        self.assertEqual(res.status_code, 429)
+        self.assertGreater(int(res['Retry-After']), 0)
+        self.assertEqual(self.submit('c@example.com', ip='10.0.0.2').status_code, 201)
+
+    @override_settings(WEBHOOK_SEMINAR_RATE=0.001, WEBHOOK_SEMINAR_BURST=1)
+    def test_seminar_bucket_only_counts_authorized_submissions(self):
+        self.assertEqual(self.submit(secret_token='wrong').status_code, 401)
+        self.assertEqual(self.submit('a@example.com').status_code, 201)
+        self.assertEqual(self.submit('b@example.com', ip='10.0.0.2').status_code, 429)
+
+    def test_duplicate_submission_is_served_from_cache(self):
+        first = self.submit()
+        with self.assertNumQueries(0):
+            again = self.submit()
+        self.assertEqual(again.status_code, first.status_code)
+        self.assertEqual(again.json(), first.json())
+        self.assertEqual(again['Idempotent-Replayed'], 'true')
+
+        self.assertEqual(self.submit(year_section='3B').status_code, 201)
+        self.assertEqual(JoinedParticipant.objects.get().metadata, {'year_section': '3B'})
+
+    def test_duplicate_of_a_submission_in_flight_is_not_processed(self):
+        payload = {'secret_token': 'secret', 'seminar_id': self.seminar.id, 'email': 'a@example.com', 'name': 'Ann'}
+        key = throttling.idempotency_key(self.seminar.id, 'a@example.com', payload)
+        cache.add(key, throttling.PENDING)
+        res = self.submit()
+        self.assertEqual((res.status_code, res['Retry-After']), (409, '1'))
+        self.assertFalse(JoinedParticipant.objects.exists())
+
+        # A first request that gave up releases the key, so the next one is processed
+        throttling.forget(key)
+        self.assertEqual(self.submit().status_code, 201)
+
+    async def test_async_endpoint_shares_the_limits(self):
+        with self.settings(WEBHOOK_IP_RATE=0.001, WEBHOOK_IP_BURST=1):
+            payload = {'secret_token': 'secret', 'seminar_id': self.seminar.id, 'email': 'a@example.com'}
+            res = await self.async_client.post('/api/async/google-form-submit/', payload, content_type='application/json')
+            self.assertEqual(res.status_code, 201)
+            res = await self.async_client.post('/api/async/google-form-submit/', payload, content_type='application/json')
+            self.assertEqual(res.status_code, 429)
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        metrics_registry.reset()
+        self.seminar = Seminar.objects.create(title='Intro')
+        Attendance.objects.create(seminar=self.seminar, participant_email='a@example.com', time_in=timezone.now())
+
+    def metric(self, text, name, route):
+        for line in text.splitlines():
+            if line.startswith(name + '{') and f'route="{route}"' in line:
+                return float(line.rsplit(' ', 1)[1])
+        return None
+
+    def test_routes_are_recorded_with_queries_and_size(self):
+        res = self.client.get(f'/api/attendance/{self.seminar.id}/')
+        text = self.client.get('/api/metrics/').content.decode()
+        route = '/api/attendance/<int:seminar_id>/'
+        self.assertEqual(self.metric(text, 'api_request_duration_seconds_count', route), 1)
+        self.assertEqual(self.metric(text, 'api_request_db_queries_sum', route), 1)
+        self.assertEqual(self.metric(text, 'api_response_bytes_total', route), len(res.content))
+        self.assertIn('# TYPE api_request_duration_seconds histogram', text)
+
+    def test_streamed_responses_are_measured_when_finished(self):
+        res = self.client.get('/api/attendance/export/')
+        body = b''.join(res.streaming_content)
+        text = self.client.get('/api/metrics/').content.decode()
+        self.assertEqual(self.metric(text, 'api_response_bytes_total', '/api/attendance/export/'), len(body))
+        self.assertGreaterEqual(self.metric(text, 'api_request_db_queries_sum', '/api/attendance/export/'), 1)
+
+    async def test_async_views_are_measured(self):
+        await self.async_client.post('/api/async/attendance/', {
+            'seminar': self.seminar.id, 'participant_email': 'b@example.com', 'time_in': timezone.now().isoformat(),
+        }, content_type='application/json')
+        text = (await self.async_client.get('/api/metrics/')).content.decode()
+        self.assertEqual(self.metric(text, 'api_request_duration_seconds_count', '/api/async/attendance/'), 1)
+        # Queries run on the ORM's sync thread still count toward the request
+        self.assertGreaterEqual(self.metric(text, 'api_request_db_queries_sum', '/api/async/attendance/'), 2)
+
+    @override_settings(QUERY_BUDGET=1)
+    def test_requests_over_the_query_budget_are_flagged(self):
+        with self.assertLogs('api.requests', 'WARNING') as logs:
+            self.client.get(f'/api/seminars/{self.seminar.id}/stats/')
+        record = json.loads(logs.records[0].getMessage())
+        self.assertGreater(record['db_queries'], 1)
+        self.assertIn('most_repeated_query', record)
+        text = self.client.get('/api/metrics/').content.decode()
+        self.assertEqual(self.metric(text, 'api_query_budget_exceeded_total', '/api/seminars/<int:seminar_id>/stats/'), 1)
+
+    @override_settings(METRICS_TOKEN='t0ken')
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 401)
+        self.assertEqual(self.client.get('/api/metrics/', HTTP_AUTHORIZATION='Bearer t0ken').status_code, 200)
+
+
+@override_settings(GOOGLE_FORM_SECRET='secret', SSE_STREAM_SECONDS=0, SSE_POLL_SECONDS=0, SSE_EVENT_LAG_SECONDS=0)
+class AttendanceStreamTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.seminar = Seminar.objects.create(title='Intro')
+
+    def read_events(self, response):
+        events = []
+        for block in b''.join(response.streaming_content).decode().split('\n\n'):
+            fields = dict(line.split(': ', 1) for line in block.splitlines() if ': ' in line and not line.startswith(':'))
+            if 'event' in fields:
+                events.append((fields['event'], int(fields['id']), json.loads(fields['data'])))
+        return events
+
+    def test_fresh_connection_gets_a_snapshot_then_deltas_on_resume(self):
+        APIClient().post('/api/attendance/', {'seminar': self.seminar.id, 'participant_email': 'a@example.com', 'time_in': timezone.now().isoformat()}, format='json')
+        res = self.client.get(f'/api/attendance/{self.seminar.id}/stream/', HTTP_ACCEPT='text/event-stream')
+        self.assertEqual(res['Content-Type'], 'text/event-stream')
+        (kind, last_id, rows), = self.read_events(res)
+        self.assertEqual(kind, 'snapshot')
+        self.assertEqual([row['participant_email'] for row in rows], ['a@example.com'])
+
+        APIClient().post('/api/google-form-submit/', {'secret_token': 'secret', 'seminar_id': self.seminar.id, 'email': 'b@example.com'}, format='json')
+        APIClient().post('/api/attendance/bulk/', {'records': [
+            {'seminar': self.seminar.id, 'participant_email': 'a@example.com', 'time_out': timezone.now().isoformat()},
+        ]}, format='json')
+        res = self.client.get(f'/api/attendance/{self.seminar.id}/stream/', HTTP_LAST_EVENT_ID=str(last_id))
+        events = self.read_events(res)
+        self.assertEqual([(e[0], e[2]['participant_email'], e[2]['kind']) for e in events], [
+            ('attendance', 'b@example.com', 'check_in'),
+            ('attendance', 'a@example.com', 'check_out'),
+        ])
+        self.assertEqual(self.read_events(self.client.get(f'/api/attendance/{self.seminar.id}/stream/', {'last_event_id': events[-1][1]})), [])
+
+    def test_event_carries_only_the_times_the_save_wrote(self):
+        checked_in = timezone.now()
+        APIClient().post('/api/attendance/', {'seminar': self.seminar.id, 'participant_email': 'a@example.com', 'time_in': checked_in.isoformat()}, format='json')
+        APIClient().post('/api/attendance/', {'seminar': self.seminar.id, 'participant_email': 'a@example.com', 'time_out': timezone.now().isoformat()}, format='json')
+        row = Attendance.objects.get()
+        row.save()
+        self.assertEqual(
+            list(AttendanceEvent.objects.order_by('id').values_list('time_in', 'time_out')),
+            [(checked_in, None), (None, row.time_out)],
+        )
+
+    def test_pruned_events_are_replaced_by_a_snapshot_on_resume(self):
+        Attendance.objects.create(seminar=self.seminar, participant_email='a@example.com', time_in=timezone.now())
+        last_id = AttendanceEvent.objects.get().id
+        AttendanceEvent.objects.update(created_at=timezone.now() - timedelta(days=2))
+        out = StringIO()
+        call_command('prune_attendance_events', stdout=out)
+        self.assertIn('Deleted 1 attendance events', out.getvalue())
+
+        res = self.client.get(f'/api/attendance/{self.seminar.id}/stream/', HTTP_LAST_EVENT_ID=str(last_id))
+        (kind, _, rows), = self.read_events(res)
+        self.assertEqual(kind, 'snapshot')
+        self.assertEqual([row['participant_email'] for row in rows], ['a@example.com'])
+
+    @override_settings(SSE_EVENT_LAG_SECONDS=60)
+    def test_event_committed_behind_the_cursor_is_still_sent(self):
+        now = timezone.now()
+        late, sent = AttendanceEvent.objects.bulk_create([
+            AttendanceEvent(seminar=self.seminar, participant_email='late@example.com', time_in=now),
+            AttendanceEvent(seminar=self.seminar, participant_email='b@example.com', time_in=now),
+        ])
+        # The client has the higher id but never saw the lower one, whose transaction committed later
+        res = self.client.get(f'/api/attendance/{self.seminar.id}/stream/', {'last_event_id': sent.id})
+        events = self.read_events(res)
+        self.assertEqual([(e[2]['participant_email'], e[1]) for e in events], [
+            ('late@example.com', sent.id), ('b@example.com', sent.id),
+        ])
+
+    def test_events_stay_within_their_seminar(self):
+        other = Seminar.objects.create(title='Other')
+        Attendance.objects.create(seminar=other, participant_email='a@example.com', time_in=timezone.now())
+        res = self.client.get(f'/api/attendance/{self.seminar.id}/stream/', {'last_event_id': 0})
+        self.assertEqual(self.read_events(res), [])
+        self.assertEqual(AttendanceEvent.objects.filter(seminar=other).count(), 1)
+        self.assertEqual(self.client.get('/api/attendance/999999/stream/').status_code, 404)
+
+    async def test_async_stream(self):
+        await Attendance.objects.acreate(seminar=self.seminar, participant_email='a@example.com', time_in=timezone.now())
+        res = await self.async_client.get(f'/api/async/attendance/{self.seminar.id}/stream/', {'last_event_id': 0})
+        body = b''.join([chunk async for chunk in res.streaming_content]).decode()
+        self.assertIn('event: attendance', body)
+        self.assertIn('a@example.com', body)
+
+
+@override_settings(SYNC_CURSOR_LAG_SECONDS=0)
+class SyncTests(TestCase):
+    def setUp(self):
+        self.seminar = Seminar.objects.create(title='Intro', questions=[{'id': 'q1'}])
+
+    def pull(self, cursor=None):
+        res = APIClient().get('/api/sync/', {'since': cursor} if cursor else {})
+        self.assertEqual(res.status_code, 200)
+        return res.json()
+
+    def test_changes_and_deletions_since_cursor(self):
+        attendance = Attendance.objects.create(seminar=self.seminar, participant_email='a@example.com', time_in=timezone.now())
+        with self.assertNumQueries(5):
+            body = self.pull()
+        self.assertFalse(body['has_more'])
+        self.assertEqual(body['changes']['seminars'][0]['questions'], [{'id': 'q1'}])
+        self.assertEqual([row['id'] for row in body['changes']['attendance']], [attendance.id])
+        self.assertEqual(self.pull(body['cursor'])['changes']['attendance'], [])
+
+        # The bulk path stamps updated_at although bulk_update skips auto_now
+        cursor = body['cursor']
+        APIClient().post('/api/attendance/bulk/', {'records': [
+            {'seminar': self.seminar.id, 'participant_email': 'a@example.com', 'time_out': timezone.now().isoformat()},
+        ]}, format='json')
+        body = self.pull(cursor)
+        self.assertEqual([row['id'] for row in body['changes']['attendance']], [attendance.id])
+        self.assertIsNotNone(body['changes']['attendance'][0]['time_out'])
+        self.assertEqual(body['changes']['seminars'], [])
+
+        seminar_id = self.seminar.id
+        self.seminar.delete()
+        body = self.pull(body['cursor'])
+        self.assertEqual(body['deleted']['seminars'], [seminar_id])
+        self.assertEqual(body['deleted']['attendance'], [attendance.id])
+        self.assertEqual(self.pull(body['cursor'])['deleted']['seminars'], [])
+
+    def test_seminar_delete_writes_child_tombstones_in_one_insert(self):
+        from django.test.utils import CaptureQueriesContext
+        for n in range(3):
+            Attendance.objects.create(seminar=self.seminar, participant_email=f'p{n}@example.com')
+            JoinedParticipant.objects.create(seminar=self.seminar, participant_email=f'p{n}@example.com')
+        with CaptureQueriesContext(connection) as ctx:
+            self.seminar.delete()
+        inserts = [q for q in ctx.captured_queries if q['sql'].startswith('INSERT INTO "api_tombstone"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(
+            sorted(Tombstone.objects.values_list('collection', flat=True)),
+            ['attendance'] * 3 + ['joined_participants'] * 3 + ['seminars'],
+        )
+
+    @override_settings(SYNC_PAGE_SIZE=2)
+    def test_pages_until_caught_up(self):
+        for n in range(5):
+            JoinedParticipant.objects.create(seminar=self.seminar, participant_email=f'p{n}@example.com')
+        seen, cursor, more = [], None, True
+        while more:
+            body = self.pull(cursor)
+            seen += [row['participant_email'] for row in body['changes']['joined_participants']]
+            cursor, more = body['cursor'], body['has_more']
+        self.assertEqual(seen, [f'p{n}@example.com' for n in range(5)])
+
+    @override_settings(SYNC_CURSOR_LAG_SECONDS=60)
+    def test_recent_rows_are_resent_within_the_lag(self):
+        Evaluation.objects.create(seminar=self.seminar, participant_email='a@example.com', answers={'q1': 5})
+        body = self.pull()
+        self.assertEqual(len(self.pull(body['cursor'])['changes']['evaluations']), 1)
+
+    def test_invalid_cursor(self):
+        self.assertEqual(APIClient().get('/api/sync/', {'since': 'nope'}).status_code, 400)
+
+    def test_push_upserts_offline_writes(self):
+        Evaluation.objects.create(seminar=self.seminar, participant_email='a@example.com', answers={'q1': 1})
+        JoinedParticipant.objects.create(seminar=self.seminar, participant_email='a@example.com', participant_name='Ann')
+        now = timezone.now().isoformat()
+        res = APIClient().post('/api/sync/', {
+            'attendance': [{'seminar': self.seminar.id, 'participant_email': 'a@example.com', 'time_in': now}],
+            'joined_participants': [
+                {'seminar': self.seminar.id, 'participant_email': 'a@example.com', 'present': True, 'check_in': now},
+                {'seminar': self.seminar.id, 'participant_email': 'b@example.com', 'participant_name': 'Ben'},
+                {'seminar': 999999, 'participant_email': 'c@example.com'},
+            ],
+            'evaluations': [
+                {'seminar': self.seminar.id, 'participant_email': 'a@example.com', 'answers': {'q1': 5}},
+                {'seminar': self.seminar.id, 'participant_email': 'not-an-email', 'answers': {}},
+            ],
+        }, format='json')
+        self.assertEqual(res.status_code, 200)
+        body = res.json()
+        self.assertEqual((body['created'], body['updated'], body['failed']), (2, 2, 2))
+        self.assertEqual([r['status'] for r in body['results']['joined_participants']], ['updated', 'created', 'error'])
+        self.assertEqual(body['results']['evaluations'][0]['data']['answers'], {'q1': 5})
+
+        joined = JoinedParticipant.objects.get(seminar=self.seminar, participant_email='a@example.com')
+        self.assertEqual(joined.participant_name, 'Ann')  # left out of the push, so kept
+        self.assertTrue(joined.present)
+        self.assertEqual(Evaluation.objects.get(participant_email='a@example.com').answers, {'q1': 5})
+        self.assertTrue(Attendance.objects.filter(seminar=self.seminar, participant_email='a@example.com').exists())
+
+    def test_push_rejects_unknown_collections(self):
+        res = APIClient().post('/api/sync/', {'seminars': [{'title': 'Offline'}]}, format='json')
+        self.assertEqual(res.status_code, 400)
+
+
+class RosterImportTests(TestCase):
+    def setUp(self):
+        self.seminar = Seminar.objects.create(title='Intro')
+
+    def roster(self, emails, header='Timestamp,Email Address,Name,Year & Section'):
+        lines = [header] + [f'2025-01-01,{email},Student {i},3A' for i, email in enumerate(emails)]
+        return ('\r\n'.join(lines) + '\r\n').encode('utf-8-sig')
+
+    def upload(self, content, name='roster.csv'):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        return APIClient().post(
+            f'/api/seminars/{self.seminar.id}/roster/', {'file': SimpleUploadedFile(name, content)}, format='multipart',
+        )
+
+    def test_import_counts_inserted_skipped_and_invalid(self):
+        JoinedParticipant.objects.create(seminar=self.seminar, participant_email='a@example.com', participant_name='Ann')
+        res = self.upload(self.roster(['a@example.com', 'b@example.com', 'not-an-email', 'b@example.com', 'c@example.com']))
+        self.assertEqual(res.status_code, 200)
+        body = res.json()
+        self.assertEqual((body['inserted'], body['skipped'], body['invalid']), (2, 2, 1))
+        self.assertEqual(body['errors'], [{'row': 4, 'error': "Invalid email: 'not-an-email'"}])
+        self.assertEqual(JoinedParticipant.objects.get(participant_email='a@example.com').participant_name, 'Ann')
+        joined = JoinedParticipant.objects.get(participant_email='b@example.com')
+        self.assertEqual((joined.participant_name, joined.metadata), ('Student 1', {'year_section': '3A'}))
+
+    def test_queries_do_not_grow_with_rows_in_a_chunk(self):
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as small:
+            self.upload(self.roster([f'a{i}@example.com' for i in range(10)]))
+        with CaptureQueriesContext(connection) as large:
+            # Stays under SQLite's 999 parameters per INSERT, above which bulk_create splits batches
+            self.upload(self.roster([f'b{i}@example.com' for i in range(90)]))
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(JoinedParticipant.objects.filter(seminar=self.seminar).count(), 100)
+
+    def test_unreadable_rosters(self):
+        self.assertEqual(self.upload(self.roster(['a@example.com'], header='Name,Section')).status_code, 400)
+        self.assertEqual(self.upload(b'').status_code, 400)
+        self.assertEqual(APIClient().post(f'/api/seminars/{self.seminar.id}/roster/', {}, format='multipart').status_code, 400)
+        self.assertEqual(APIClient().post('/api/seminars/999999/roster/', {}, format='multipart').status_code, 404)
+
+    @override_settings(ROSTER_IMPORT_CHUNK_SIZE=2)
+    def test_read_error_partway_reports_the_imported_chunks(self):
+        content = self.roster([f'p{i}@example.com' for i in range(3)]) + '2025-01-01,bad\xe9@example.com,X,3A\r\n'.encode('latin-1')
+        res = self.upload(content)
+        self.assertEqual(res.status_code, 400)
+        body = res.json()
+        self.assertIn('after row', body['error'])
+        self.assertEqual(body['inserted'], JoinedParticipant.objects.filter(seminar=self.seminar).count())
+        self.assertGreater(body['inserted'], 0)
+
+    def test_management_command(self):
+        with tempfile.NamedTemporaryFile(suffix='.csv') as roster:
+            roster.write(self.roster([f'p{i}@example.com' for i in range(5)]))
+            roster.flush()
+            out = StringIO()
+            call_command('import_roster', self.seminar.id, roster.name, chunk_size=2, stdout=out)
+        self.assertIn('Inserted 5, skipped 0, invalid 0', out.getvalue())
+        self.assertEqual(JoinedParticipant.objects.filter(seminar=self.seminar).count(), 5)
+
+
+class EvaluationAnalyticsTests(TestCase):
+    QUESTIONS = [
+        {'id': 'q1', 'type': 'select', 'question': 'Clarity', 'options': ['Excellent', 'Good', 'Average', 'Poor']},
+        {'id': 'q2', 'type': 'rating', 'question': 'Overall'},
+        {'id': 'q3', 'type': 'text', 'question': 'Suggestions'},
+    ]
+
+    def setUp(self):
+        cache.clear()
+        self.first = Seminar.objects.create(title='Intro', speaker='Ada', semester='1', questions=self.QUESTIONS)
+        self.second = Seminar.objects.create(title='Advanced', speaker='Bob', semester='1', questions=self.QUESTIONS)
+        Seminar.objects.create(title='Later', speaker='Ada', semester='2', questions=self.QUESTIONS)
+        answers = [
+            (self.first, {'q1': 'Excellent', 'q2': 5, 'q3': 'More demos please', 'feedback': 'Great demos'}),
+            (self.first, {'q1': 'Good', 'q2': '4', 'q3': ''}),
+            (self.first, {'q1': 'Poor', 'q2': 1.0, 'q3': 'Too long'}),
+            (self.second, {'q1': 'Average', 'q2': 3, 'feedback': 'Slides were too small'}),
+            (self.second, {'q1': 'Unknown option', 'q2': 9}),
+        ]
+        for n, (seminar, answer) in enumerate(answers):
+            Evaluation.objects.create(seminar=seminar, participant_email=f'p{n}@example.com', answers=answer)
+
+    def test_seminar_report(self):
+        res = APIClient().get(f'/api/seminars/{self.first.id}/analytics/')
+        self.assertEqual(res.status_code, 200)
+        seminar, = res.json()['seminars']
+        clarity, overall = seminar['questions']
+        self.assertEqual(clarity['distribution'], {'Poor': 1, 'Average': 0, 'Good': 1, 'Excellent': 1})
+        self.assertEqual((clarity['answered'], clarity['mean'], clarity['scale']), (3, round(8 / 3, 3), 4))
+        self.assertEqual((overall['answered'], overall['mean']), (3, round(10 / 3, 3)))
+        words = {row['word']: row['count'] for row in res.json()['words']}
+        self.assertEqual(words['demos'], 2)
+        self.assertNotIn('too', words)
+        self.assertEqual(APIClient().get('/api/seminars/999999/analytics/').status_code, 404)
+
+    def test_semester_report_compares_speakers(self):
+        body = APIClient().get('/api/analytics/evaluations/', {'semester': '1'}).json()
+        self.assertEqual(body['evaluations'], 5)
+        self.assertEqual([s['title'] for s in body['seminars']], ['Intro', 'Advanced'])
+        self.assertEqual([s['speaker'] for s in body['speakers']], ['Ada', 'Bob'])
+        # Out-of-scale answers are ignored: Bob has one Average (1/3) and one 3/5 (0.5)
+        self.assertEqual(body['speakers'][1]['satisfaction'], round((1 / 3 + 0.5) / 2, 4))
+
+    def test_counts_are_cached_per_seminar_until_evaluations_change(self):
+        client = APIClient()
+        client.get('/api/analytics/evaluations/', {'semester': '1'})
+        with self.assertNumQueries(1):
+            client.get('/api/analytics/evaluations/', {'semester': '1'})
+        Evaluation.objects.create(seminar=self.second, participant_email='new@example.com', answers={'q1': 'Excellent'})
+        # Only the changed seminar is recomputed: seminar ids, its row, its evaluations
+        with self.assertNumQueries(3):
+            body = client.get('/api/analytics/evaluations/', {'semester': '1'}).json()
+        self.assertEqual(body['evaluations'], 6)
+
+
+class AdmissionConcurrencyTests(TransactionTestCase):
+    def test_parallel_joins_never_overbook(self):
+        seminar = Seminar.objects.create(title='Intro', capacity=25)
+        workers = 200
+        barrier = threading.Barrier(workers)
+        statuses = []
+
+        def worker(i):
+            try:
+                barrier.wait()
+                res = APIClient().post(
+                    '/api/joined-participants/', {'seminar': seminar.id, 'participant_email': f'p{i}@example.com'}, format='json',
+                )
+                statuses.append(res.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(statuses), [201] * 25 + [409] * 175)
+        self.assertEqual(JoinedParticipant.objects.filter(seminar=seminar).count(), 25)
+        seminar.refresh_from_db()
+        self.assertEqual(seminar.joined_count, 25)
+
+
+@override_settings(GOOGLE_FORM_SECRET='secret')
+class AdmissionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.seminar = Seminar.objects.create(title='Intro', capacity=2, waitlist_enabled=True)
+
+    def join(self, email, **extra):
+        return self.client.post('/api/joined-participants/', {'seminar': self.seminar.id, 'participant_email': email, **extra}, format='json')
+
+    def statuses(self):
+        return dict(JoinedParticipant.objects.filter(seminar=self.seminar).values_list('participant_email', 'status'))
+
+    def test_waitlist_is_promoted_when_seats_free_up(self):
+        for email in ('a@example.com', 'b@example.com', 'c@example.com', 'd@example.com'):
+            self.assertEqual(self.join(email, present=True).status_code, 201)
+        waiting = JoinedParticipant.objects.get(participant_email='c@example.com')
+        self.assertEqual((waiting.status, waiting.present), (JoinedParticipant.WAITLISTED, False))
+
+        JoinedParticipant.objects.get(participant_email='a@example.com').delete()
+        self.assertEqual(self.statuses(), {'b@example.com': 'joined', 'c@example.com': 'joined', 'd@example.com': 'waitlisted'})
+
+        self.seminar.capacity = 10
+        self.seminar.save()
+        self.assertEqual(set(self.statuses().values()), {'joined'})
+        res = self.client.get(f'/api/seminars/{self.seminar.id}/admission/').json()
+        self.assertEqual(
+            res,
+            {'seminar_id': self.seminar.id, 'capacity': 10, 'joined': 3, 'present': 1, 'available': 7,
+             'waitlist_enabled': True, 'waitlisted': 0},
+        )
+
+    def test_full_seminar_without_waitlist_refuses_joins(self):
+        Seminar.objects.filter(pk=self.seminar.pk).update(waitlist_enabled=False, capacity=1)
+        self.assertEqual(self.join('a@example.com').status_code, 201)
+        self.assertEqual(self.join('b@example.com').status_code, 409)
+        # A repeated join still fails the unique check, not the capacity check
+        self.assertEqual(self.join('a@example.com').status_code, 400)
+        self.assertEqual(self.client.get('/api/seminars/999999/admission/').status_code, 404)
+
+    def test_form_checkins_respect_capacity(self):
+        def submit(email):
+            payload = {'secret_token': 'secret', 'seminar_id': self.seminar.id, 'email': email, 'name': 'Ann', 'year_section': '3A'}
+            return self.client.post('/api/google-form-submit/', payload, format='json')
+
+        self.assertEqual([submit(f'p{i}@example.com').status_code for i in range(3)], [201, 201, 202])
+        self.assertEqual(Attendance.objects.filter(seminar=self.seminar).count(), 2)
+        Seminar.objects.filter(pk=self.seminar.pk).update(waitlist_enabled=False)
+        self.assertEqual(submit('late@example.com').status_code, 409)
+        self.seminar.refresh_from_db()
+        self.assertEqual((self.seminar.joined_count, self.seminar.present_count), (2, 2))
+
+        # Checking in a joined, absent participant moves the counter by exactly one
+        self.join('absent@example.com')
+        Seminar.objects.filter(pk=self.seminar.pk).update(capacity=None)
+        self.assertEqual([submit(email).status_code for email in ('absent@example.com', 'p0@example.com')], [201, 201])
+        self.seminar.refresh_from_db()
+        self.assertEqual((self.seminar.joined_count, self.seminar.present_count), (3, 3))
+
+    def test_saves_that_do_not_affect_admission_skip_the_recount(self):
+        participant = JoinedParticipant.objects.create(seminar=self.seminar, participant_email='a@example.com')
+        participant = JoinedParticipant.objects.get(pk=participant.pk)
+        participant.participant_name = 'Ann'
+        with self.assertNumQueries(1):
+            participant.save()
+        participant.present = True
+        with self.assertNumQueries(5):  # save, recount, waitlist promotion in a savepoint
+            participant.save()
+        self.seminar.refresh_from_db()
+        self.assertEqual(self.seminar.present_count, 1)
+
+        self.seminar.title = 'Renamed'
+        with self.assertNumQueries(1):
+            self.seminar.save()
+
+    def test_bulk_paths_respect_capacity(self):
+        Seminar.objects.filter(pk=self.seminar.pk).update(waitlist_enabled=False)
+        pushed = self.client.post('/api/sync/', {'joined_participants': [
+            {'seminar': self.seminar.id, 'participant_email': f's{i}@example.com', 'present': True} for i in range(3)
+        ]}, format='json').json()
+        self.assertEqual([result['status'] for result in pushed['results']['joined_participants']], ['created', 'created', 'error'])
+        self.assertEqual(pushed['results']['joined_participants'][2]['errors'], {'seminar': ['Seminar is full']})
+
+        Seminar.objects.filter(pk=self.seminar.pk).update(waitlist_enabled=True, capacity=3)
+        result = roster.import_roster(self.seminar.id, [(2, {'participant_email': 'r1@example.com'}), (3, {'participant_email': 'r2@example.com'})])
+        self.assertEqual((result['inserted'], result['waitlisted'], result['full']), (2, 1, 0))
+        self.seminar.refresh_from_db()
+        self.assertEqual((self.seminar.joined_count, self.seminar.present_count), (3, 2))
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.intro = Seminar.objects.create(title='Intro to Databases', speaker='Dr. Reyes')
+        self.cloud = Seminar.objects.create(title='Cloud Basics', speaker='Ms. Santos')
+        # bulk_create sends no signals; the index is kept by triggers
+        JoinedParticipant.objects.bulk_create([
+            JoinedParticipant(seminar=self.intro, participant_email='john.smith@example.com', participant_name='John Smith'),
+            JoinedParticipant(seminar=self.cloud, participant_email='maria.cruz@school.edu', participant_name='Maria dela Cruz'),
+        ])
+
+    def search(self, q):
+        return self.client.get('/api/search/', {'q': q}).json()
+
+    def emails(self, q):
+        return [row['participant_email'] for row in self.search(q)['participants']]
+
+    def test_substring_search(self):
+        self.assertEqual(self.emails('smith@ex'), ['john.smith@example.com'])
+        self.assertEqual(self.emails('DELA CRUZ'), ['maria.cruz@school.edu'])
+        self.assertEqual([row['title'] for row in self.search('reyes datab')['seminars']], ['Intro to Databases'])
+        self.assertEqual(self.search('"quoted" OR *')['seminars'], [])
+        # Two-letter terms have no trigrams and use the LIKE fallback
+        self.assertEqual(self.emails('jo'), ['john.smith@example.com'])
+        self.assertEqual(self.client.get('/api/search/').status_code, 400)
+
+    def test_index_follows_updates_and_deletes(self):
+        JoinedParticipant.objects.filter(participant_email='john.smith@example.com').update(participant_email='j.smythe@example.com')
+        self.assertEqual(self.emails('smith@ex'), [])
+        self.assertEqual(self.emails('smythe'), ['j.smythe@example.com'])
+        self.cloud.delete()
+        self.assertEqual(self.emails('cruz'), [])
+        self.assertEqual(self.search('cloud')['seminars'], [])
+
+    def test_admin_search_uses_the_index(self):
+        from django.contrib.auth.models import User
+        from django.test.utils import CaptureQueriesContext
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get('/admin/api/joinedparticipant/', {'q': 'smith@ex'})
+        self.assertContains(res, 'john.smith@example.com')
+        self.assertNotContains(res, 'maria.cruz@school.edu')
+        self.assertTrue(any('MATCH' in query['sql'] for query in queries))
+
+
+class AdminChangelistTests(TestCase):
+    URLS = (
+        '/admin/api/joinedparticipant/',
+        '/admin/api/attendance/',
+        '/admin/api/evaluation/',
+        '/admin/api/certificate/',
+    )
+
+    def setUp(self):
+        from django.contrib.auth.models import User
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+
+    def seed(self, n):
+        now = timezone.now()
+        for seminar in Seminar.objects.bulk_create(Seminar(title=f'Seminar {i}', questions=[]) for i in range(n)):
+            emails = [f'p{i}@example.com' for i in range(n)]
+            JoinedParticipant.objects.bulk_create(JoinedParticipant(seminar=seminar, participant_email=e) for e in emails)
+            Attendance.objects.bulk_create(Attendance(seminar=seminar, participant_email=e, time_in=now) for e in emails)
+            Evaluation.objects.bulk_create(Evaluation(seminar=seminar, participant_email=e, answers={}) for e in emails)
+            Certificate.objects.bulk_create(
+                Certificate(seminar=seminar, participant_email=e, certificate_number=f'C-{seminar.pk}-{e}') for e in emails
+            )
+
+    def page_queries(self):
+        """Queries per changelist page, unfiltered and filtered to the first seminar"""
+        from django.test.utils import CaptureQueriesContext
+        seminar_id = Seminar.objects.order_by('id').first().pk
+        counts = {}
+        for url in self.URLS:
+            for params in ({}, {'seminar__id__exact': seminar_id}):
+                with CaptureQueriesContext(connection) as queries:
+                    res = self.client.get(url, params)
+                self.assertContains(res, 'Seminar 0')
+                counts[url, bool(params)] = len(queries)
+        return counts
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        # Session, user, seminar filter choices, COUNT and the page rows (seminar joined in);
+        # an unfiltered page first reads the row estimate, which is too small to use here
+        self.seed(3)
+        small = self.page_queries()
+        self.assertEqual(set(small.values()), {5, 6})
+        self.seed(12)
+        self.assertEqual(self.page_queries(), small)
+
+    def test_large_unfiltered_tables_use_estimated_counts(self):
+        from .admin import EXACT_COUNT_THRESHOLD, EstimatedCountPaginator
+        self.seed(2)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+            cursor.execute("UPDATE sqlite_stat1 SET stat = %s WHERE tbl = 'api_attendance'", [f'{EXACT_COUNT_THRESHOLD * 5} 1'])
+        self.assertEqual(EstimatedCountPaginator(Attendance.objects.order_by('id'), 100).count, EXACT_COUNT_THRESHOLD * 5)
+        self.assertEqual(EstimatedCountPaginator(Attendance.objects.filter(participant_email='p0@example.com').order_by('id'), 100).count, 2)
+        self.assertEqual(EstimatedCountPaginator(Evaluation.objects.order_by('id'), 100).count, 4)
+
+    def test_closing_a_connection_refreshes_planner_statistics(self):
+        import sqlite3
+        from .backends.sqlite3.base import DatabaseWrapper
+        with tempfile.TemporaryDirectory() as tmp:
+            path = str(Path(tmp) / 'optimize.sqlite3')
+            wrapper = DatabaseWrapper({**connections.settings['default'], 'NAME': path}, alias='optimize')
+            with wrapper.cursor() as cursor:
+                cursor.execute('CREATE TABLE t (id INTEGER PRIMARY KEY, a TEXT)')
+                cursor.execute('CREATE INDEX t_a ON t (a)')
+                cursor.executemany('INSERT INTO t (a) VALUES (%s)', [(str(n % 50),) for n in range(2000)])
+                cursor.execute("SELECT COUNT(*) FROM t WHERE a = '3'")
+            wrapper.close()
+            with sqlite3.connect(path) as db:
+                (stat,), = db.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = 't'").fetchall()
+            self.assertGreater(int(stat.split()[0]), 0)
+
+
+class RenderingTests(TestCase):
+    def test_fast_renderer_matches_drf_output(self):
+        from decimal import Decimal
+        from rest_framework.renderers import JSONRenderer
+        from .renderers import FastJSONRenderer
+        data = {
+            'when': timezone.now(),
+            'day': timezone.now().date(),
+            'score': Decimal('4.5'),
+            'name': 'José   dela Cruz',
+            1: ('a', 'b'),
+            'nested': [{'none': None, 'big': 2 ** 70}],
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_json_bodies_are_parsed(self):
+        seminar = Seminar.objects.create(title='Intro')
+        client = APIClient()
+        res = client.post('/api/evaluations/', {'seminar': seminar.id, 'participant_email': 'a@example.com', 'answers': {'q1': 'José'}}, format='json')
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(Evaluation.objects.get().answers, {'q1': 'José'})
+        from rest_framework.exceptions import ParseError
+        from .parsers import FastJSONParser
+        self.assertEqual(FastJSONParser().parse(io.BytesIO('{"name": "José"}'.encode())), {'name': 'José'})
+        for body in (b'{"score": NaN}', b'{"seminar": 1'):
+            with self.assertRaises(ParseError):
+                FastJSONParser().parse(io.BytesIO(body))
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command('benchmark_rendering', rows=20, repeat=1, stdout=out)
+        self.assertIn('joined participants', out.getvalue())
+
+
+class CompressionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Seminar.objects.bulk_create(Seminar(title=f'Seminar {i}', speaker='Dr. Reyes') for i in range(40))
+
+    def test_negotiation(self):
+        from .compression import negotiate
+        offered = ['zstd', 'br', 'gzip']
+        self.assertEqual(negotiate('gzip, deflate, br, zstd', offered), 'zstd')
+        self.assertEqual(negotiate('br;q=1.0, gzip;q=0.5', offered), 'br')
+        self.assertEqual(negotiate('*;q=0.1, gzip', offered), 'gzip')
+        self.assertEqual(negotiate('gzip;q=0, identity', offered), None)
+        self.assertEqual(negotiate('', offered), None)
+
+    def test_catalog_is_gzipped_and_revalidates(self):
+        import gzip
+        client = APIClient()
+        plain = client.get('/api/seminars/')
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', plain['Vary'])
+
+        with override_settings(COMPRESSION_ENCODINGS=['gzip']):
+            res = client.get('/api/seminars/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(res.content), plain.content)
+        self.assertEqual(res['ETag'], 'W/' + plain['ETag'])
+        self.assertEqual(client.get('/api/seminars/', HTTP_IF_NONE_MATCH=res['ETag']).status_code, 304)
+
+    def test_small_and_streaming_responses_are_not_compressed(self):
+        client = APIClient()
+        self.assertFalse(client.get('/api/health/', HTTP_ACCEPT_ENCODING='gzip').has_header('Content-Encoding'))
+        seminar = Seminar.objects.first()
+        with override_settings(SSE_STREAM_SECONDS=0):
+            res = client.get(f'/api/attendance/{seminar.id}/stream/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertTrue(res.streaming)
+        self.assertFalse(res.has_header('Content-Encoding'))
+
+
+@override_settings(GOOGLE_FORM_SECRET='secret', WEBHOOK_IP_RATE=0, WEBHOOK_SEMINAR_RATE=0)
+class EventDayBenchmarkTests(TransactionTestCase):
+    scenario = {
+        'semesters': 2, 'seminars_per_semester': 3, 'participants': 60, 'past_attendees': 20,
+        'attendees': 40, 'polls': 20, 'exports': 1, 'workers': 4, 'seed': 1,
+    }
+
+    def setUp(self):
+        cache.clear()
+
+    def test_replay_covers_the_event_day_without_errors(self):
+        from .management.commands.benchmark_event_day import replay
+        report = replay(self.scenario)
+
+        self.assertEqual(report['scenario'], self.scenario)
+        self.assertEqual(list(report['phases']), ['catalog polling', 'check-in burst', 'scanner check-outs', 'evaluation rush', 'admin exports'])
+        self.assertEqual({label: row['errors'] for label, row in report['endpoints'].items() if row['errors']}, {})
+        self.assertEqual(report['endpoints']['POST /api/google-form-submit/']['count'], 40)
+        self.assertLessEqual(report['endpoints']['GET /api/seminars/']['p50_ms'], report['endpoints']['GET /api/seminars/']['p99_ms'])
+
+        event = Seminar.objects.get(title__startswith='General Assembly')
+        self.assertEqual(Attendance.objects.filter(seminar=event, time_out__isnull=False).count(), 36)
+        self.assertEqual(Evaluation.objects.filter(seminar=event).count(), 27)
+        self.assertEqual(Seminar.objects.get(pk=event.pk).joined_count, 40)
+
+    def test_compare_flags_regressions(self):
+        from .management.commands.benchmark_event_day import compare
+        row = {'count': 100, 'errors': 0, 'rps': 100.0, 'p50_ms': 5.0, 'p95_ms': 10.0, 'p99_ms': 20.0}
+        baseline = {'scenario': self.scenario, 'endpoints': {'GET /api/seminars/': row}}
+
+        def run(**changes):
+            return {'scenario': self.scenario, 'endpoints': {'GET /api/seminars/': dict(row, **changes)}}
+
+        self.assertEqual(compare(run(p95_ms=15.9, rps=60.0), baseline, 0.5, 1.0), [])
+        self.assertEqual(len(compare(run(p95_ms=16.1, p99_ms=40.0, rps=40.0), baseline, 0.5, 1.0)), 2)
+        self.assertEqual(len(compare(run(count=200, p99_ms=40.0), baseline, 0.5, 1.0)), 1)
+        self.assertEqual(len(compare(run(errors=2), baseline, 0.5, 1.0)), 1)
+        self.assertIn('scenario differs', compare(dict(run(), scenario={'seed': 2}), baseline, 0.5, 1.0)[0])
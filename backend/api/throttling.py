@@ -0,0 +1,110 @@
+"""Cache-backed token buckets and a short-lived idempotency cache for the public webhook.
+
+Buckets are read and written with plain cache get/set, so concurrent requests in
+different processes can occasionally overdraw a bucket by a token or two; that
+is fine for shedding load. A rate of 0 disables a bucket.
+
+Identical submissions are coalesced: the first one takes an in-flight marker with
+an atomic ``cache.add``; a duplicate gets the stored response once there is one,
+and is told to retry (409) while the first is still running rather than waiting
+on a request thread.
+"""
+import hashlib
+import json
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+class TokenBucket:
+    """``burst`` tokens refilled at ``rate`` tokens per second, one bucket per identifier"""
+
+    def __init__(self, scope, rate, burst):
+        self.scope = scope
+        self.rate = rate
+        self.burst = max(burst, 1)
+
+    def consume(self, ident):
+        """Take one token; returns 0 when allowed, otherwise the seconds until a token is available"""
+        if self.rate <= 0:
+            return 0
+        key = f'api:throttle:{self.scope}:{ident}'
+        now = time.time()
+        tokens, updated = cache.get(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens < 1:
+            cache.set(key, (tokens, now), timeout=self.idle_timeout())
+            return (1 - tokens) / self.rate
+        cache.set(key, (tokens - 1, now), timeout=self.idle_timeout())
+        return 0
+
+    def idle_timeout(self):
+        # An untouched bucket is full again after burst / rate seconds, so it can be dropped
+        return math.ceil(self.burst / self.rate) + 1
+
+
+def client_ip(request):
+    """Source address, taking the first X-Forwarded-For hop when running behind a proxy"""
+    if settings.WEBHOOK_TRUST_X_FORWARDED_FOR:
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+        if forwarded:
+            return forwarded.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def ip_bucket():
+    return TokenBucket('webhook-ip', settings.WEBHOOK_IP_RATE, settings.WEBHOOK_IP_BURST)
+
+
+def seminar_bucket():
+    return TokenBucket('webhook-seminar', settings.WEBHOOK_SEMINAR_RATE, settings.WEBHOOK_SEMINAR_BURST)
+
+
+def idempotency_key(seminar_id, email, data):
+    """Cache key for one submission: the same seminar, email and payload map to the same key"""
+    payload = {field: value for field, value in data.items() if field != 'secret_token'}
+    digest = hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+    return f'api:webhook:seen:{seminar_id}:{email}:{digest}'
+
+
+# Value of an idempotency key while the first submission is being processed, and how long the
+# marker outlives a request that died without storing a response
+PENDING = 'pending'
+PENDING_TIMEOUT = 30
+
+# Returned by ``begin`` while an identical submission is still being processed
+IN_FLIGHT = object()
+
+
+def begin(key):
+    """Claim a submission or coalesce it with an identical one, without waiting.
+
+    Returns None when this request should process it (and then call ``remember`` or
+    ``forget``); otherwise the (status, body) the identical submission got, or
+    IN_FLIGHT when it has not finished yet.
+    """
+    if settings.WEBHOOK_IDEMPOTENCY_WINDOW <= 0:
+        return None
+    if cache.add(key, PENDING, timeout=PENDING_TIMEOUT):
+        return None
+    value = cache.get(key)
+    # Released in between (the first request gave up, e.g. the seminar was full): claim it once more
+    if value is None and cache.add(key, PENDING, timeout=PENDING_TIMEOUT):
+        return None
+    if value is None or value == PENDING:
+        return IN_FLIGHT
+    return value
+
+
+def remember(key, status, body):
+    """Store the response of a claimed submission for duplicates within the idempotency window"""
+    if settings.WEBHOOK_IDEMPOTENCY_WINDOW > 0:
+        cache.set(key, (status, body), timeout=settings.WEBHOOK_IDEMPOTENCY_WINDOW)
+
+
+def forget(key):
+    """Release a claimed submission whose response must not be replayed (waiting duplicates then run themselves)"""
+    if cache.get(key) == PENDING:
+        cache.delete(key)
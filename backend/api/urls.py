@@ -1,17 +1,39 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 
 urlpatterns = [
     path('health/', views.health_check, name='health-check'),
     path('seminars/', views.seminars, name='seminars'),
     path('seminars/<int:seminar_id>/', views.seminars, name='seminar-detail'),
+    path('seminars/<int:seminar_id>/stats/', views.seminar_stats, name='seminar-stats'),
+    path('seminars/<int:seminar_id>/analytics/', views.seminar_analytics, name='seminar-analytics'),
+    path('seminars/<int:seminar_id>/admission/', views.seminar_admission, name='seminar-admission'),
+    path('seminars/<int:seminar_id>/roster/', views.roster_import, name='seminar-roster-import'),
+    path('seminars/<int:seminar_id>/certificates/generate/', views.certificate_job, name='seminar-certificate-job'),
+    path('search/', views.search, name='search'),
+    path('analytics/evaluations/', views.evaluation_analytics, name='evaluation-analytics'),
     path('attendance/', views.attendance, name='attendance'),
+    path('attendance/bulk/', views.attendance_bulk, name='attendance-bulk'),
     path('attendance/<int:seminar_id>/', views.attendance, name='attendance-detail'),
+    path('attendance/<int:seminar_id>/stream/', views.attendance_stream, name='attendance-stream'),
+    path('attendance/export/', views.export, {'resource': 'attendance'}, name='attendance-export'),
+    path('attendance/<int:seminar_id>/export/', views.export, {'resource': 'attendance'}, name='attendance-export-detail'),
     path('joined-participants/', views.joined_participants, name='joined-participants'),
     path('joined-participants/<int:seminar_id>/', views.joined_participants, name='joined-participants-detail'),
     path('evaluations/', views.evaluations, name='evaluations'),
     path('evaluations/<int:seminar_id>/', views.evaluations, name='evaluations-detail'),
+    path('evaluations/export/', views.export, {'resource': 'evaluations'}, name='evaluations-export'),
+    path('evaluations/<int:seminar_id>/export/', views.export, {'resource': 'evaluations'}, name='evaluations-export-detail'),
+    path('participants/<str:email>/history/', views.participant_history, name='participant-history'),
     path('certificates/', views.certificates, name='certificates'),
     path('certificates/<int:seminar_id>/', views.certificates, name='certificates-detail'),
+    path('sync/', views.sync, name='sync'),
     path('google-form-submit/', views.google_form_submit, name='google-form-submit'),
+    path('ingest/status/', views.ingest_status, name='ingest-status'),
+    path('metrics/', views.metrics, name='metrics'),
+    # ASGI-native variants of the hot check-in endpoints
+    path('async/health/', async_views.health_check, name='async-health-check'),
+    path('async/attendance/', async_views.attendance, name='async-attendance'),
+    path('async/google-form-submit/', async_views.google_form_submit, name='async-google-form-submit'),
+    path('async/attendance/<int:seminar_id>/stream/', async_views.attendance_stream, name='async-attendance-stream'),
 ]
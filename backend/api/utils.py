@@ -1,4 +1,5 @@
 from functools import wraps
+from django.http import JsonResponse
 from rest_framework.response import Response
 from rest_framework import status
 import traceback
@@ -13,12 +14,26 @@ def exception_catcher(view_func):
             return view_func(request, *args, **kwargs)
         except Exception as e:
             logging.exception("Unhandled exception in API view %s", view_func.__name__)
-            # In DEBUG show traceback to aid development. In production hide details.
-            if getattr(settings, 'DEBUG', False):
-                tb = traceback.format_exc()
-                payload = {'error': str(e), 'traceback': tb}
-            else:
-                payload = {'error': 'Internal Server Error'}
-            return Response(payload, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            return Response(_error_payload(e), status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    return _wrapped
+
+
+def _error_payload(e):
+    # In DEBUG show traceback to aid development. In production hide details.
+    if getattr(settings, 'DEBUG', False):
+        return {'error': str(e), 'traceback': traceback.format_exc()}
+    return {'error': 'Internal Server Error'}
+
+
+def async_exception_catcher(view_func):
+    """exception_catcher for plain async Django views (which return JsonResponse instead of DRF Response)"""
+    @wraps(view_func)
+    async def _wrapped(request, *args, **kwargs):
+        try:
+            return await view_func(request, *args, **kwargs)
+        except Exception as e:
+            logging.exception("Unhandled exception in API view %s", view_func.__name__)
+            return JsonResponse(_error_payload(e), status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     return _wrapped
@@ -1,9 +1,33 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import api_view
+from rest_framework.exceptions import ParseError
 from rest_framework.response import Response
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
 from .utils import exception_catcher
+from .routers import replica_reads
+from .caching import conditional_response, get_seminar_catalog
+from .stats import seminar_stats as get_seminar_stats
+from .checkins import apply_attendance_batch
 from .models import Seminar, Attendance, JoinedParticipant, Certificate, Evaluation
-from .serializers import SeminarSerializer, AttendanceSerializer, JoinedParticipantSerializer, CertificateSerializer, EvaluationSerializer
+from .serializers import SeminarSerializer, AttendanceSerializer, JoinedParticipantSerializer, CertificateSerializer, EvaluationSerializer, AttendanceBulkItemSerializer
+from .serializers import ParticipantHistorySerializer, SeminarReadSerializer, AttendanceReadSerializer, JoinedParticipantReadSerializer, CertificateReadSerializer, EvaluationReadSerializer
+from .pagination import InvalidListParams, attendance_present_q, filter_queryset, get_page_size, joined_present_q, list_response, read_serializer
+from .exports import EXPORTS, EXPORT_FORMATS, render
+from .certificates import get_progress as get_certificate_progress, start_certificate_job
+from .history import participant_history as get_participant_history
+from . import throttling
+from . import webhook
+from .metrics import registry as metrics_registry
+from . import events
+from . import sync as sync_changes
+from . import roster
+from . import analytics
+from . import ingest
+from . import admission
+from . import search as full_text
 
 
 @api_view(['GET'])
@@ -15,13 +39,17 @@ def health_check(request):
 
 @api_view(['GET', 'POST', 'PUT', 'DELETE'])
 @exception_catcher
+@replica_reads
 def seminars(request, seminar_id=None):
     """Get all seminars, create, update, or delete a seminar (stored in SQLite)"""
-    # GET -> list all
+    # GET -> list all (cached until a seminar changes; honours If-None-Match / If-Modified-Since).
+    # questions/metadata are only sent with ?include= or when named in ?fields=
     if request.method == 'GET':
-        qs = Seminar.objects.all().order_by('date')
-        serializer = SeminarSerializer(qs, many=True)
-        return Response(serializer.data)
+        try:
+            serializer = read_serializer(request.query_params, SeminarReadSerializer)
+        except InvalidListParams as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return conditional_response(request, get_seminar_catalog(serializer))
 
     # POST -> create
     if request.method == 'POST':
@@ -60,21 +88,84 @@ def seminars(request, seminar_id=None):
     return Response({'error': 'Invalid request'}, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['GET'])
+@exception_catcher
+@replica_reads
+def seminar_stats(request, seminar_id):
+    """Server-side attendance, dwell-time and evaluation statistics for one seminar"""
+    stats = get_seminar_stats(seminar_id)
+    if stats is None:
+        return Response({'error': 'Seminar not found'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(stats)
+
+
+@api_view(['GET'])
+@exception_catcher
+@replica_reads
+def seminar_analytics(request, seminar_id):
+    """Likert means and distributions, satisfaction and free-text word counts of one seminar's evaluations"""
+    report = analytics.seminar_analytics(seminar_id)
+    if report is None:
+        return Response({'error': 'Seminar not found'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(report)
+
+
+@api_view(['GET'])
+@exception_catcher
+@replica_reads
+def search(request):
+    """Seminars (title, speaker) and joined participants (email, name) matching ``?q=``, newest first"""
+    query = request.query_params.get('q', '').strip()
+    if not query:
+        return Response({'error': 'Missing search query: q'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limit = get_page_size(request.query_params)
+    except InvalidListParams as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({'query': query, **full_text.search(query, limit)})
+
+
+@api_view(['GET'])
+@exception_catcher
+def seminar_admission(request, seminar_id):
+    """Live capacity, joined/present counters and waitlist length of one seminar (read from the primary)"""
+    state = admission.admission(seminar_id)
+    if state is None:
+        return Response({'error': 'Seminar not found'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(state)
+
+
+@api_view(['GET'])
+@exception_catcher
+@replica_reads
+def evaluation_analytics(request):
+    """Evaluation analytics across seminars, optionally for one ``?semester=`` and/or ``?speaker=``"""
+    return Response(analytics.evaluation_analytics(
+        semester=request.query_params.get('semester'),
+        speaker=request.query_params.get('speaker'),
+    ))
+
+
 @api_view(['GET', 'POST'])
 @exception_catcher
+@replica_reads
 def attendance(request, seminar_id=None):
     """Get attendance records, create attendance record for a seminar"""
-    # GET -> list attendance for a seminar
+    # GET -> list attendance (optionally for a seminar), filtered and keyset-paginated
     if request.method == 'GET':
+        qs = Attendance.objects.all()
         if seminar_id:
-            qs = Attendance.objects.filter(seminar_id=seminar_id).order_by('created_at')
-        else:
-            qs = Attendance.objects.all().order_by('created_at')
-        serializer = AttendanceSerializer(qs, many=True)
-        return Response(serializer.data)
+            qs = qs.filter(seminar_id=seminar_id)
+        try:
+            return list_response(request, qs, 'created_at', AttendanceReadSerializer, scoped=bool(seminar_id), present_q=attendance_present_q)
+        except InvalidListParams as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     # POST -> create attendance record
     if request.method == 'POST':
+        if ingest.is_enabled():
+            return queue_attendance_scan(request.data)
+
         # If an attendance row for this seminar+participant already exists, update it (time_in/time_out)
         seminar_id = request.data.get('seminar')
         participant_email = request.data.get('participant_email')
@@ -98,40 +189,141 @@ def attendance(request, seminar_id=None):
         return Response({'error': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
 
 
+def queue_attendance_scan(data):
+    """Validate one scan and append it to the ingestion queue instead of writing it"""
+    serializer = AttendanceBulkItemSerializer(data=data)
+    if not serializer.is_valid():
+        return Response({'error': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+    item = serializer.validated_data
+    if not Seminar.objects.filter(pk=item['seminar']).exists():
+        return Response({'error': {'seminar': ['Seminar not found']}}, status=status.HTTP_400_BAD_REQUEST)
+    queue_id = ingest.enqueue_attendance_scan(item)
+    return Response({'status': 'queued', 'queue_id': queue_id, **serializer.data}, status=status.HTTP_202_ACCEPTED)
+
+
+@require_GET
+def attendance_stream(request, seminar_id):
+    """Server-Sent Events feed of a seminar's check-ins and check-outs (a plain view: DRF would reject Accept: text/event-stream)"""
+    if not Seminar.objects.filter(pk=seminar_id).exists():
+        return HttpResponse('Seminar not found\n', status=status.HTTP_404_NOT_FOUND, content_type='text/plain')
+    response = StreamingHttpResponse(
+        events.stream(seminar_id, events.parse_last_event_id(request)),
+        content_type='text/event-stream',
+    )
+    return events.event_stream_headers(response)
+
+
+@require_GET
+def metrics(request):
+    """Request metrics in the Prometheus text exposition format"""
+    from django.conf import settings
+
+    token = settings.METRICS_TOKEN
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponse('Unauthorized\n', status=status.HTTP_401_UNAUTHORIZED, content_type='text/plain')
+    return HttpResponse(metrics_registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@api_view(['GET'])
+@exception_catcher
+def ingest_status(request):
+    """Depth of the check-in ingestion queue (always empty in direct mode)"""
+    return Response(ingest.queue_status())
+
+
+@api_view(['POST'])
+@exception_catcher
+def attendance_bulk(request):
+    """Apply a batch of check-in/check-out scans (e.g. from an offline QR scanner) in one request"""
+    from django.conf import settings
+
+    records = request.data.get('records') if isinstance(request.data, dict) else request.data
+    if not isinstance(records, list):
+        return Response({'error': 'Expected a list of attendance records'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(records) > settings.ATTENDANCE_BULK_MAX_ITEMS:
+        return Response({'error': f'At most {settings.ATTENDANCE_BULK_MAX_ITEMS} records per request'}, status=status.HTTP_400_BAD_REQUEST)
+
+    results, valid = [], []
+    for index, record in enumerate(records):
+        serializer = AttendanceBulkItemSerializer(data=record)
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+            results.append(None)
+        else:
+            results.append({'index': index, 'status': 'error', 'errors': serializer.errors})
+
+    # Validate every referenced seminar with a single query
+    seminar_ids = {item['seminar'] for _, item in valid}
+    known = set(Seminar.objects.filter(pk__in=seminar_ids).values_list('id', flat=True))
+    applicable = []
+    for index, item in valid:
+        if item['seminar'] in known:
+            applicable.append((index, item))
+        else:
+            results[index] = {'index': index, 'status': 'error', 'errors': {'seminar': ['Seminar not found']}}
+
+    rows = apply_attendance_batch([item for _, item in applicable]) if applicable else {}
+    seen = set()
+    for index, item in applicable:
+        key = (item['seminar'], item['participant_email'])
+        row, created = rows[key]
+        # A row is created once; later scans of the same participant in the batch updated it
+        created = created and key not in seen
+        seen.add(key)
+        results[index] = {
+            'index': index,
+            'status': 'created' if created else 'updated',
+            'data': AttendanceSerializer(row).data,
+        }
+
+    counts = {'created': 0, 'updated': 0, 'error': 0}
+    for result in results:
+        counts[result['status']] += 1
+    return Response({'results': results, 'created': counts['created'], 'updated': counts['updated'], 'failed': counts['error']})
+
+
 @api_view(['GET', 'POST'])
 @exception_catcher
 def joined_participants(request, seminar_id=None):
     """Get joined participants, create joined participant record"""
-    # GET -> list joined participants for a seminar
+    # GET -> list joined participants (optionally for a seminar), filtered and keyset-paginated
     if request.method == 'GET':
+        qs = JoinedParticipant.objects.all()
         if seminar_id:
-            qs = JoinedParticipant.objects.filter(seminar_id=seminar_id).order_by('joined_at')
-        else:
-            qs = JoinedParticipant.objects.all().order_by('joined_at')
-        serializer = JoinedParticipantSerializer(qs, many=True)
-        return Response(serializer.data)
+            qs = qs.filter(seminar_id=seminar_id)
+        try:
+            return list_response(request, qs, 'joined_at', JoinedParticipantReadSerializer, scoped=bool(seminar_id), present_q=joined_present_q)
+        except InvalidListParams as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-    # POST -> create joined participant record
+    # POST -> join through admission: takes a seat, waitlists, or refuses when the seminar is full
     if request.method == 'POST':
         serializer = JoinedParticipantSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+            fields = dict(serializer.validated_data)
+            seminar = fields.pop('seminar')
+            try:
+                participant, _ = admission.admit(seminar.pk, fields.pop('participant_email'), **fields)
+            except admission.SeminarFull:
+                return Response({'error': 'Seminar is full'}, status=status.HTTP_409_CONFLICT)
+            return Response(JoinedParticipantSerializer(participant).data, status=status.HTTP_201_CREATED)
         return Response({'error': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
 
 
 @api_view(['GET', 'POST'])
 @exception_catcher
+@replica_reads
 def evaluations(request, seminar_id=None):
     """Get evaluations, create evaluation record"""
-    # GET -> list evaluations for a seminar
+    # GET -> list evaluations (optionally for a seminar), filtered and keyset-paginated
     if request.method == 'GET':
+        qs = Evaluation.objects.all()
         if seminar_id:
-            qs = Evaluation.objects.filter(seminar_id=seminar_id).order_by('created_at')
-        else:
-            qs = Evaluation.objects.all().order_by('created_at')
-        serializer = EvaluationSerializer(qs, many=True)
-        return Response(serializer.data)
+            qs = qs.filter(seminar_id=seminar_id)
+        try:
+            return list_response(request, qs, 'created_at', EvaluationReadSerializer, scoped=bool(seminar_id))
+        except InvalidListParams as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     # POST -> create evaluation record
     if request.method == 'POST':
@@ -146,14 +338,15 @@ def evaluations(request, seminar_id=None):
 @exception_catcher
 def certificates(request, seminar_id=None):
     """Get certificates, create certificate record"""
-    # GET -> list certificates for a seminar
+    # GET -> list certificates (optionally for a seminar), filtered and keyset-paginated
     if request.method == 'GET':
+        qs = Certificate.objects.all()
         if seminar_id:
-            qs = Certificate.objects.filter(seminar_id=seminar_id).order_by('issued_at')
-        else:
-            qs = Certificate.objects.all().order_by('issued_at')
-        serializer = CertificateSerializer(qs, many=True)
-        return Response(serializer.data)
+            qs = qs.filter(seminar_id=seminar_id)
+        try:
+            return list_response(request, qs, 'issued_at', CertificateReadSerializer, scoped=bool(seminar_id))
+        except InvalidListParams as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     # POST -> create certificate record
     if request.method == 'POST':
@@ -164,82 +357,102 @@ def certificates(request, seminar_id=None):
         return Response({'error': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['GET'])
+@exception_catcher
+@replica_reads
+def participant_history(request, email):
+    """Every seminar a participant joined, with attendance times, evaluation status and certificate"""
+    try:
+        validate_email(email)
+    except ValidationError:
+        return Response({'error': 'Invalid email'}, status=status.HTTP_400_BAD_REQUEST)
+    seminars = get_participant_history(email)
+    return Response({
+        'participant_email': email,
+        'seminars': ParticipantHistorySerializer(seminars, many=True).data,
+    })
+
+
 @api_view(['POST'])
 @exception_catcher
-def google_form_submit(request):
-    """Webhook endpoint for Google Forms submission via Apps Script"""
-    from django.conf import settings
-    
-    # Validate the secret token from environment
-    expected_token = settings.GOOGLE_FORM_SECRET
-    provided_token = request.data.get('secret_token')
-    
-    if not expected_token or provided_token != expected_token:
-        return Response({'error': 'Unauthorized'}, status=status.HTTP_401_UNAUTHORIZED)
-    
-    # Extract form data
-    seminar_id = request.data.get('seminar_id')
-    participant_email = request.data.get('email')
-    participant_name = request.data.get('name')
-    year_section = request.data.get('year_section')
-    
-    if not seminar_id or not participant_email:
-        return Response({'error': 'Missing required fields: seminar_id, email'}, status=status.HTTP_400_BAD_REQUEST)
-    
+def roster_import(request, seminar_id):
+    """Pre-register the participants of an uploaded CSV/XLSX roster (multipart field ``file``)"""
+    if not Seminar.objects.filter(pk=seminar_id).exists():
+        return Response({'error': 'Seminar not found'}, status=status.HTTP_404_NOT_FOUND)
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response({'error': 'Upload the roster as the "file" field'}, status=status.HTTP_400_BAD_REQUEST)
     try:
-        seminar = Seminar.objects.get(pk=seminar_id)
-    except Seminar.DoesNotExist:
+        result = roster.import_roster(seminar_id, roster.read_roster(upload, upload.name))
+    except roster.RosterError as e:
+        return Response({'error': str(e), **(e.result or {})}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(result)
+
+
+@api_view(['GET', 'POST'])
+@exception_catcher
+def sync(request):
+    """Changes since ``?since=<cursor>`` for offline clients (GET), or apply a batch of offline writes (POST)"""
+    # GET reads the primary on purpose: a lagging replica could let the cursor skip rows
+    try:
+        if request.method == 'GET':
+            return Response(sync_changes.changes_since(request.query_params.get('since') or None))
+        return Response(sync_changes.apply_changes(request.data))
+    except InvalidListParams as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['GET'])
+@exception_catcher
+def export(request, resource, seminar_id=None):
+    """Stream attendance or evaluations as CSV (default) or NDJSON (?output=ndjson)"""
+    model, timestamp_field, present_q, build = EXPORTS[resource]
+    output = request.query_params.get('output', 'csv')
+    if output not in EXPORT_FORMATS:
+        return Response({'error': f"output must be one of: {', '.join(EXPORT_FORMATS)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+    qs = model.objects.all()
+    if seminar_id:
+        qs = qs.filter(seminar_id=seminar_id)
+    try:
+        qs = filter_queryset(request.query_params, qs, timestamp_field, present_q=present_q)
+    except InvalidListParams as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    header, rows = build(qs)
+    response = StreamingHttpResponse(render(output, header, rows), content_type=EXPORT_FORMATS[output])
+    suffix = f'-{seminar_id}' if seminar_id else ''
+    response['Content-Disposition'] = f'attachment; filename="{resource}{suffix}.{output}"'
+    return response
+
+
+@api_view(['GET', 'POST'])
+@exception_catcher
+def certificate_job(request, seminar_id):
+    """Start background certificate generation for a seminar (POST) or report its progress (GET)"""
+    if not Seminar.objects.filter(pk=seminar_id).exists():
         return Response({'error': 'Seminar not found'}, status=status.HTTP_404_NOT_FOUND)
-    
-    # Record attendance (time IN)
-    from django.utils import timezone
-    now = timezone.now()
-    
-    attendance_data = {
-        'seminar': seminar_id,
-        'participant_email': participant_email,
-        'time_in': now
-    }
-    
-    attendance_serializer = AttendanceSerializer(data=attendance_data)
-    if attendance_serializer.is_valid():
-        attendance_serializer.save()
-    else:
-        # Try to update existing record
-        try:
-            attendance = Attendance.objects.get(seminar_id=seminar_id, participant_email=participant_email)
-            attendance.time_in = now
-            attendance.save()
-        except Attendance.DoesNotExist:
-            return Response({'error': 'Failed to record attendance', 'details': attendance_serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
-    
-    # Also save as joined participant with name and year/section info
-    joined_data = {
-        'seminar': seminar_id,
-        'participant_email': participant_email,
-        'participant_name': participant_name,
-        'metadata': {'year_section': year_section}
-    }
-    
-    joined_serializer = JoinedParticipantSerializer(data=joined_data)
-    if joined_serializer.is_valid():
-        joined_serializer.save()
-    else:
-        # If already exists, just update it
+
+    if request.method == 'POST':
+        if not start_certificate_job(seminar_id):
+            return Response({'error': 'Certificate generation is already running', 'progress': get_certificate_progress(seminar_id)}, status=status.HTTP_409_CONFLICT)
+        return Response({'progress': get_certificate_progress(seminar_id)}, status=status.HTTP_202_ACCEPTED)
+
+    progress = get_certificate_progress(seminar_id)
+    if progress is None:
+        return Response({'error': 'No certificate generation has run for this seminar'}, status=status.HTTP_404_NOT_FOUND)
+    return Response({'progress': progress})
+
+
+@api_view(['POST'])
+@exception_catcher
+def google_form_submit(request):
+    """Webhook endpoint for Google Forms submission via Apps Script (handled by api.webhook)"""
+    def load_data():
         try:
-            joined = JoinedParticipant.objects.get(seminar_id=seminar_id, participant_email=participant_email)
-            joined.participant_name = participant_name
-            joined.metadata = {'year_section': year_section}
-            joined.present = True
-            joined.check_in = now
-            joined.save()
-        except JoinedParticipant.DoesNotExist:
-            pass  # Joined participant creation failed but attendance was recorded, that's okay
-    
-    return Response({
-        'status': 'success',
-        'message': 'Attendance recorded',
-        'email': participant_email,
-        'name': participant_name,
-        'seminar_id': seminar_id
-    }, status=status.HTTP_201_CREATED)
+            return request.data if isinstance(request.data, dict) else None
+        except ParseError:
+            return None
+
+    code, body, headers = webhook.form_submission(throttling.client_ip(request), load_data)
+    return Response(body, status=code, headers=headers)
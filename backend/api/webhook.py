@@ -0,0 +1,98 @@
+"""The Google Form webhook's check-in handling, shared by the sync and async views.
+
+``form_submission`` runs every step — source-address throttling, token and field
+checks, coalescing of identical submissions, per-seminar throttling, and the queued
+or direct write — and returns ``(status, body, headers)``. The views only turn that
+into a response.
+"""
+import math
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from rest_framework import status
+
+from . import admission, ingest, throttling
+from .checkins import record_form_checkin
+from .models import Seminar
+
+
+def throttled(wait):
+    return status.HTTP_429_TOO_MANY_REQUESTS, {'error': 'Too many requests'}, {'Retry-After': str(math.ceil(wait))}
+
+
+def form_submission(client_ip, load_data):
+    """Handle one webhook call; ``load_data()`` returns the body as a dict (None when malformed).
+
+    The body is only loaded once the source address has a token, so floods are shed unparsed.
+    """
+    wait = throttling.ip_bucket().consume(client_ip)
+    if wait:
+        return throttled(wait)
+
+    data = load_data()
+    if data is None:
+        return status.HTTP_400_BAD_REQUEST, {'error': 'Invalid JSON body'}, {}
+
+    expected_token = settings.GOOGLE_FORM_SECRET
+    if not expected_token or data.get('secret_token') != expected_token:
+        return status.HTTP_401_UNAUTHORIZED, {'error': 'Unauthorized'}, {}
+
+    seminar_id = data.get('seminar_id')
+    participant_email = data.get('email')
+    participant_name = data.get('name')
+    year_section = data.get('year_section')
+
+    if not seminar_id or not participant_email:
+        return status.HTTP_400_BAD_REQUEST, {'error': 'Missing required fields: seminar_id, email'}, {}
+
+    try:
+        validate_email(participant_email)
+    except ValidationError:
+        return status.HTTP_400_BAD_REQUEST, {'error': 'Invalid email'}, {}
+
+    # Apps Script retries and double submissions, even ones arriving at the same moment,
+    # get the first answer back without another write
+    replay_key = throttling.idempotency_key(seminar_id, participant_email, data)
+    replay = throttling.begin(replay_key)
+    if replay is throttling.IN_FLIGHT:
+        return status.HTTP_409_CONFLICT, {'error': 'An identical submission is still being processed'}, {'Retry-After': '1'}
+    if replay:
+        return replay[0], replay[1], {'Idempotent-Replayed': 'true'}
+
+    try:
+        code, body, headers = _check_in(seminar_id, participant_email, participant_name, year_section)
+    except BaseException:
+        throttling.forget(replay_key)
+        raise
+    if code in (status.HTTP_201_CREATED, status.HTTP_202_ACCEPTED):
+        throttling.remember(replay_key, code, body)
+    else:
+        # Not remembered for replay: a retry may find a token or a freed seat
+        throttling.forget(replay_key)
+    return code, body, headers
+
+
+def _check_in(seminar_id, participant_email, participant_name, year_section):
+    wait = throttling.seminar_bucket().consume(seminar_id)
+    if wait:
+        return throttled(wait)
+
+    if not Seminar.objects.filter(pk=seminar_id).exists():
+        return status.HTTP_404_NOT_FOUND, {'error': 'Seminar not found'}, {}
+
+    participant = {'email': participant_email, 'name': participant_name, 'seminar_id': seminar_id}
+    if ingest.is_enabled():
+        queue_id = ingest.enqueue_form_checkin(seminar_id, participant_email, participant_name, year_section)
+        return status.HTTP_202_ACCEPTED, {
+            'status': 'queued', 'message': 'Attendance accepted', **participant, 'queue_id': queue_id,
+        }, {}
+
+    admitted = record_form_checkin(seminar_id, participant_email, participant_name, year_section)
+    if admitted is None:
+        return status.HTTP_409_CONFLICT, {'error': 'Seminar is full'}, {}
+    if admitted == admission.WAITLISTED:
+        return status.HTTP_202_ACCEPTED, {
+            'status': 'waitlisted', 'message': 'Seminar is full; added to the waitlist', **participant,
+        }, {}
+    return status.HTTP_201_CREATED, {'status': 'success', 'message': 'Attendance recorded', **participant}, {}
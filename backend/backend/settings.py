@@ -10,8 +10,10 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -31,6 +33,53 @@ ALLOWED_HOSTS = ['localhost', '127.0.0.1', '*']
 # Google Forms webhook secret token
 GOOGLE_FORM_SECRET = config('GOOGLE_FORM_SECRET', default='your-secret-token-here')
 
+# Token buckets for POST /api/google-form-submit/: refill rate (requests/second) and burst size,
+# per source IP and per seminar. Apps Script calls arrive from a few Google addresses, so the IP
+# bucket is generous. A rate of 0 disables that bucket.
+WEBHOOK_IP_RATE = config('WEBHOOK_IP_RATE', default=20.0, cast=float)
+WEBHOOK_IP_BURST = config('WEBHOOK_IP_BURST', default=100, cast=int)
+WEBHOOK_SEMINAR_RATE = config('WEBHOOK_SEMINAR_RATE', default=20.0, cast=float)
+WEBHOOK_SEMINAR_BURST = config('WEBHOOK_SEMINAR_BURST', default=200, cast=int)
+# Use the first X-Forwarded-For address as the client IP (only behind a trusted proxy)
+WEBHOOK_TRUST_X_FORWARDED_FOR = config('WEBHOOK_TRUST_X_FORWARDED_FOR', default=False, cast=bool)
+# Identical submissions (same seminar, email and payload) within this many seconds get the first response back
+WEBHOOK_IDEMPOTENCY_WINDOW = config('WEBHOOK_IDEMPOTENCY_WINDOW', default=60, cast=int)
+
+# Keyset pagination for the list endpoints (attendance, joined participants, evaluations, certificates)
+API_PAGE_SIZE = config('API_PAGE_SIZE', default=50, cast=int)
+API_MAX_PAGE_SIZE = config('API_MAX_PAGE_SIZE', default=500, cast=int)
+
+# Rows fetched per database round-trip by the streaming CSV/NDJSON exports
+EXPORT_CHUNK_SIZE = config('EXPORT_CHUNK_SIZE', default=2000, cast=int)
+
+# Maximum number of scans accepted by POST /api/attendance/bulk/
+ATTENDANCE_BULK_MAX_ITEMS = config('ATTENDANCE_BULK_MAX_ITEMS', default=1000, cast=int)
+
+# Rows parsed, checked and inserted per transaction by roster imports (api/roster.py)
+ROSTER_IMPORT_CHUNK_SIZE = config('ROSTER_IMPORT_CHUNK_SIZE', default=2000, cast=int)
+
+# Incremental sync (api/sync.py): rows per collection returned by one GET /api/sync/, operations
+# accepted per POST, and how far behind "now" a caught-up cursor is held so rows committed
+# late by a slower transaction are not skipped
+SYNC_PAGE_SIZE = config('SYNC_PAGE_SIZE', default=500, cast=int)
+SYNC_MAX_ITEMS = config('SYNC_MAX_ITEMS', default=1000, cast=int)
+SYNC_CURSOR_LAG_SECONDS = config('SYNC_CURSOR_LAG_SECONDS', default=5, cast=int)
+
+# Check-in ingestion: 'direct' writes each check-in as it arrives; 'queued' acknowledges it
+# with 202 and appends it to a local journal that is applied in batches (see api/ingest.py)
+CHECKIN_INGESTION_MODE = config('CHECKIN_INGESTION_MODE', default='direct')
+if CHECKIN_INGESTION_MODE not in ('direct', 'queued'):
+    raise ImproperlyConfigured("CHECKIN_INGESTION_MODE must be 'direct' or 'queued'")
+CHECKIN_QUEUE_PATH = config('CHECKIN_QUEUE_PATH', default=str(BASE_DIR / 'checkin_queue.sqlite3'))
+# Flush from a thread inside each server process; turn off when a separate `drain_checkin_queue --follow` runs instead
+CHECKIN_FLUSH_IN_PROCESS = config('CHECKIN_FLUSH_IN_PROCESS', default=True, cast=bool)
+CHECKIN_FLUSH_INTERVAL = config('CHECKIN_FLUSH_INTERVAL', default=0.5, cast=float)
+CHECKIN_FLUSH_BATCH_SIZE = config('CHECKIN_FLUSH_BATCH_SIZE', default=500, cast=int)
+# Entries claimed by a flusher that died are retried after this many seconds
+CHECKIN_QUEUE_LEASE_SECONDS = config('CHECKIN_QUEUE_LEASE_SECONDS', default=60, cast=int)
+# Failed flushes (other than transient database errors) before an entry moves to the dead letters
+CHECKIN_MAX_ATTEMPTS = config('CHECKIN_MAX_ATTEMPTS', default=5, cast=int)
+
 
 # Application definition
 
@@ -47,6 +96,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its timings cover the whole middleware stack
+    'api.metrics.RequestMetricsMiddleware',
+    # Before anything that writes the body, so the compressed bytes are what metrics count
+    'api.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -95,13 +148,110 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
+# SQLite tuning applied to every new connection through the backend's init_command hook.
+# WAL lets readers proceed while a check-in is being written; IMMEDIATE transactions take
+# the write lock up front so concurrent writers queue on busy_timeout instead of failing
+# when a read transaction tries to upgrade. Set SQLITE_TUNING=False for stock behaviour.
+SQLITE_TUNING = config('SQLITE_TUNING', default=True, cast=bool)
+SQLITE_PRAGMAS = {
+    'journal_mode': config('SQLITE_JOURNAL_MODE', default='WAL'),
+    'synchronous': config('SQLITE_SYNCHRONOUS', default='NORMAL'),
+    'busy_timeout': config('SQLITE_BUSY_TIMEOUT_MS', default=5000, cast=int),
+    'mmap_size': config('SQLITE_MMAP_SIZE', default=128 * 1024 * 1024, cast=int),
+    'cache_size': config('SQLITE_CACHE_SIZE', default=-20000, cast=int),  # negative = KiB
+    'temp_store': config('SQLITE_TEMP_STORE', default='MEMORY'),
+}
+SQLITE_OPTIONS = {
+    'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+    'transaction_mode': config('SQLITE_TRANSACTION_MODE', default='IMMEDIATE'),
+} if SQLITE_TUNING else {}
+# Run PRAGMA optimize as each connection closes (api/backends/sqlite3), keeping the planner
+# statistics behind the admin's estimated counts current
+SQLITE_OPTIMIZE_ON_CLOSE = config('SQLITE_OPTIMIZE_ON_CLOSE', default=SQLITE_TUNING, cast=bool)
+
+# DB_ENGINE selects the primary database: 'sqlite' (default) or 'postgres'.
+# A read replica is enabled by DB_REPLICA_HOST (postgres) or SQLITE_REPLICA_NAME (a second
+# SQLite file standing in for a replica locally); api.routers.ReadReplicaRouter then sends
+# the read-only GET branches of the catalog/attendance/evaluation views to it.
+DB_ENGINE = config('DB_ENGINE', default='sqlite')
+
+if DB_ENGINE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': config('DB_NAME', default='ws_project'),
+            'USER': config('DB_USER', default='postgres'),
+            'PASSWORD': config('DB_PASSWORD', default=''),
+            'HOST': config('DB_HOST', default='localhost'),
+            'PORT': config('DB_PORT', default='5432'),
+            # psycopg connection pool (requires psycopg[pool]); pooling replaces CONN_MAX_AGE
+            'OPTIONS': {
+                'pool': {
+                    'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+                    'max_size': config('DB_POOL_MAX_SIZE', default=20, cast=int),
+                    'timeout': config('DB_POOL_TIMEOUT', default=10, cast=int),
+                },
+            },
+            'CONN_MAX_AGE': 0,
+        }
+    }
+    DB_REPLICA_HOST = config('DB_REPLICA_HOST', default='')
+    if DB_REPLICA_HOST:
+        DATABASES['replica'] = {
+            **DATABASES['default'],
+            'HOST': DB_REPLICA_HOST,
+            'PORT': config('DB_REPLICA_PORT', default=DATABASES['default']['PORT']),
+            'TEST': {'MIRROR': 'default'},
+        }
+elif DB_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'api.backends.sqlite3',
+            'NAME': config('SQLITE_NAME', default=str(BASE_DIR / 'db.sqlite3')),
+            'OPTIONS': SQLITE_OPTIONS,
+            # Persistent connections: reuse a connection (and its pragmas/page cache) across requests
+            'CONN_MAX_AGE': config('CONN_MAX_AGE', default=60 if SQLITE_TUNING else 0, cast=int),
+            'CONN_HEALTH_CHECKS': True,
+            # A file-backed test database lets concurrent-request tests exercise real SQLite
+            # locking; the default shared-cache in-memory database fails fast on table locks.
+            'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
+        }
+    }
+    SQLITE_REPLICA_NAME = config('SQLITE_REPLICA_NAME', default='')
+    if SQLITE_REPLICA_NAME:
+        DATABASES['replica'] = {
+            **DATABASES['default'],
+            'NAME': SQLITE_REPLICA_NAME,
+            'TEST': {'MIRROR': 'default'},
+        }
+else:
+    raise ImproperlyConfigured(f"DB_ENGINE must be 'sqlite' or 'postgres', not {DB_ENGINE!r}")
+
+DATABASE_ROUTERS = ['api.routers.ReadReplicaRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Local memory by default; point CACHE_BACKEND/CACHE_LOCATION at Redis or Memcached so
+# invalidation is shared when running several worker processes.
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='ws-project'),
+        'TIMEOUT': config('CACHE_TIMEOUT', default=300, cast=int),
     }
 }
 
+# Seconds a rendered seminar catalog may live in cache (it is also invalidated on every save/delete)
+SEMINAR_CATALOG_CACHE_TIMEOUT = config('SEMINAR_CATALOG_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Upper bound on how long per-seminar statistics stay cached; new attendance/evaluations invalidate them sooner
+SEMINAR_STATS_CACHE_TIMEOUT = config('SEMINAR_STATS_CACHE_TIMEOUT', default=300, cast=int)
+
+
+# Most frequent free-text words listed by the evaluation analytics reports (api/analytics.py)
+ANALYTICS_TOP_WORDS = config('ANALYTICS_TOP_WORDS', default=30, cast=int)
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -139,6 +289,74 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Uploaded and generated files (certificates)
+MEDIA_URL = '/media/'
+MEDIA_ROOT = config('MEDIA_ROOT', default=str(BASE_DIR / 'media'))
+
+# Origin used to build absolute file URLs stored on records (e.g. Certificate.file_url)
+PUBLIC_BASE_URL = config('PUBLIC_BASE_URL', default='http://localhost:8000').rstrip('/')
+
+# Certificate generation: worker processes, participants per batch, and after how many seconds without
+# progress a running job counts as dead and may be started again
+CERTIFICATE_WORKERS = config('CERTIFICATE_WORKERS', default=os.cpu_count() or 1, cast=int)
+CERTIFICATE_BATCH_SIZE = config('CERTIFICATE_BATCH_SIZE', default=250, cast=int)
+CERTIFICATE_PROGRESS_TIMEOUT = config('CERTIFICATE_PROGRESS_TIMEOUT', default=3600, cast=int)
+
+# Server-Sent Events attendance feed (api/events.py): how long one stream stays open before the
+# browser reconnects, how often it polls for new scans, and the keep-alive interval. Every open
+# stream runs one query per poll, and on WSGI also holds a worker thread for SSE_STREAM_SECONDS.
+SSE_STREAM_SECONDS = config('SSE_STREAM_SECONDS', default=300, cast=int)
+SSE_POLL_SECONDS = config('SSE_POLL_SECONDS', default=1.0, cast=float)
+SSE_HEARTBEAT_SECONDS = config('SSE_HEARTBEAT_SECONDS', default=15, cast=int)
+SSE_RETRY_MS = config('SSE_RETRY_MS', default=3000, cast=int)
+# Events created this recently are re-read on every poll, so a scan whose transaction committed
+# after a higher id was already sent still reaches open streams (like SYNC_CURSOR_LAG_SECONDS)
+SSE_EVENT_LAG_SECONDS = config('SSE_EVENT_LAG_SECONDS', default=5, cast=int)
+# How long attendance events are kept for reconnecting streams (manage.py prune_attendance_events);
+# a client resuming from a pruned event gets a fresh snapshot instead
+SSE_EVENT_RETENTION_SECONDS = config('SSE_EVENT_RETENTION_SECONDS', default=86400, cast=int)
+
+# JSON via orjson when installed (api/renderers.py, api/parsers.py); same renderers and parsers as DRF's defaults otherwise
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
+# Response compression (api/compression.py): codings in server preference order (br and zstd need
+# requirements-speedups.txt) and the smallest body worth compressing, in bytes
+COMPRESSION_ENCODINGS = config('COMPRESSION_ENCODINGS', default='zstd,br,gzip', cast=Csv())
+COMPRESSION_MIN_SIZE = config('COMPRESSION_MIN_SIZE', default=1024, cast=int)
+
+# Request metrics (api/metrics.py): served at /api/metrics/ in the Prometheus text format.
+# Set METRICS_TOKEN to require "Authorization: Bearer <token>" on that endpoint.
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+# Requests running more queries than this are logged as warnings (0 disables the check)
+QUERY_BUDGET = config('QUERY_BUDGET', default=30, cast=int)
+
+# One JSON line per request on the api.requests logger at INFO; query budget warnings at WARNING
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'api': {
+            'handlers': ['console'],
+            'level': config('API_LOG_LEVEL', default='WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
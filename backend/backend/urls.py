@@ -14,6 +14,8 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
 from django.views.generic import RedirectView
@@ -26,3 +28,6 @@ urlpatterns = [
     # isn't ensuring the trailing slash.
     path('api', RedirectView.as_view(url='/api/', permanent=False)),
 ]
+
+# Serve generated certificates during development; use the web server in production
+urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -35,6 +35,8 @@ function readLocal(key) {
 async function safeFetch(url, opts = {}) {
   try {
     const headers = Object.assign({ 'Accept': 'application/json', 'Content-Type': 'application/json' }, opts.headers || {});
+    // Let the browser set the multipart boundary for file uploads
+    if (typeof FormData !== 'undefined' && opts.body instanceof FormData) delete headers['Content-Type'];
     const response = await fetch(url, { ...opts, headers });
     if (!response.ok) {
       let body = null;
@@ -62,7 +64,8 @@ function writeLocal(key, value) {
 }
 
 export async function fetchSeminars() {
-  const res = await safeFetch(`${API_BASE_URL}/seminars/`);
+  // The list omits the evaluation form and metadata unless asked; both are kept locally and sent back on save
+  const res = await safeFetch(`${API_BASE_URL}/seminars/?include=questions,metadata`);
   if (res.ok && res.data) {
     writeLocal('seminars', res.data);
     return { data: res.data, error: null };
@@ -191,6 +194,25 @@ export async function recordTimeOut(seminarId, participant_email) {
   return { data: [row], error: null };
 }
 
+// Send many queued scans ({ seminar, participant_email, time_in | time_out }) in one
+// request. Scans that cannot reach the backend stay in the local queue so
+// `flushAttendanceQueue` can retry them later.
+export async function recordAttendanceBatch(records) {
+  const res = await safeFetch(`${API_BASE_URL}/attendance/bulk/`, { method: 'POST', body: JSON.stringify({ records }) });
+  if (res.ok && res.data) {
+    return { data: res.data.results, error: null };
+  }
+  writeLocal('attendance_queue', readLocal('attendance_queue').concat(records));
+  return { data: null, error: { message: 'Queued locally' } };
+}
+
+export async function flushAttendanceQueue() {
+  const queued = readLocal('attendance_queue');
+  if (!queued.length) return { data: [], error: null };
+  writeLocal('attendance_queue', []);
+  return recordAttendanceBatch(queued);
+}
+
 export async function fetchAttendance(seminarId) {
   const res = await safeFetch(`${API_BASE_URL}/attendance/${seminarId}/`);
   if (res.ok && res.data) {
@@ -202,6 +224,51 @@ export async function fetchAttendance(seminarId) {
   return { data, error: null };
 }
 
+// Live attendance for a seminar over Server-Sent Events. onSnapshot receives the full list on a
+// fresh connection; onEvent receives each check-in/check-out as it is committed. EventSource
+// reconnects by itself and resumes from the last event id, so only missed scans are re-sent.
+// Returns a function that closes the stream.
+export function subscribeAttendance(seminarId, { onSnapshot, onEvent, onError } = {}) {
+  if (typeof EventSource === 'undefined') return () => {};
+  const source = new EventSource(`${API_BASE_URL}/attendance/${seminarId}/stream/`);
+  source.addEventListener('snapshot', (e) => onSnapshot && onSnapshot(JSON.parse(e.data)));
+  source.addEventListener('attendance', (e) => onEvent && onEvent(JSON.parse(e.data)));
+  if (onError) source.onerror = onError;
+  return () => source.close();
+}
+
+// Pull everything changed since the last sync into the local copies (merging by id and dropping
+// deleted rows), following `has_more` until caught up. The cursor is kept in localStorage, so
+// only rows changed since the previous call are transferred.
+export async function syncChanges() {
+  let cursor = localStorage.getItem('sync_cursor');
+  for (;;) {
+    const query = cursor ? `?since=${encodeURIComponent(cursor)}` : '';
+    const res = await safeFetch(`${API_BASE_URL}/sync/${query}`);
+    if (!res.ok || !res.data) return { data: null, error: { message: 'Sync unavailable' } };
+    const { changes, deleted, has_more } = res.data;
+    Object.keys(changes).forEach((key) => {
+      const gone = new Set(deleted[key]);
+      const byId = new Map(readLocal(key).filter((row) => !gone.has(row.id)).map((row) => [row.id, row]));
+      changes[key].forEach((row) => byId.set(row.id, row));
+      writeLocal(key, Array.from(byId.values()));
+    });
+    cursor = res.data.cursor;
+    localStorage.setItem('sync_cursor', cursor);
+    if (!has_more) return { data: { cursor }, error: null };
+  }
+}
+
+// Push writes made while offline ({ attendance, joined_participants, evaluations }: lists of
+// items keyed by seminar + participant_email) in one request; the server upserts each item.
+export async function pushOfflineWrites(changes) {
+  const res = await safeFetch(`${API_BASE_URL}/sync/`, { method: 'POST', body: JSON.stringify(changes) });
+  if (res.ok && res.data) {
+    return { data: res.data.results, error: null };
+  }
+  return { data: null, error: { message: 'Sync unavailable' } };
+}
+
 export async function deleteSeminar(id) {
   // Try deleting on backend first, fall back to local removal
   if (!id) return { data: null, error: { message: 'id required' } };
@@ -244,6 +311,10 @@ export async function saveJoinedParticipant(seminarId, participant) {
   if (res.ok && res.data) {
     return { data: [res.data], error: null };
   }
+  // A full seminar is an answer, not an outage: do not queue the join locally
+  if (res.status === 409) {
+    return { data: null, error: { message: 'Seminar is full' } };
+  }
   
   // Fallback to localStorage
   const list = readLocal('joined_participants');
@@ -265,8 +336,51 @@ export async function fetchJoinedParticipants(seminarId) {
   return { data, error: null };
 }
 
+// Seminars (title, speaker) and joined participants (email, name) containing every word of the query
+export async function searchAll(query, limit = 20) {
+  const params = new URLSearchParams({ q: query, limit });
+  const res = await safeFetch(`${API_BASE_URL}/search/?${params}`);
+  if (res.ok && res.data) {
+    return { data: res.data, error: null };
+  }
+  return { data: { seminars: [], participants: [] }, error: { message: 'Search unavailable' } };
+}
+
+// Live capacity of a seminar: { capacity, joined, present, available, waitlist_enabled, waitlisted }.
+// capacity and available are null for seminars without a limit.
+export async function fetchAdmission(seminarId) {
+  const res = await safeFetch(`${API_BASE_URL}/seminars/${seminarId}/admission/`);
+  if (res.ok && res.data) {
+    return { data: res.data, error: null };
+  }
+  return { data: null, error: { message: 'Admission status unavailable' } };
+}
+
+// Evaluation analytics (Likert means and distributions, speaker comparison, frequent words).
+// Pass a seminar id for one seminar, or { semester, speaker } for a cross-seminar report.
+export async function fetchEvaluationAnalytics(scope = {}) {
+  const url = typeof scope === 'object'
+    ? `${API_BASE_URL}/analytics/evaluations/?${new URLSearchParams(Object.entries(scope).filter(([, v]) => v))}`
+    : `${API_BASE_URL}/seminars/${scope}/analytics/`;
+  const res = await safeFetch(url);
+  if (res.ok && res.data) {
+    return { data: res.data, error: null };
+  }
+  return { data: null, error: { message: 'Analytics unavailable' } };
+}
+
+// Every seminar a participant joined, with attendance, evaluation and certificate details, in one request
+export async function fetchParticipantHistory(participant_email) {
+  const res = await safeFetch(`${API_BASE_URL}/participants/${encodeURIComponent(participant_email)}/history/`);
+  if (res.ok && res.data) {
+    return { data: res.data.seminars, error: null };
+  }
+  return { data: [], error: { message: 'History unavailable offline' } };
+}
+
 export async function fetchEvaluations(seminarId, participant_email) {
-  const res = await safeFetch(`${API_BASE_URL}/evaluations/${seminarId}/`);
+  const query = participant_email ? `?email=${encodeURIComponent(participant_email)}` : '';
+  const res = await safeFetch(`${API_BASE_URL}/evaluations/${seminarId}/${query}`);
   if (res.ok && res.data) {
     let data = res.data;
     if (participant_email) data = data.filter(e => e.participant_email === participant_email);
@@ -321,6 +435,18 @@ export async function uploadCertificateTemplate(seminarId, file) {
   }
 }
 
+// Pre-register a class from a CSV/XLSX roster (an email column plus optional name and
+// year & section). Returns { inserted, skipped, invalid, errors }.
+export async function importRoster(seminarId, file) {
+  const body = new FormData();
+  body.append('file', file);
+  const res = await safeFetch(`${API_BASE_URL}/seminars/${seminarId}/roster/`, { method: 'POST', body });
+  if (res.ok && res.data) {
+    return { data: res.data, error: null };
+  }
+  return { data: null, error: { message: 'Roster import failed' } };
+}
+
 export async function saveEvaluation(seminarId, participant_email, answers) {
   const payload = { seminar: seminarId, participant_email, answers };
   
@@ -593,13 +719,21 @@ export default {
   upsertSeminar,
   recordTimeIn,
   recordTimeOut,
+  recordAttendanceBatch,
+  flushAttendanceQueue,
   fetchAttendance,
+  subscribeAttendance,
+  syncChanges,
+  pushOfflineWrites,
   deleteSeminar,
   saveJoinedParticipant,
   fetchJoinedParticipants,
   fetchEvaluations,
+  fetchParticipantHistory,
+  fetchEvaluationAnalytics,
   hasEvaluated,
   uploadCertificateTemplate,
+  importRoster,
   saveEvaluation,
   saveAllSeminars,
   checkInParticipant,